@@ -11,7 +11,7 @@ from alembic import context
 # Import settings and models
 from app.core.config import settings
 from app.core.database import Base
-from app.models import User, Category, Case, Task, TaskResult, AuditLog
+from app.models import User, Category, Case, Task, TaskResult, AuditLog, CaseRuntimeStats
 
 # this is the Alembic Config object
 config = context.config
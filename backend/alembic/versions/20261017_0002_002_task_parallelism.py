@@ -0,0 +1,25 @@
+"""Add per-task parallelism
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('parallelism', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'parallelism')
@@ -0,0 +1,25 @@
+"""Add task dispatch mode
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('dispatch_mode', sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'dispatch_mode')
@@ -0,0 +1,37 @@
+"""Multi-target tasks
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('tasks', 'target_ip', type_=sa.String(50), existing_type=sa.String(15), existing_nullable=False)
+    op.add_column('tasks', sa.Column('target_count', sa.Integer(), nullable=False, server_default='1'))
+    
+    op.add_column('task_results', sa.Column('target_ip', sa.String(15), nullable=True))
+    op.execute(
+        "UPDATE task_results SET target_ip = tasks.target_ip "
+        "FROM tasks WHERE tasks.id = task_results.task_id"
+    )
+    op.create_index('ix_task_results_target_ip', 'task_results', ['target_ip'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_results_target_ip', 'task_results')
+    op.drop_column('task_results', 'target_ip')
+    
+    op.drop_column('tasks', 'target_count')
+    op.alter_column('tasks', 'target_ip', type_=sa.String(15), existing_type=sa.String(50), existing_nullable=False)
@@ -0,0 +1,29 @@
+"""Result resource usage
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('task_results', sa.Column('error_reason', sa.String(30), nullable=True))
+    op.add_column('task_results', sa.Column('peak_memory_kb', sa.Integer(), nullable=True))
+    op.add_column('task_results', sa.Column('cpu_seconds', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('task_results', 'cpu_seconds')
+    op.drop_column('task_results', 'peak_memory_kb')
+    op.drop_column('task_results', 'error_reason')
@@ -0,0 +1,27 @@
+"""Per-case timeouts
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('timeout_seconds', sa.Integer(), nullable=True))
+    op.add_column('case_runtime_stats', sa.Column('p99_seconds', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('case_runtime_stats', 'p99_seconds')
+    op.drop_column('cases', 'timeout_seconds')
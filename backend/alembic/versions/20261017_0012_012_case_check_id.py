@@ -0,0 +1,25 @@
+"""Add case check ID for multi-result scripts
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('check_id', sa.String(length=100), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('cases', 'check_id')
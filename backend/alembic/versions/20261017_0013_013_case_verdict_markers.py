@@ -0,0 +1,27 @@
+"""Add case early verdict markers
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('pass_marker', sa.String(length=200), nullable=True))
+    op.add_column('cases', sa.Column('fail_marker', sa.String(length=200), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('cases', 'fail_marker')
+    op.drop_column('cases', 'pass_marker')
@@ -0,0 +1,36 @@
+"""Add result reuse: task reuse flag, result script hash and source
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('reuse_results', sa.Boolean(), nullable=False, server_default='false'))
+    op.add_column('task_results', sa.Column('script_sha256', sa.String(length=64), nullable=True))
+    op.add_column('task_results', sa.Column('reused_from_id', sa.Integer(), nullable=True))
+    op.create_index('ix_task_results_script_sha256', 'task_results', ['script_sha256'])
+    op.create_foreign_key(
+        'fk_task_results_reused_from_id', 'task_results', 'task_results',
+        ['reused_from_id'], ['id'], ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_task_results_reused_from_id', 'task_results', type_='foreignkey')
+    op.drop_index('ix_task_results_script_sha256', 'task_results')
+    op.drop_column('task_results', 'reused_from_id')
+    op.drop_column('task_results', 'script_sha256')
+    op.drop_column('tasks', 'reuse_results')
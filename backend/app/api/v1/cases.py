@@ -32,6 +32,10 @@ def case_to_response(case, db: Session) -> CaseResponse:
         description=case.description,
         fix_suggestion=case.fix_suggestion,
         script_path=case.script_path,
+        timeout_seconds=case.timeout_seconds,
+        check_id=case.check_id,
+        pass_marker=case.pass_marker,
+        fail_marker=case.fail_marker,
         is_enabled=case.is_enabled,
         created_at=case.created_at,
         updated_at=case.updated_at,
@@ -1,46 +1,93 @@
 """
 Task management API endpoints.
 """
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.api.deps import CurrentUser, DBSession
+from app.api.deps import CurrentUser, AdminUser, DBSession
 from app.schemas.task import (
     TaskCreate,
     TaskResponse,
     TaskListResponse,
     TaskDetailResponse,
     TaskResultResponse,
+    TaskParallelismUpdate,
+    TaskQueueStats,
     TaskFilter,
 )
 from app.services.task_service import TaskService
 from app.services.case_service import CaseService
 from app.services.audit_service import AuditService
-from app.tasks.executor import execute_task
+from app.services.progress_buffer import ProgressBuffer, is_buffered
+from app.services.queue_service import QueueService
+from app.tasks.executor import admit_queued_tasks, queue_task
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
-def task_to_response(task, db: Session) -> TaskResponse:
-    """Convert task model to response."""
+def progress_counters(task, unflushed: Optional[dict] = None) -> dict:
+    """Progress counters of a task, plus buffered results not yet written to it."""
+    counters = {
+        "completed_cases": task.completed_cases,
+        "passed_count": task.passed_count,
+        "failed_count": task.failed_count,
+        "error_count": task.error_count,
+    }
+    for field, count in (unflushed or {}).items():
+        counters[field] += count
+    counters["progress"] = round(
+        (counters["completed_cases"] / task.total_cases * 100) if task.total_cases > 0 else 0, 1
+    )
+    return counters
+
+
+def task_to_response(
+    task,
+    db: Session,
+    unflushed: Optional[dict] = None,
+    queue: Optional[dict] = None,
+) -> TaskResponse:
+    """
+    Convert task model to response.
+    
+    Args:
+        unflushed: Buffered counter increments, from ProgressBuffer.pending_counts()
+        queue: QueueService.queue_positions(), computed once per request
+    """
     task_service = TaskService(db)
     username = task_service.get_username(task.user_id)
-    progress = (task.completed_cases / task.total_cases * 100) if task.total_cases > 0 else 0
+    counters = progress_counters(task, unflushed)
+    if queue is None:
+        queue = QueueService(db).queue_positions() if task.status == "queued" else {}
+    queue_position, estimated_start_time = queue.get(task.id, (None, None))
     
     return TaskResponse(
         id=task.id,
         target_ip=task.target_ip,
+        target_count=task.target_count,
         description=task.description,
         user_id=task.user_id,
         username=username,
         status=task.status,
         total_cases=task.total_cases,
-        completed_cases=task.completed_cases,
-        passed_count=task.passed_count,
-        failed_count=task.failed_count,
-        error_count=task.error_count,
-        progress=round(progress, 1),
+        completed_cases=counters["completed_cases"],
+        passed_count=counters["passed_count"],
+        failed_count=counters["failed_count"],
+        error_count=counters["error_count"],
+        parallelism=task.parallelism,
+        dispatch_mode=task.dispatch_mode,
+        target_max_concurrency=task.target_max_concurrency,
+        target_launch_rate=task.target_launch_rate,
+        priority=task.priority,
+        discovery=task.discovery,
+        reuse_results=task.reuse_results,
+        queue_position=queue_position,
+        estimated_start_time=estimated_start_time,
+        progress=counters["progress"],
         start_time=task.start_time,
         end_time=task.end_time,
         created_at=task.created_at,
@@ -48,12 +95,12 @@ def task_to_response(task, db: Session) -> TaskResponse:
 
 
 @router.get("", response_model=TaskListResponse)
-async def list_tasks(
+def list_tasks(
     current_user: CurrentUser,
     db: DBSession,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
-    status: str = Query(None, pattern="^(pending|running|completed|stopped|error)$"),
+    status: str = Query(None, pattern="^(queued|pending|running|paused|completed|stopped|error)$"),
     target_ip: str = Query(None),
     my_tasks: bool = Query(False, description="Only show my tasks"),
 ):
@@ -71,17 +118,30 @@ async def list_tasks(
     
     tasks = task_service.get_all(skip=skip, limit=page_size, filters=filters)
     total = task_service.count(filters=filters)
+    unflushed = ProgressBuffer().pending_counts(t.id for t in tasks) if is_buffered() else {}
+    queue = QueueService(db).queue_positions() if any(t.status == "queued" for t in tasks) else {}
     
     return TaskListResponse(
-        items=[task_to_response(t, db) for t in tasks],
+        items=[task_to_response(t, db, unflushed.get(t.id), queue) for t in tasks],
         total=total,
         page=page,
         page_size=page_size,
     )
 
 
+@router.get("/queue", response_model=TaskQueueStats)
+async def get_task_queue(
+    current_user: CurrentUser,
+    db: DBSession,
+):
+    """
+    Get running and queued task counts against the admission limits.
+    """
+    return TaskQueueStats(**QueueService(db).get_stats())
+
+
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def create_task(
+def create_task(
     task_data: TaskCreate,
     current_user: CurrentUser,
     db: DBSession,
@@ -90,12 +150,28 @@ async def create_task(
     Create a new detection task.
     
     - **target_ip**: Target IP address to scan (IPv4 format)
+    - **targets**: Alternatively, a list of IPv4 addresses to scan
+    - **target_cidr**: Alternatively, an IPv4 network to scan (e.g. 192.168.1.0/24)
     - **case_ids**: Optional list of specific case IDs. If not provided, runs all enabled cases.
+    - **parallelism**: Optional number of cases to run concurrently against the target.
+    - **dispatch_mode**: Optional 'single' or 'distributed' (spread case chunks across all workers).
+    - **target_max_concurrency**: Optional cap on scripts running against one target, across all workers.
+    - **target_launch_rate**: Optional cap on scripts started per second against one target.
+    - **discovery**: Optional; scan each target with nmap once and hand the result to every script.
+    - **reuse_results**: Optional; copy recent pass/fail results of unchanged scripts instead of running them.
     """
     task_service = TaskService(db)
     case_service = CaseService(db)
     audit_service = AuditService(db)
     
+    # Validate target count
+    target_count = task_data.count_targets()
+    if target_count > settings.TASK_MAX_TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many targets: {target_count} (maximum {settings.TASK_MAX_TARGETS})",
+        )
+    
     # Validate case_ids if provided
     if task_data.case_ids:
         for case_id in task_data.case_ids:
@@ -119,6 +195,13 @@ async def create_task(
                 detail="No enabled cases available for execution",
             )
     
+    # Backpressure: refuse new work while the queue is full
+    if QueueService(db).is_full():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Task queue is full ({settings.TASK_MAX_QUEUED_TASKS} tasks waiting), try again later",
+        )
+    
     # Create task
     task = task_service.create(task_data, current_user.id, task_data.case_ids)
     
@@ -129,17 +212,17 @@ async def create_task(
         username=current_user.username,
         resource_type="task",
         resource_id=task.id,
-        details={"target_ip": task.target_ip, "total_cases": task.total_cases},
+        details={"target_ip": task.target_ip, "target_count": task.target_count, "total_cases": task.total_cases},
     )
     
-    # Trigger async execution
-    execute_task.delay(task.id)
+    # Queue for execution; starts right away if the running limits allow
+    queue_task(db, task)
     
     return task_to_response(task, db)
 
 
 @router.get("/{task_id}", response_model=TaskDetailResponse)
-async def get_task(
+def get_task(
     task_id: int,
     current_user: CurrentUser,
     db: DBSession,
@@ -156,40 +239,64 @@ async def get_task(
             detail="Task not found",
         )
     
-    # Get task results
+    # Get task results, with buffered outcomes that have not been flushed yet
     results = task_service.get_task_results(task_id)
+    buffered, unflushed = {}, None
+    if is_buffered():
+        progress_buffer = ProgressBuffer()
+        buffered = progress_buffer.pending_results(task_id)
+        unflushed = progress_buffer.pending_counts([task_id]).get(task_id)
+    
     result_responses = []
     for r in results:
         case_info = task_service.get_case_info(r.case_id)
+        outcome = buffered.get(r.id, {})
         result_responses.append(TaskResultResponse(
             id=r.id,
             task_id=r.task_id,
             case_id=r.case_id,
+            target_ip=r.target_ip,
             case_name=case_info["case_name"],
             category_name=case_info["category_name"],
             risk_level=case_info["risk_level"],
-            status=r.status,
+            status=outcome.get("status", r.status),
             retry_count=r.retry_count,
             start_time=r.start_time,
-            end_time=r.end_time,
-            error_message=r.error_message,
+            end_time=outcome.get("end_time", r.end_time),
+            error_message=outcome.get("error_message", r.error_message),
+            error_reason=outcome.get("error_reason", r.error_reason),
+            peak_memory_kb=outcome.get("peak_memory_kb", r.peak_memory_kb),
+            cpu_seconds=outcome.get("cpu_seconds", r.cpu_seconds),
+            reused_from_id=r.reused_from_id,
         ))
     
     username = task_service.get_username(task.user_id)
-    progress = (task.completed_cases / task.total_cases * 100) if task.total_cases > 0 else 0
+    counters = progress_counters(task, unflushed)
+    queue = QueueService(db).queue_positions() if task.status == "queued" else {}
+    queue_position, estimated_start_time = queue.get(task.id, (None, None))
     
     return TaskDetailResponse(
         id=task.id,
         target_ip=task.target_ip,
+        target_count=task.target_count,
         user_id=task.user_id,
         username=username,
         status=task.status,
         total_cases=task.total_cases,
-        completed_cases=task.completed_cases,
-        passed_count=task.passed_count,
-        failed_count=task.failed_count,
-        error_count=task.error_count,
-        progress=round(progress, 1),
+        completed_cases=counters["completed_cases"],
+        passed_count=counters["passed_count"],
+        failed_count=counters["failed_count"],
+        error_count=counters["error_count"],
+        parallelism=task.parallelism,
+        dispatch_mode=task.dispatch_mode,
+        target_max_concurrency=task.target_max_concurrency,
+        target_launch_rate=task.target_launch_rate,
+        priority=task.priority,
+        discovery=task.discovery,
+        reuse_results=task.reuse_results,
+        queue_position=queue_position,
+        estimated_start_time=estimated_start_time,
+        progress=counters["progress"],
         start_time=task.start_time,
         end_time=task.end_time,
         created_at=task.created_at,
@@ -198,13 +305,13 @@ async def get_task(
 
 
 @router.post("/{task_id}/stop")
-async def stop_task(
+def stop_task(
     task_id: int,
     current_user: CurrentUser,
     db: DBSession,
 ):
     """
-    Stop a running task.
+    Stop a queued, running or paused task. Scripts still running are killed.
     """
     task_service = TaskService(db)
     audit_service = AuditService(db)
@@ -216,13 +323,14 @@ async def stop_task(
             detail="Task not found",
         )
     
-    if task.status not in ("pending", "running"):
+    if task.status not in ("queued", "pending", "running", "paused"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot stop task with status: {task.status}",
         )
     
     task_service.stop_task(task)
+    admit_queued_tasks(db)
     
     # Log audit
     audit_service.log(
@@ -237,8 +345,160 @@ async def stop_task(
     return {"message": "Task stopped successfully"}
 
 
+@router.post("/{task_id}/pause")
+def pause_task(
+    task_id: int,
+    current_user: CurrentUser,
+    db: DBSession,
+):
+    """
+    Pause a running task.
+    
+    No new cases are launched; cases already running finish normally.
+    Remaining cases stay pending until the task is resumed.
+    """
+    task_service = TaskService(db)
+    audit_service = AuditService(db)
+    
+    task = task_service.get_by_id(task_id)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    
+    if task.status not in ("queued", "pending", "running"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot pause task with status: {task.status}",
+        )
+    
+    task_service.pause_task(task)
+    admit_queued_tasks(db)
+    
+    # Log audit
+    audit_service.log(
+        action="update",
+        user_id=current_user.id,
+        username=current_user.username,
+        resource_type="task",
+        resource_id=task_id,
+        details={"action": "pause"},
+    )
+    
+    return {"message": "Task paused successfully"}
+
+
+@router.post("/{task_id}/resume")
+def resume_task(
+    task_id: int,
+    current_user: CurrentUser,
+    db: DBSession,
+):
+    """
+    Resume a paused task from its remaining pending cases.
+    """
+    task_service = TaskService(db)
+    audit_service = AuditService(db)
+    
+    task = task_service.get_by_id(task_id)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    
+    if task.status != "paused":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot resume task with status: {task.status}",
+        )
+    
+    task_service.resume_task(task)
+    
+    # Log audit
+    audit_service.log(
+        action="update",
+        user_id=current_user.id,
+        username=current_user.username,
+        resource_type="task",
+        resource_id=task_id,
+        details={"action": "resume"},
+    )
+    
+    # Queue for execution; starts right away if the running limits allow
+    queue_task(db, task)
+    
+    return {"message": "Task resumed successfully"}
+
+
+@router.put("/{task_id}/parallelism", response_model=TaskResponse)
+def update_task_parallelism(
+    task_id: int,
+    data: TaskParallelismUpdate,
+    current_user: CurrentUser,
+    db: DBSession,
+):
+    """
+    Change how many cases a task runs at once. Applies to running tasks on their next launch.
+    """
+    task_service = TaskService(db)
+    audit_service = AuditService(db)
+    
+    task = task_service.get_by_id(task_id)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    
+    if task.status not in ("queued", "pending", "running", "paused"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot change parallelism of task with status: {task.status}",
+        )
+    
+    old_parallelism = task.parallelism
+    task = task_service.set_parallelism(task, data.parallelism)
+    
+    # Log audit
+    audit_service.log(
+        action="update",
+        user_id=current_user.id,
+        username=current_user.username,
+        resource_type="task",
+        resource_id=task_id,
+        details={"action": "parallelism", "old": old_parallelism, "new": data.parallelism},
+    )
+    
+    return task_to_response(task, db)
+
+
+@router.post("/{task_id}/recount", response_model=TaskResponse)
+async def recount_task(
+    task_id: int,
+    current_user: AdminUser,
+    db: DBSession,
+):
+    """
+    Recompute a task's progress counters from its results (admin only).
+    
+    Counters are normally maintained incrementally; this repairs them if they drifted.
+    """
+    from app.services.execution_service import ExecutionService
+    
+    task = ExecutionService(db).recount_task_progress(task_id)
+    if task is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found",
+        )
+    
+    return task_to_response(task, db)
+
+
 @router.post("/{task_id}/retry")
-async def retry_task(
+def retry_task(
     task_id: int,
     current_user: CurrentUser,
     db: DBSession,
@@ -280,14 +540,14 @@ async def retry_task(
         details={"action": "retry", "retry_count": retry_count},
     )
     
-    # Trigger async execution
-    execute_task.delay(task_id)
+    # Queue for execution; starts right away if the running limits allow
+    queue_task(db, task)
     
     return {"message": f"Retrying {retry_count} failed cases", "retry_count": retry_count}
 
 
 @router.post("/{task_id}/rerun")
-async def rerun_task(
+def rerun_task(
     task_id: int,
     current_user: CurrentUser,
     db: DBSession,
@@ -327,7 +587,7 @@ async def rerun_task(
         details={"action": "rerun", "reset_count": reset_count},
     )
     
-    # Trigger async execution
-    execute_task.delay(task_id)
+    # Queue for execution; starts right away if the running limits allow
+    queue_task(db, task)
     
     return {"message": f"Re-running {reset_count} cases", "reset_count": reset_count}
@@ -3,9 +3,20 @@ Celery application configuration.
 """
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Queue
 
 from app.core.config import settings
 
+# Queues, each consumed by its own worker pool so that housekeeping never
+# takes a slot from a running scan:
+#   scan        - task execution (execute_task, execute_chunk, finalize_task)
+#   maintenance - periodic cleanup and archiving, admission of queued tasks,
+#                 recovery of tasks whose worker died
+#   celery      - anything unrouted
+SCAN_QUEUE = "scan"
+MAINTENANCE_QUEUE = "maintenance"
+DEFAULT_QUEUE = "celery"
+
 celery_app = Celery(
     "autosecdet",
     broker=settings.REDIS_URL,
@@ -21,7 +32,30 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     
-    # Worker settings
+    # Queues and routing
+    task_queues=(
+        Queue(SCAN_QUEUE),
+        Queue(MAINTENANCE_QUEUE),
+        Queue(DEFAULT_QUEUE),
+    ),
+    task_default_queue=DEFAULT_QUEUE,
+    
+    # Ten priority levels per queue; within a queue the Redis transport
+    # delivers level 0 first. Used for fair-share ordering of scan messages
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+    },
+    task_routes={
+        "app.tasks.executor.test_celery": {"queue": DEFAULT_QUEUE},
+        "app.tasks.executor.dispatch_queued_tasks": {"queue": MAINTENANCE_QUEUE},
+        "app.tasks.executor.reap_stale_tasks": {"queue": MAINTENANCE_QUEUE},
+        "app.tasks.executor.*": {"queue": SCAN_QUEUE},
+        "app.tasks.cleanup.*": {"queue": MAINTENANCE_QUEUE},
+    },
+    
+    # Worker settings; defaults for a worker started without -Q, the
+    # per-queue pools override them on the command line
     worker_concurrency=4,
     worker_prefetch_multiplier=1,
     
@@ -34,6 +68,16 @@ celery_app.conf.update(
     
     # Beat schedule for periodic tasks
     beat_schedule={
+        # Admit queued tasks missed by the inline dispatcher
+        "dispatch-queued-tasks": {
+            "task": "app.tasks.executor.dispatch_queued_tasks",
+            "schedule": settings.TASK_ADMISSION_INTERVAL_SECONDS,
+        },
+        # Requeue results of dead workers and resume their tasks
+        "reap-stale-tasks": {
+            "task": "app.tasks.executor.reap_stale_tasks",
+            "schedule": settings.TASK_REAPER_INTERVAL_SECONDS,
+        },
         # Clean expired logs daily at 3:00 AM UTC
         "cleanup-expired-logs": {
             "task": "app.tasks.cleanup.cleanup_expired_logs",
@@ -50,11 +50,66 @@ class Settings(BaseSettings):
     
     # Script Execution
     SCRIPT_TIMEOUT_SECONDS: int = 300
+    SCRIPT_ADAPTIVE_TIMEOUT: bool = True  # derive timeouts from each case's p99 duration
+    SCRIPT_ADAPTIVE_TIMEOUT_MULTIPLIER: float = 3.0
+    SCRIPT_ADAPTIVE_TIMEOUT_MIN_SECONDS: int = 30
+    SCRIPT_ADAPTIVE_TIMEOUT_MAX_SECONDS: int = 1800
+    SCRIPT_ADAPTIVE_TIMEOUT_MIN_SAMPLES: int = 5
     SCRIPT_MAX_MEMORY_MB: int = 512
+    SCRIPT_OUTPUT_SUMMARY_CHARS: int = 2000  # head + tail of the output kept for result messages
+    SCRIPT_EARLY_VERDICT_GRACE_SECONDS: float = 5.0  # a script may run this long after its verdict marker
+    SCRIPT_MAX_CPU_SECONDS: int = 300  # raised to a run's timeout when that is longer
+    SCRIPT_MAX_OPEN_FILES: int = 1024
+    SCRIPT_MAX_PROCESSES: int = 128
+    SCRIPT_CGROUP_ROOT: str = "/sys/fs/cgroup/autosecdet"  # cgroup v2 subtree delegated to the worker
+    SCRIPT_ENGINE: str = "thread"  # 'thread' | 'asyncio'
+    SCRIPT_PYTHON_RUNNER: str = "popen"  # 'popen' | 'prefork'
+    SCRIPT_PREFORK_POOL_SIZE: int = 2
+    SCRIPT_PREFORK_MODULES: List[str] = [
+        "socket", "ssl", "json", "re", "http.client", "urllib.request",
+        "requests", "paramiko",
+    ]
     SCRIPTS_DIR: str = "/data/scripts"
     LOGS_DIR: str = "/data/logs"
     REPORTS_DIR: str = "/data/reports"
     
+    # Task Execution
+    TASK_DEFAULT_PARALLELISM: int = 4
+    TASK_MAX_PARALLELISM: int = 32
+    TASK_DISPATCH_MODE: str = "single"  # 'single' | 'distributed'
+    TASK_CHUNK_SIZE: int = 10
+    TASK_MAX_TARGETS: int = 1024
+    TASK_SCHEDULE_ORDER: str = "longest_first"  # 'longest_first' | 'id'
+    CASE_DURATION_WINDOW: int = 50  # recent durations kept per case for p50/p95
+    TARGET_MAX_CONCURRENT_SCRIPTS: int = 4  # per target IP across all workers, 0 = unlimited
+    TARGET_LAUNCH_RATE_PER_SECOND: float = 0  # per target IP, 0 = unlimited
+    TARGET_PREFLIGHT_ENABLED: bool = True  # fail a dead target's cases without running them
+    TARGET_PREFLIGHT_PORTS: List[int] = [22, 23, 80, 443, 554, 8000, 8080]
+    TARGET_PREFLIGHT_ICMP: bool = True
+    TARGET_PREFLIGHT_TIMEOUT_SECONDS: float = 2.0
+    TARGET_LIVENESS_INTERVAL_SECONDS: int = 60  # re-check during a run, 0 = before the run only
+    TARGET_DISCOVERY_ENABLED: bool = False  # default for tasks that do not choose
+    TARGET_DISCOVERY_NMAP_ARGS: List[str] = ["-Pn", "-sV", "-T4", "--top-ports", "1000"]
+    TARGET_DISCOVERY_TIMEOUT_SECONDS: int = 600
+    TARGET_DISCOVERY_TTL_SECONDS: int = 3600
+    TASK_STOP_GRACE_SECONDS: float = 1.0  # SIGTERM to SIGKILL delay when a task is stopped
+    TASK_CONTROL_POLL_SECONDS: float = 5.0  # database check for control messages missed on the Redis channel
+    PROGRESS_WRITE_MODE: str = "direct"  # 'direct' | 'buffered' (results go through Redis, flushed in batches)
+    PROGRESS_FLUSH_INTERVAL_MS: int = 500
+    TASK_DEFAULT_PRIORITY: int = 5  # 0-9, higher runs first
+    TASK_MAX_RUNNING_TASKS: int = 4  # tasks admitted at once, 0 = unlimited
+    TASK_MAX_RUNNING_CASES: int = 64  # sum of admitted tasks' parallelism, 0 = unlimited
+    TASK_MAX_QUEUED_TASKS: int = 0  # new tasks are refused beyond this, 0 = unlimited
+    TASK_ADMISSION_INTERVAL_SECONDS: int = 15
+    TASK_AUTO_RETRY_MAX_ATTEMPTS: int = 2  # in-run retries of results ending in a transient error, 0 = off
+    TASK_AUTO_RETRY_BACKOFF_SECONDS: float = 5.0  # before the first retry, doubled for each further one
+    TASK_AUTO_RETRY_BACKOFF_MAX_SECONDS: float = 60.0
+    TASK_RESULT_LEASE_SECONDS: int = 90  # a running result not renewed for this long is requeued
+    TASK_HEARTBEAT_SECONDS: int = 20  # how often schedulers renew their leases
+    TASK_LEASE_MAX_RECOVERIES: int = 2  # requeues of a result after lost workers before it is failed
+    TASK_REAPER_INTERVAL_SECONDS: int = 60
+    TASK_RESULT_REUSE_TTL_SECONDS: int = 3600  # age of pass/fail results that tasks with reuse_results may copy
+    
     # Data Retention
     LOG_RETENTION_DAYS: int = 30
     TASK_RETENTION_DAYS: int = 90
@@ -1,4 +1,5 @@
 # Script execution engine
-from app.engine.executor import ScriptExecutor
+from app.engine.executor import ErrorReason, ExecutionOutcome, ScriptExecutor
+from app.engine.async_executor import AsyncScriptExecutor
 
-__all__ = ["ScriptExecutor"]
+__all__ = ["ErrorReason", "ExecutionOutcome", "ScriptExecutor", "AsyncScriptExecutor"]
@@ -0,0 +1,248 @@
+"""
+asyncio-based script execution engine.
+
+One event loop per worker process supervises every running script instead
+of one thread per script. How many run at once is still the scheduler's
+business: each task keeps at most its parallelism (capped by
+TASK_MAX_PARALLELISM) scripts in flight.
+"""
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+from app.core.logging import get_logger
+from app.engine.early_verdict import VerdictMarkers
+from app.engine.executor import ExecutionOutcome, ScriptExecutor, ScriptRun
+from app.engine.limits import ProcessExit, cgroup_manager, gated_command
+from app.engine.output import PipeReader
+from app.engine.prefork import get_interpreter_pool
+from app.engine.task_control import task_processes
+
+logger = get_logger(__name__)
+
+
+class _EventLoopThread:
+    """Event loop running forever in a daemon thread, shared by the process."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def get(self) -> asyncio.AbstractEventLoop:
+        """Return the running loop, starting it if needed."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="script-event-loop",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+
+_event_loop = _EventLoopThread()
+
+
+class AsyncScriptExecutor(ScriptExecutor):
+    """
+    Script executor built on asyncio.create_subprocess_exec.
+    
+    Keeps the ScriptExecutor contract: per-script timeout, kill on timeout,
+    resource limits, log capture and an ExecutionOutcome result. The event
+    loop reaps the scripts, so resource usage is only recorded when the
+    script ran in a cgroup or in the interpreter pool.
+    """
+    
+    def submit(
+        self,
+        script_path: str,
+        target_ip: str,
+        task_id: int,
+        result_id: int,
+        timeout: Optional[int] = None,
+        adaptive_timeout: bool = False,
+        extra_env: Optional[Dict[str, str]] = None,
+        collect_verdicts: bool = False,
+        markers: Optional[VerdictMarkers] = None,
+    ) -> Future:
+        """
+        Schedule a script on the shared event loop from any thread.
+        
+        Returns:
+            concurrent.futures.Future resolving to an ExecutionOutcome
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.execute_async(
+                script_path, target_ip, task_id, result_id, timeout, adaptive_timeout, extra_env,
+                collect_verdicts, markers,
+            ),
+            _event_loop.get(),
+        )
+    
+    async def _run_process_async(self, run: ScriptRun) -> ProcessExit:
+        """
+        Run a script command, streaming its output through a pipe into run.capture.
+        
+        The script's process group is registered under the task and handed
+        to run.early, and the verdict channel is read into run.verdicts, as in
+        the blocking engine.
+        
+        Returns:
+            ProcessExit with the exit code (and resource usage when known)
+            
+        Raises:
+            asyncio.TimeoutError: If the script was killed after the timeout
+        """
+        # The pipe is ours rather than the subprocess transport's, so waiting
+        # for the script does not also wait for processes it left behind
+        cmd, env, timeout, cgroup = run.cmd, run.env, run.timeout, run.cgroup
+        capture, verdicts, early = run.capture, run.verdicts, run.early
+        read_fd, write_fd = os.pipe()
+        transport, pump = await self._connect_reader(read_fd, capture)
+        verdict_fd = verdict_transport = verdict_pump = None
+        if verdicts is not None:
+            verdict_read_fd, verdict_fd = self._open_verdict_pipe(env)
+            verdict_transport, verdict_pump = await self._connect_reader(verdict_read_fd, verdicts)
+        
+        try:
+            with task_processes.track(run.task_id) as on_start:
+                if early is not None:
+                    on_start = early.started(on_start)
+                if self._use_prefork(cmd):
+                    return await get_interpreter_pool().run_async(
+                        script=cmd[1],
+                        argv=cmd[1:],
+                        env=env,
+                        cwd=str(self.scripts_dir),
+                        output_fd=write_fd,
+                        timeout=timeout,
+                        rlimits=run.limits.as_rlimits(include_nproc=cgroup is None),
+                        cgroup_procs=cgroup.procs_path if cgroup else None,
+                        on_start=on_start,
+                        verdict_fd=verdict_fd,
+                    )
+                
+                gate_read, gate_write = os.pipe()
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        *gated_command(cmd),
+                        stdin=gate_read,
+                        stdout=write_fd,
+                        stderr=subprocess.STDOUT,
+                        env=env,
+                        cwd=str(self.scripts_dir),
+                        start_new_session=True,
+                        pass_fds=() if verdict_fd is None else (verdict_fd,),
+                    )
+                except BaseException:
+                    os.close(gate_write)
+                    raise
+                finally:
+                    os.close(gate_read)
+                try:
+                    run.limits.release(process.pid, gate_write, cgroup)
+                except OSError:
+                    self._kill_group(process.pid)
+                    await process.wait()
+                    raise
+                on_start(process.pid)
+                os.close(write_fd)
+                write_fd = None
+                if verdict_fd is not None:
+                    os.close(verdict_fd)
+                    verdict_fd = None
+                
+                try:
+                    return ProcessExit(await asyncio.wait_for(process.wait(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    self._kill_group(process.pid)
+                    await process.wait()
+                    raise
+        finally:
+            if early is not None:
+                early.cancel()
+            if write_fd is not None:
+                os.close(write_fd)
+            if verdict_fd is not None:
+                os.close(verdict_fd)
+            await capture.finish_async(pump)
+            transport.close()
+            if verdicts is not None:
+                await verdicts.finish_async(verdict_pump)
+                verdict_transport.close()
+    
+    async def _connect_reader(self, read_fd: int, sink: PipeReader) -> Tuple[asyncio.BaseTransport, asyncio.Task]:
+        """
+        Read the read end of a pipe from the event loop into `sink`.
+        
+        Returns:
+            Tuple of (pipe transport, task running sink.pump_async())
+        """
+        reader = asyncio.StreamReader()
+        transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader),
+            os.fdopen(read_fd, "rb", 0),
+        )
+        return transport, asyncio.ensure_future(sink.pump_async(reader))
+    
+    async def execute_async(
+        self,
+        script_path: str,
+        target_ip: str,
+        task_id: int,
+        result_id: int,
+        timeout: Optional[int] = None,
+        adaptive_timeout: bool = False,
+        extra_env: Optional[Dict[str, str]] = None,
+        collect_verdicts: bool = False,
+        markers: Optional[VerdictMarkers] = None,
+    ) -> ExecutionOutcome:
+        """
+        Execute a detection script without blocking the event loop.
+        
+        Args:
+            script_path: Relative path to the script
+            target_ip: Target IP address
+            task_id: Task ID for logging
+            result_id: Result ID for logging
+            timeout: Timeout for this run, or None to use the executor's timeout
+            adaptive_timeout: Whether `timeout` was derived from the case's history
+            extra_env: Additional environment variables, e.g. target discovery results
+            collect_verdicts: Open the verdict channel (VERDICT_FD) and return
+                the verdicts in ExecutionOutcome.verdicts
+            markers: The case's early verdict markers; the first output line
+                containing one decides the result and ends the script
+            
+        Returns:
+            ExecutionOutcome; unpacks as (status, error_message, log_path)
+            status: 'pass', 'fail', or 'error'
+        """
+        run = self._prepare_run(
+            script_path, target_ip, task_id, result_id, timeout, adaptive_timeout, extra_env, markers,
+        )
+        if isinstance(run, ExecutionOutcome):
+            return run
+        
+        logger.info(f"Executing (asyncio): {' '.join(run.cmd)}")
+        try:
+            run.cgroup = cgroup_manager.create(run.limits, f"task{task_id}-result{result_id}")
+            with open(run.log_path, "w") as log_file:
+                self._start_log(run, log_file, collect_verdicts)
+                start_time = time.time()
+                try:
+                    process_exit = await self._run_process_async(run)
+                except asyncio.TimeoutError:
+                    process_exit = None
+                return self._finish_run(run, log_file, process_exit, time.time() - start_time)
+        except Exception as e:
+            return self._failed_outcome(run, e)
+        finally:
+            if run.cgroup is not None:
+                run.cgroup.remove()
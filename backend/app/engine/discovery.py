@@ -0,0 +1,169 @@
+"""
+Per-target service discovery shared by every script of a task.
+
+Tasks with discovery enabled run one nmap scan per target before their
+cases start. The parsed result is cached in Redis for
+TARGET_DISCOVERY_TTL_SECONDS, so every worker and every later task against
+the same target reuses it; a Redis lock makes concurrent schedulers wait for
+one scan instead of each starting their own.
+
+Scripts receive the result through two environment variables next to
+TARGET_IP:
+
+    TARGET_DISCOVERY_FILE: JSON file with the scan result (see parse_nmap_xml)
+    TARGET_OPEN_PORTS: Comma-separated open TCP ports, e.g. "22,80,443"
+"""
+import json
+import os
+import shutil
+import subprocess
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "autosecdet:discovery"
+
+
+def parse_nmap_xml(target_ip: str, xml_output: str) -> Dict[str, Any]:
+    """
+    Reduce nmap's XML output to what scripts need.
+    
+    Returns:
+        {"target_ip", "scanned_at", "host_state", "ports": [{"port", "protocol",
+        "state", "service", "product", "version"}]}
+    """
+    root = ET.fromstring(xml_output)
+    host = root.find("host")
+    ports = []
+    host_state = None
+    if host is not None:
+        status = host.find("status")
+        host_state = status.get("state") if status is not None else None
+        for port in host.iter("port"):
+            state = port.find("state")
+            service = port.find("service")
+            ports.append({
+                "port": int(port.get("portid")),
+                "protocol": port.get("protocol"),
+                "state": state.get("state") if state is not None else None,
+                "service": service.get("name") if service is not None else None,
+                "product": service.get("product") if service is not None else None,
+                "version": service.get("version") if service is not None else None,
+            })
+    return {
+        "target_ip": target_ip,
+        "scanned_at": datetime.utcnow().isoformat(),
+        "host_state": host_state,
+        "ports": ports,
+    }
+
+
+def open_ports(result: Dict[str, Any]) -> list[int]:
+    """Open TCP ports of a discovery result, ascending."""
+    return sorted(
+        p["port"] for p in result.get("ports", [])
+        if p.get("state") == "open" and p.get("protocol") == "tcp"
+    )
+
+
+class TargetDiscovery:
+    """Runs, caches and hands out per-target discovery scans."""
+    
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.client = client or redis_client
+        self.output_dir = Path(settings.LOGS_DIR) / "discovery"
+    
+    def env_for(self, target_ip: str) -> Dict[str, str]:
+        """
+        Discover a target (or reuse the cached scan) and build the script environment.
+        
+        Returns:
+            TARGET_DISCOVERY_FILE and TARGET_OPEN_PORTS, or an empty dict if
+            the scan failed; scripts then do their own probing
+        """
+        result = self.get(target_ip)
+        if result is None:
+            return {}
+        
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{target_ip}.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(result, indent=2))
+        tmp_path.replace(path)
+        
+        return {
+            "TARGET_DISCOVERY_FILE": str(path),
+            "TARGET_OPEN_PORTS": ",".join(str(p) for p in open_ports(result)),
+        }
+    
+    def get(self, target_ip: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached discovery result of a target, scanning it first if needed.
+        
+        Without Redis the target is scanned directly.
+        """
+        key = f"{KEY_PREFIX}:{target_ip}"
+        try:
+            cached = self.client.get(key)
+            if cached is not None:
+                return json.loads(cached)
+            
+            # One scan per target; other schedulers wait for it and read the cache
+            lock_timeout = settings.TARGET_DISCOVERY_TIMEOUT_SECONDS + 30
+            with self.client.lock(f"{key}:lock", timeout=lock_timeout, blocking_timeout=lock_timeout):
+                cached = self.client.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+                result = self.scan(target_ip)
+                if result is not None:
+                    self.client.set(key, json.dumps(result), ex=settings.TARGET_DISCOVERY_TTL_SECONDS)
+                return result
+        except redis.RedisError as e:
+            logger.warning(f"Discovery cache unavailable, scanning {target_ip} directly: {e}")
+            return self.scan(target_ip)
+    
+    def scan(self, target_ip: str) -> Optional[Dict[str, Any]]:
+        """
+        Run nmap against a target.
+        
+        Returns:
+            Parsed result, or None if nmap is missing, timed out or failed
+        """
+        nmap = shutil.which("nmap")
+        if nmap is None:
+            logger.warning("nmap not found, skipping target discovery")
+            return None
+        
+        cmd = [nmap, *settings.TARGET_DISCOVERY_NMAP_ARGS, "-oX", "-", target_ip]
+        logger.info(f"Discovering {target_ip}: {' '.join(cmd)}")
+        try:
+            completed = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=settings.TARGET_DISCOVERY_TIMEOUT_SECONDS,
+            )
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Discovery of {target_ip} timed out after {settings.TARGET_DISCOVERY_TIMEOUT_SECONDS}s")
+            return None
+        
+        if completed.returncode != 0:
+            logger.warning(f"Discovery of {target_ip} failed: {completed.stderr.strip()[:500]}")
+            return None
+        try:
+            result = parse_nmap_xml(target_ip, completed.stdout)
+        except ET.ParseError as e:
+            logger.warning(f"Discovery of {target_ip} returned unreadable output: {e}")
+            return None
+        
+        logger.info(f"Discovered {target_ip}: open ports {open_ports(result)}")
+        return result
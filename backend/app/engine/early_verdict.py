@@ -0,0 +1,123 @@
+"""
+Early verdicts: ending a script as soon as its output decides the result.
+
+Many scripts print whether the target is vulnerable long before they exit,
+then spend their remaining time closing sessions or sleeping. A case can
+name a pass marker and a fail marker; the first output line containing one
+of them decides the result, and the script's process group is killed
+SCRIPT_EARLY_VERDICT_GRACE_SECONDS later unless it exits by itself, which
+frees the worker slot. For example, with fail_marker "[+] VULNERABLE":
+
+    print("[+] VULNERABLE: default credentials accepted")
+"""
+import os
+import signal
+import threading
+from typing import Callable, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Longest partial line kept while waiting for its newline
+MAX_LINE_CHARS = 65536
+
+
+class VerdictMarkers(NamedTuple):
+    """Output markers of one case; a None marker is not watched for."""
+    pass_marker: Optional[str] = None
+    fail_marker: Optional[str] = None
+    
+    def match(self, line: str) -> Optional[str]:
+        """'fail' or 'pass' if the line contains a marker (fail first), else None."""
+        if self.fail_marker and self.fail_marker in line:
+            return "fail"
+        if self.pass_marker and self.pass_marker in line:
+            return "pass"
+        return None
+
+
+class EarlyVerdict:
+    """
+    Watches the output of one script run for its case's markers.
+    
+    Output arrives from the reading thread (or the event loop) through
+    scan(), the script's process group through started(); whichever comes
+    last arms the kill timer. Call cancel() once the script has exited.
+    """
+    
+    def __init__(self, markers: VerdictMarkers, grace: Optional[float] = None):
+        self.markers = markers
+        self.grace = settings.SCRIPT_EARLY_VERDICT_GRACE_SECONDS if grace is None else grace
+        self.status: Optional[str] = None
+        self.line: Optional[str] = None
+        self.killed = False
+        self._partial = ""
+        self._pgid: Optional[int] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._done = False
+    
+    def scan(self, text: str, final: bool = False) -> None:
+        """Look for a marker in the complete lines of a chunk of decoded output."""
+        if self.status is not None:
+            return
+        lines = (self._partial + text).split("\n")
+        self._partial = "" if final else lines.pop()
+        if len(self._partial) > MAX_LINE_CHARS:
+            self._partial = ""
+        for line in lines:
+            status = self.markers.match(line)
+            if status is not None:
+                self._decide(status, line.strip())
+                return
+    
+    def started(self, on_start: Optional[Callable[[int], None]] = None) -> Callable[[int], None]:
+        """
+        Wrap a script start callback so the watcher learns the process group.
+        
+        Returns:
+            Callback taking the script's pid (also its process group ID)
+        """
+        def callback(pid: int) -> None:
+            if on_start is not None:
+                on_start(pid)
+            with self._lock:
+                self._pgid = pid
+                self._arm()
+        return callback
+    
+    def cancel(self) -> None:
+        """Disarm the kill timer once the script has exited."""
+        with self._lock:
+            self._done = True
+            if self._timer is not None:
+                self._timer.cancel()
+    
+    def _decide(self, status: str, line: str) -> None:
+        """Record the verdict and arm the kill timer."""
+        with self._lock:
+            self.status = status
+            self.line = line[:500]
+            self._arm()
+    
+    def _arm(self) -> None:
+        """Start the kill timer once both the verdict and the process group are known."""
+        if self.status is None or self._pgid is None or self._timer is not None or self._done:
+            return
+        self._timer = threading.Timer(self.grace, self._kill)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _kill(self) -> None:
+        """Kill the script's process group after the grace period."""
+        with self._lock:
+            if self._done:
+                return
+            try:
+                os.killpg(self._pgid, signal.SIGKILL)
+                self.killed = True
+                logger.info(f"Killed process group {self._pgid} {self.grace}s after its verdict: {self.status}")
+            except ProcessLookupError:
+                pass
@@ -1,20 +1,89 @@
 """
 Script execution engine for running security detection scripts.
 """
+import hashlib
 import os
+import signal
 import subprocess
 import tempfile
 import time
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import IO, Dict, Optional, Tuple, Union
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.engine.early_verdict import EarlyVerdict, VerdictMarkers
+from app.engine.limits import (
+    MEMORY_LIMIT_MARKERS,
+    NOFILE_LIMIT_MARKERS,
+    PROCESS_LIMIT_MARKERS,
+    ProcessExit,
+    ResourceLimits,
+    ScriptCgroup,
+    cgroup_manager,
+    gated_command,
+    usage_from_rusage,
+)
+from app.engine.output import OutputCapture
+from app.engine.prefork import get_interpreter_pool
+from app.engine.task_control import task_processes
+from app.engine.verdicts import Verdict, VerdictReader
 
 logger = get_logger(__name__)
 
 
+class ErrorReason:
+    """Reasons recorded on results that ended with status 'error'."""
+    TIMEOUT = "timeout"
+    ADAPTIVE_TIMEOUT = "adaptive_timeout"
+    MEMORY_LIMIT = "memory_limit"
+    CPU_LIMIT = "cpu_limit"
+    NOFILE_LIMIT = "nofile_limit"
+    PROCESS_LIMIT = "process_limit"
+    STOPPED = "stopped"
+    WORKER_LOST = "worker_lost"
+    TARGET_UNREACHABLE = "target_unreachable"
+    NOT_EXECUTED = "not_executed"
+
+
+@dataclass
+class ExecutionOutcome:
+    """Outcome of one script run."""
+    status: str
+    error_message: Optional[str] = None
+    log_path: Optional[str] = None
+    error_reason: Optional[str] = None
+    peak_memory_kb: Optional[int] = None
+    cpu_seconds: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    verdicts: Optional[Dict[str, Verdict]] = None  # by check ID, for cases with a check_id
+    
+    def __iter__(self):
+        # Still unpacks as (status, error_message, log_path)
+        return iter((self.status, self.error_message, self.log_path))
+
+
+@dataclass
+class ScriptRun:
+    """One script run, shared by the blocking and asyncio engines."""
+    script_path: str
+    target_ip: str
+    task_id: int
+    result_id: int
+    cmd: list
+    env: dict
+    log_path: Path
+    timeout: int
+    limits: ResourceLimits
+    adaptive_timeout: bool = False
+    early: Optional[EarlyVerdict] = None
+    cgroup: Optional[ScriptCgroup] = None
+    capture: Optional[OutputCapture] = None
+    verdicts: Optional[VerdictReader] = None
+
+
 class ScriptExecutor:
     """
     Executes security detection scripts in a controlled environment.
@@ -27,6 +96,7 @@ class ScriptExecutor:
     ):
         self.timeout = timeout or settings.SCRIPT_TIMEOUT_SECONDS
         self.max_memory_mb = max_memory_mb or settings.SCRIPT_MAX_MEMORY_MB
+        self.limits = ResourceLimits(max_memory_mb=self.max_memory_mb)
         self.scripts_dir = Path(settings.SCRIPTS_DIR)
         self.logs_dir = Path(settings.LOGS_DIR)
         
@@ -40,7 +110,12 @@ class ScriptExecutor:
         target_ip: str,
         task_id: int,
         result_id: int,
-    ) -> Tuple[str, Optional[str], Optional[str]]:
+        timeout: Optional[int] = None,
+        adaptive_timeout: bool = False,
+        extra_env: Optional[Dict[str, str]] = None,
+        collect_verdicts: bool = False,
+        markers: Optional[VerdictMarkers] = None,
+    ) -> ExecutionOutcome:
         """
         Execute a detection script.
         
@@ -49,118 +124,533 @@ class ScriptExecutor:
             target_ip: Target IP address
             task_id: Task ID for logging
             result_id: Result ID for logging
+            timeout: Timeout for this run, or None to use the executor's timeout
+            adaptive_timeout: Whether `timeout` was derived from the case's history
+            extra_env: Additional environment variables, e.g. target discovery results
+            collect_verdicts: Open the verdict channel (VERDICT_FD) and return
+                the verdicts in ExecutionOutcome.verdicts
+            markers: The case's early verdict markers; the first output line
+                containing one decides the result and ends the script
             
         Returns:
-            Tuple of (status, error_message, log_path)
+            ExecutionOutcome; unpacks as (status, error_message, log_path)
             status: 'pass', 'fail', or 'error'
         """
+        run = self._prepare_run(
+            script_path, target_ip, task_id, result_id, timeout, adaptive_timeout, extra_env, markers,
+        )
+        if isinstance(run, ExecutionOutcome):
+            return run
+        
+        logger.info(f"Executing: {' '.join(run.cmd)}")
+        try:
+            run.cgroup = cgroup_manager.create(run.limits, f"task{task_id}-result{result_id}")
+            with open(run.log_path, "w") as log_file:
+                self._start_log(run, log_file, collect_verdicts)
+                start_time = time.time()
+                try:
+                    process_exit = self._run_process(run)
+                except subprocess.TimeoutExpired:
+                    process_exit = None
+                return self._finish_run(run, log_file, process_exit, time.time() - start_time)
+        except Exception as e:
+            return self._failed_outcome(run, e)
+        finally:
+            if run.cgroup is not None:
+                run.cgroup.remove()
+    
+    def _prepare_run(
+        self,
+        script_path: str,
+        target_ip: str,
+        task_id: int,
+        result_id: int,
+        timeout: Optional[int] = None,
+        adaptive_timeout: bool = False,
+        extra_env: Optional[Dict[str, str]] = None,
+        markers: Optional[VerdictMarkers] = None,
+    ) -> Union[ScriptRun, ExecutionOutcome]:
+        """
+        Check a script and build its command line and environment.
+        
+        Returns:
+            ScriptRun, or an error ExecutionOutcome if the script cannot be run
+        """
         full_script_path = self.scripts_dir / script_path
         
         # Validate script exists
         if not full_script_path.exists():
             logger.error(f"Script not found: {full_script_path}")
-            return "error", f"Script not found: {script_path}", None
+            return ExecutionOutcome("error", f"Script not found: {script_path}")
         
-        # Create log file
-        log_filename = f"task_{task_id}_result_{result_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.log"
-        log_path = self.logs_dir / log_filename
+        # Determine script type and command
+        cmd = self._build_command(full_script_path, target_ip)
+        if cmd is None:
+            return ExecutionOutcome("error", f"Unsupported script type: {full_script_path.suffix.lower()}")
         
-        try:
-            # Prepare environment
-            env = os.environ.copy()
-            env["TARGET_IP"] = target_ip
-            env["TASK_ID"] = str(task_id)
-            env["RESULT_ID"] = str(result_id)
-            
-            # Determine script type and command
-            script_ext = full_script_path.suffix.lower()
-            if script_ext == ".py":
-                cmd = ["python3", str(full_script_path)]
-            elif script_ext == ".sh":
-                cmd = ["bash", str(full_script_path)]
-            else:
-                return "error", f"Unsupported script type: {script_ext}", None
-            
-            # Add target IP as argument
-            cmd.append(target_ip)
-            
-            logger.info(f"Executing: {' '.join(cmd)}")
+        timeout = timeout or self.timeout
+        return ScriptRun(
+            script_path=script_path,
+            target_ip=target_ip,
+            task_id=task_id,
+            result_id=result_id,
+            cmd=cmd,
+            env=self._build_env(target_ip, task_id, result_id, extra_env),
+            log_path=self._get_log_path(task_id, result_id),
+            timeout=timeout,
+            limits=self.limits.for_timeout(timeout),
+            adaptive_timeout=adaptive_timeout,
+            early=EarlyVerdict(markers) if markers is not None and any(markers) else None,
+        )
+    
+    def _start_log(self, run: ScriptRun, log_file: IO[str], collect_verdicts: bool = False) -> None:
+        """Write the log header and attach the run's output and verdict readers to the log."""
+        self._write_log_header(log_file, run.script_path, run.target_ip, run.task_id, run.result_id)
+        run.capture = OutputCapture(log_file, early=run.early)
+        run.verdicts = VerdictReader(run.capture.write_log) if collect_verdicts else None
+    
+    def _finish_run(
+        self,
+        run: ScriptRun,
+        log_file: IO[str],
+        process_exit: Optional[ProcessExit],
+        elapsed: float,
+    ) -> ExecutionOutcome:
+        """
+        Write the log footer and build the outcome of a script that has exited.
+        
+        Args:
+            run: The script run
+            log_file: The run's open log file
+            process_exit: Exit code and resource usage, or None if the script
+                was killed after its timeout
+            elapsed: Seconds since the script was started
+        """
+        if process_exit is None:
+            if run.early is None or run.early.status is None:
+                log_file.write(f"\n\n=== TIMEOUT after {run.timeout}s ===\n")
+                outcome = self._timeout_outcome(run.log_path, run.timeout, run.adaptive_timeout)
+                return self._with_verdicts(outcome, run.verdicts)
+            # The verdict was in before the timeout
+            process_exit = ProcessExit(-signal.SIGKILL)
+        
+        if task_processes.is_stopped(run.task_id):
+            log_file.write(f"\n\n=== STOPPED (return code {process_exit.returncode}) ===\n")
+            return self._stopped_outcome(run.log_path)
+        
+        self._write_early_verdict(log_file, run.early)
+        self._write_log_footer(log_file, elapsed, process_exit.returncode)
+        
+        output_summary = run.capture.summary()
+        outcome = self._build_outcome(process_exit, run.log_path, output_summary, elapsed, run.cgroup, run.limits)
+        return self._with_verdicts(self._apply_early_verdict(outcome, run.early, output_summary), run.verdicts)
+    
+    def _failed_outcome(self, run: ScriptRun, error: Exception) -> ExecutionOutcome:
+        """Outcome of a run that failed inside the engine rather than in the script."""
+        logger.exception(f"Script execution failed: {error}")
+        return ExecutionOutcome("error", str(error), str(run.log_path) if run.log_path.exists() else None)
+    
+    def _run_process(self, run: ScriptRun) -> ProcessExit:
+        """
+        Run a script command, streaming its output through a pipe into run.capture.
+        
+        The script runs with run.limits, inside run.cgroup
+        when one was created for it. It leads its own process group, which is
+        registered under the task so stopping the task kills it, and which
+        run.early kills once the grace period after a verdict marker is over.
+        With run.verdicts, a second pipe is passed as VERDICT_FD and read into it.
+        
+        Returns:
+            ProcessExit with the exit code and resource usage
             
-            # Execute script
-            with open(log_path, "w") as log_file:
-                log_file.write(f"=== Script Execution Log ===\n")
-                log_file.write(f"Script: {script_path}\n")
-                log_file.write(f"Target: {target_ip}\n")
-                log_file.write(f"Task ID: {task_id}\n")
-                log_file.write(f"Result ID: {result_id}\n")
-                log_file.write(f"Start Time: {datetime.utcnow().isoformat()}\n")
-                log_file.write(f"{'=' * 40}\n\n")
-                log_file.flush()
-                
-                start_time = time.time()
+        Raises:
+            subprocess.TimeoutExpired: If the script was killed after the timeout
+        """
+        cmd, env, timeout, cgroup = run.cmd, run.env, run.timeout, run.cgroup
+        capture, verdicts, early = run.capture, run.verdicts, run.early
+        read_fd, write_fd = os.pipe()
+        capture.start(read_fd)
+        verdict_fd = None
+        if verdicts is not None:
+            verdict_read_fd, verdict_fd = self._open_verdict_pipe(env)
+            verdicts.start(verdict_read_fd)
+        try:
+            with task_processes.track(run.task_id) as on_start:
+                if early is not None:
+                    on_start = early.started(on_start)
+                if self._use_prefork(cmd):
+                    return get_interpreter_pool().run(
+                        script=cmd[1],
+                        argv=cmd[1:],
+                        env=env,
+                        cwd=str(self.scripts_dir),
+                        output_fd=write_fd,
+                        timeout=timeout,
+                        rlimits=run.limits.as_rlimits(include_nproc=cgroup is None),
+                        cgroup_procs=cgroup.procs_path if cgroup else None,
+                        on_start=on_start,
+                        verdict_fd=verdict_fd,
+                    )
                 
-                process = subprocess.Popen(
-                    cmd,
-                    stdout=log_file,
-                    stderr=subprocess.STDOUT,
-                    env=env,
-                    cwd=str(self.scripts_dir),
-                )
+                gate_read, gate_write = os.pipe()
+                try:
+                    process = subprocess.Popen(
+                        gated_command(cmd),
+                        stdin=gate_read,
+                        stdout=write_fd,
+                        stderr=subprocess.STDOUT,
+                        env=env,
+                        cwd=str(self.scripts_dir),
+                        start_new_session=True,
+                        pass_fds=() if verdict_fd is None else (verdict_fd,),
+                    )
+                except BaseException:
+                    os.close(gate_write)
+                    raise
+                finally:
+                    os.close(gate_read)
+                try:
+                    run.limits.release(process.pid, gate_write, cgroup)
+                except OSError:
+                    self._kill_group(process.pid)
+                    process.wait()
+                    raise
+                on_start(process.pid)
+                # Only the script may hold the write ends, so EOF means it is done
+                os.close(write_fd)
+                write_fd = None
+                if verdict_fd is not None:
+                    os.close(verdict_fd)
+                    verdict_fd = None
                 
                 try:
-                    return_code = process.wait(timeout=self.timeout)
+                    return self._wait_with_usage(process, timeout)
                 except subprocess.TimeoutExpired:
-                    process.kill()
+                    self._kill_group(process.pid)
                     process.wait()
-                    log_file.write(f"\n\n=== TIMEOUT after {self.timeout}s ===\n")
-                    return "error", f"Script timeout after {self.timeout}s", str(log_path)
-                
-                elapsed = time.time() - start_time
-                log_file.write(f"\n\n{'=' * 40}\n")
-                log_file.write(f"End Time: {datetime.utcnow().isoformat()}\n")
-                log_file.write(f"Elapsed: {elapsed:.2f}s\n")
-                log_file.write(f"Return Code: {return_code}\n")
+                    raise
+        finally:
+            if early is not None:
+                early.cancel()
+            if write_fd is not None:
+                os.close(write_fd)
+            if verdict_fd is not None:
+                os.close(verdict_fd)
+            capture.finish()
+            if verdicts is not None:
+                verdicts.finish()
+    
+    def _open_verdict_pipe(self, env: dict) -> Tuple[int, int]:
+        """
+        Create the verdict pipe and point VERDICT_FD in `env` at its write end.
+        
+        Returns:
+            Tuple of (read end, write end)
+        """
+        read_fd, write_fd = os.pipe()
+        env["VERDICT_FD"] = str(write_fd)
+        return read_fd, write_fd
+    
+    def _write_early_verdict(self, log_file: IO[str], early: Optional[EarlyVerdict]) -> None:
+        """Note in the log which marker decided the result."""
+        if early is not None and early.status is not None:
+            ended = "killed after the grace period" if early.killed else "exited by itself"
+            log_file.write(f"\n\n=== EARLY VERDICT: {early.status} ({early.line}), script {ended} ===\n")
+    
+    def _apply_early_verdict(
+        self,
+        outcome: ExecutionOutcome,
+        early: Optional[EarlyVerdict],
+        output_summary: Optional[str],
+    ) -> ExecutionOutcome:
+        """
+        Let a verdict marker seen in the output decide the result, whatever the exit code.
+        
+        The kill after the grace period would otherwise look like an error or
+        a memory limit.
+        """
+        if early is None or early.status is None:
+            return outcome
+        outcome.status = early.status
+        outcome.error_message = output_summary if early.status == "fail" else None
+        outcome.error_reason = None
+        return outcome
+    
+    def _with_verdicts(self, outcome: ExecutionOutcome, verdicts: Optional[VerdictReader]) -> ExecutionOutcome:
+        """Attach the verdicts a script reported to its outcome."""
+        if verdicts is not None:
+            outcome.verdicts = dict(verdicts.verdicts)
+        return outcome
+    
+    def _wait_with_usage(self, process: subprocess.Popen, timeout: int) -> ProcessExit:
+        """
+        Wait for a process with wait4() so its resource usage is collected.
+        
+        Raises:
+            subprocess.TimeoutExpired: If the process is still running after the timeout
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while True:
+            pid, wait_status, usage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(wait_status)
+                return usage_from_rusage(process.returncode, usage)
             
-            # Read log file to get output for error message
-            output_summary = None
-            try:
-                with open(log_path, "r") as f:
-                    content = f.read()
-                    # The log format is:
-                    # === Script Execution Log ===
-                    # ... header info ...
-                    # ======================================== (40 =)
-                    # ... script output (may contain more = separators) ...
-                    # ======================================== (40 =)
-                    # End Time: ...
-                    
-                    # Find the content between the first and last 40-char separators
-                    separator = '=' * 40
-                    parts = content.split(separator)
-                    
-                    if len(parts) >= 3:
-                        # parts[0] = header, parts[1:-1] = script output parts, parts[-1] = footer
-                        # Join all middle parts back together (they were split by separators in script output)
-                        script_output = separator.join(parts[1:-1]).strip()
-                        if script_output:
-                            # Limit to 2000 chars for display
-                            output_summary = script_output[:2000] if len(script_output) > 2000 else script_output
-            except Exception:
-                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+    
+    def _kill_group(self, pgid: int) -> None:
+        """Kill a script and every process it started."""
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    
+    def _stopped_outcome(self, log_path: Path) -> ExecutionOutcome:
+        """Outcome of a script killed because its task was stopped."""
+        return ExecutionOutcome(
+            "error",
+            "Task stopped by user",
+            str(log_path),
+            error_reason=ErrorReason.STOPPED,
+        )
+    
+    def _timeout_outcome(self, log_path: Path, timeout: int, adaptive: bool = False) -> ExecutionOutcome:
+        """
+        Outcome of a script killed after its timeout.
+        
+        Adaptive timeouts are reported separately, with the timeout as the
+        run's duration so the case's history grows past it.
+        """
+        if adaptive:
+            return ExecutionOutcome(
+                "error",
+                f"Script timeout after {timeout}s (adaptive timeout from case history)",
+                str(log_path),
+                error_reason=ErrorReason.ADAPTIVE_TIMEOUT,
+                duration_seconds=float(timeout),
+            )
+        return ExecutionOutcome(
+            "error",
+            f"Script timeout after {timeout}s",
+            str(log_path),
+            error_reason=ErrorReason.TIMEOUT,
+        )
+    
+    def _build_outcome(
+        self,
+        process_exit: ProcessExit,
+        log_path: Path,
+        output_summary: Optional[str],
+        elapsed: float,
+        cgroup: Optional[ScriptCgroup] = None,
+        limits: Optional[ResourceLimits] = None,
+    ) -> ExecutionOutcome:
+        """
+        Build the outcome of a finished script from its exit code and resource usage.
+        
+        A script stopped by one of its resource limits (`limits`, by default
+        the executor's) is an error with a limit-specific reason, whatever
+        its exit code.
+        """
+        limits = limits or self.limits
+        peak_memory_kb = process_exit.peak_memory_kb
+        cpu_seconds = process_exit.cpu_seconds
+        if cgroup is not None:
+            # The cgroup also accounts for processes the script started
+            peak_memory_kb = cgroup.read_peak_memory_kb() or peak_memory_kb
+            cpu_seconds = cgroup.read_cpu_seconds() or cpu_seconds
+        
+        reason = self._detect_limit_violation(
+            process_exit.returncode,
+            output_summary,
+            cgroup,
+            cpu_seconds,
+            limits,
+        )
+        if reason:
+            message = self._describe_limit_violation(reason, limits)
+            logger.warning(f"{message}: {log_path}")
+            outcome = ExecutionOutcome(
+                "error",
+                f"{message}. {output_summary or ''}",
+                str(log_path),
+                error_reason=reason,
+            )
+        else:
+            outcome = ExecutionOutcome(*self._interpret_return_code(process_exit.returncode, output_summary, log_path))
+        
+        outcome.peak_memory_kb = peak_memory_kb
+        outcome.cpu_seconds = cpu_seconds
+        outcome.duration_seconds = round(elapsed, 3)
+        return outcome
+    
+    def _use_prefork(self, cmd: list) -> bool:
+        """Whether a command is a Python script that should run in the interpreter pool."""
+        return settings.SCRIPT_PYTHON_RUNNER == "prefork" and cmd[0] == "python3"
+    
+    def _get_log_path(self, task_id: int, result_id: int) -> Path:
+        """Build the log file path for one script run."""
+        log_filename = f"task_{task_id}_result_{result_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.log"
+        return self.logs_dir / log_filename
+    
+    def _build_env(
+        self,
+        target_ip: str,
+        task_id: int,
+        result_id: int,
+        extra_env: Optional[Dict[str, str]] = None,
+    ) -> dict:
+        """Build the environment passed to a script."""
+        env = os.environ.copy()
+        env["TARGET_IP"] = target_ip
+        env["TASK_ID"] = str(task_id)
+        env["RESULT_ID"] = str(result_id)
+        if extra_env:
+            env.update(extra_env)
+        return env
+    
+    def _build_command(self, full_script_path: Path, target_ip: str) -> Optional[list]:
+        """
+        Build the command line for a script.
+        
+        Returns:
+            Command list, or None if the script type is not supported
+        """
+        script_ext = full_script_path.suffix.lower()
+        if script_ext == ".py":
+            cmd = ["python3", str(full_script_path)]
+        elif script_ext == ".sh":
+            cmd = ["bash", str(full_script_path)]
+        else:
+            return None
+        
+        # Add target IP as argument
+        cmd.append(target_ip)
+        return cmd
+    
+    def _write_log_header(
+        self,
+        log_file: IO[str],
+        script_path: str,
+        target_ip: str,
+        task_id: int,
+        result_id: int,
+    ) -> None:
+        """Write the execution log header."""
+        log_file.write(f"=== Script Execution Log ===\n")
+        log_file.write(f"Script: {script_path}\n")
+        log_file.write(f"Target: {target_ip}\n")
+        log_file.write(f"Task ID: {task_id}\n")
+        log_file.write(f"Result ID: {result_id}\n")
+        log_file.write(f"Start Time: {datetime.utcnow().isoformat()}\n")
+        log_file.write(f"{'=' * 40}\n\n")
+        log_file.flush()
+    
+    def _write_log_footer(self, log_file: IO[str], elapsed: float, return_code: int) -> None:
+        """Write the execution log footer."""
+        log_file.write(f"\n\n{'=' * 40}\n")
+        log_file.write(f"End Time: {datetime.utcnow().isoformat()}\n")
+        log_file.write(f"Elapsed: {elapsed:.2f}s\n")
+        log_file.write(f"Return Code: {return_code}\n")
+    
+    def _detect_limit_violation(
+        self,
+        return_code: int,
+        output: Optional[str],
+        cgroup: Optional[ScriptCgroup] = None,
+        cpu_seconds: Optional[float] = None,
+        limits: Optional[ResourceLimits] = None,
+    ) -> Optional[str]:
+        """
+        Work out whether a script was stopped by one of its resource limits.
+        
+        Args:
+            return_code: Script exit code (negative for a signal)
+            output: Script output summary, checked for rlimit failure messages
+            cgroup: The script's cgroup, if any
+            cpu_seconds: CPU time used, if known
+            limits: The run's limits, by default the executor's
             
-            # Interpret return code
-            # Convention: 0 = pass, 1 = fail (vulnerability found), other = error
-            if return_code == 0:
-                return "pass", None, str(log_path)
-            elif return_code == 1:
-                # Fail means security issue found - include output summary
-                return "fail", output_summary, str(log_path)
-            else:
-                return "error", f"Script exited with code {return_code}. {output_summary or ''}", str(log_path)
-                
-        except Exception as e:
-            logger.exception(f"Script execution failed: {e}")
-            return "error", str(e), str(log_path) if log_path.exists() else None
+        Returns:
+            ErrorReason value, or None
+        """
+        if return_code == 0:
+            return None
+        limits = limits or self.limits
+        
+        if cgroup is not None:
+            if cgroup.oom_killed():
+                return ErrorReason.MEMORY_LIMIT
+            if cgroup.hit_process_limit():
+                return ErrorReason.PROCESS_LIMIT
+        
+        max_cpu_seconds = limits.max_cpu_seconds
+        if max_cpu_seconds > 0:
+            # SIGXCPU at the soft limit, SIGKILL at the hard limit
+            if return_code == -signal.SIGXCPU:
+                return ErrorReason.CPU_LIMIT
+            if return_code == -signal.SIGKILL and cpu_seconds is not None and cpu_seconds >= max_cpu_seconds:
+                return ErrorReason.CPU_LIMIT
+        
+        if output:
+            if limits.max_memory_mb > 0 and any(m in output for m in MEMORY_LIMIT_MARKERS):
+                return ErrorReason.MEMORY_LIMIT
+            if limits.max_open_files > 0 and any(m in output for m in NOFILE_LIMIT_MARKERS):
+                return ErrorReason.NOFILE_LIMIT
+            if limits.max_processes > 0 and any(m in output for m in PROCESS_LIMIT_MARKERS):
+                return ErrorReason.PROCESS_LIMIT
+        
+        return None
+    
+    def _describe_limit_violation(self, reason: str, limits: Optional[ResourceLimits] = None) -> str:
+        """Error message for a resource limit violation."""
+        limits = limits or self.limits
+        if reason == ErrorReason.MEMORY_LIMIT:
+            return f"Script exceeded memory limit ({limits.max_memory_mb} MB)"
+        if reason == ErrorReason.CPU_LIMIT:
+            return f"Script exceeded CPU time limit ({limits.max_cpu_seconds}s)"
+        if reason == ErrorReason.NOFILE_LIMIT:
+            return f"Script exceeded open file limit ({limits.max_open_files})"
+        return f"Script exceeded process limit ({limits.max_processes})"
+    
+    def _interpret_return_code(
+        self,
+        return_code: int,
+        output_summary: Optional[str],
+        log_path: Path,
+    ) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Interpret a script's return code.
+        
+        Convention: 0 = pass, 1 = fail (vulnerability found), other = error
+        """
+        if return_code == 0:
+            return "pass", None, str(log_path)
+        elif return_code == 1:
+            # Fail means security issue found - include output summary
+            return "fail", output_summary, str(log_path)
+        else:
+            return "error", f"Script exited with code {return_code}. {output_summary or ''}", str(log_path)
+    
+    def script_sha256(self, script_path: str) -> Optional[str]:
+        """
+        SHA-256 of a script's content, or None if it cannot be read.
+        
+        Only the script file itself is hashed, not modules it imports.
+        """
+        digest = hashlib.sha256()
+        try:
+            with open(self.scripts_dir / script_path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
     
     def validate_script(self, script_path: str) -> Tuple[bool, Optional[str]]:
         """
@@ -0,0 +1,272 @@
+"""
+Per-script resource limits.
+
+Limits are always applied as rlimits before the script starts: the worker
+spawns a small shell that waits until the parent has moved it into its cgroup
+and set its rlimits with prlimit(), then execs the script (see
+gated_command()). When a delegated cgroup v2 subtree is available at SCRIPT_CGROUP_ROOT, each
+script also runs in its own child group, which gives exact memory/process
+accounting, peak usage and OOM-kill detection.
+"""
+import itertools
+import os
+import resource
+import signal
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+CGROUP_V2_MOUNT = Path("/sys/fs/cgroup")
+
+# Seconds between the CPU soft limit (SIGXCPU) and the hard limit (SIGKILL)
+CPU_HARD_LIMIT_GRACE = 5
+
+# Run by gated_command(): wait for the parent's go-ahead on stdin, then exec the
+# script; exits without running it if the parent closed the gate instead
+GATE_SCRIPT = 'read -r _ || exit 126; exec "$@" </dev/null'
+
+# Output markers left by scripts that ran into an rlimit
+MEMORY_LIMIT_MARKERS = ("MemoryError", "Cannot allocate memory", "std::bad_alloc", "out of memory")
+NOFILE_LIMIT_MARKERS = ("Too many open files",)
+PROCESS_LIMIT_MARKERS = ("fork: retry", "fork: Resource temporarily unavailable", "can't start new thread")
+
+
+class ProcessExit(NamedTuple):
+    """Exit status and resource usage of a finished script process."""
+    returncode: int
+    peak_memory_kb: Optional[int] = None
+    cpu_seconds: Optional[float] = None
+
+
+def usage_from_rusage(returncode: int, usage: resource.struct_rusage) -> ProcessExit:
+    """Build a ProcessExit from a wait4() rusage (ru_maxrss is in KB on Linux)."""
+    return ProcessExit(
+        returncode=returncode,
+        peak_memory_kb=usage.ru_maxrss,
+        cpu_seconds=round(usage.ru_utime + usage.ru_stime, 3),
+    )
+
+
+class ResourceLimits:
+    """Resource limits for one script process."""
+    
+    def __init__(
+        self,
+        max_memory_mb: int = None,
+        max_cpu_seconds: int = None,
+        max_open_files: int = None,
+        max_processes: int = None,
+    ):
+        self.max_memory_mb = settings.SCRIPT_MAX_MEMORY_MB if max_memory_mb is None else max_memory_mb
+        self.max_cpu_seconds = settings.SCRIPT_MAX_CPU_SECONDS if max_cpu_seconds is None else max_cpu_seconds
+        self.max_open_files = settings.SCRIPT_MAX_OPEN_FILES if max_open_files is None else max_open_files
+        self.max_processes = settings.SCRIPT_MAX_PROCESSES if max_processes is None else max_processes
+    
+    def for_timeout(self, timeout: int) -> "ResourceLimits":
+        """
+        Limits for one run with the given timeout.
+        
+        The CPU limit is raised to the timeout when that is longer, so a case
+        given a long (adaptive) timeout is not cut short by the CPU limit.
+        """
+        max_cpu_seconds = self.max_cpu_seconds
+        if 0 < max_cpu_seconds < timeout:
+            max_cpu_seconds = timeout
+        return ResourceLimits(self.max_memory_mb, max_cpu_seconds, self.max_open_files, self.max_processes)
+    
+    def as_rlimits(self, include_nproc: bool = True) -> dict:
+        """
+        Build the rlimits to apply, as {resource name: (soft, hard)}.
+        
+        A value of 0 disables the corresponding limit. RLIMIT_NPROC counts every
+        process of the worker's user, so it is only used when no cgroup can
+        limit the script's own process tree.
+        """
+        limits = {}
+        if self.max_memory_mb > 0:
+            size = self.max_memory_mb * 1024 * 1024
+            limits["RLIMIT_AS"] = (size, size)
+        if self.max_cpu_seconds > 0:
+            limits["RLIMIT_CPU"] = (self.max_cpu_seconds, self.max_cpu_seconds + CPU_HARD_LIMIT_GRACE)
+        if self.max_open_files > 0:
+            limits["RLIMIT_NOFILE"] = (self.max_open_files, self.max_open_files)
+        if include_nproc and self.max_processes > 0:
+            limits["RLIMIT_NPROC"] = (self.max_processes, self.max_processes)
+        return limits
+    
+    def release(self, pid: int, gate_fd: int, cgroup: Optional["ScriptCgroup"] = None) -> None:
+        """
+        Move a child started with gated_command() into its cgroup, apply the
+        rlimits with prlimit(), then let it exec the script.
+        
+        Everything happens in the parent, so no Python code runs between fork
+        and exec (preexec_fn is unsafe in the threaded workers). Closes
+        `gate_fd` either way; if the limits cannot be applied the child exits
+        without running the script.
+        
+        Raises:
+            OSError: If the child could not be moved or limited
+        """
+        try:
+            if cgroup is not None:
+                cgroup.add(pid)
+            for name, values in self.as_rlimits(include_nproc=cgroup is None).items():
+                _set_rlimit(pid, getattr(resource, name), values)
+            os.write(gate_fd, b"\n")
+        finally:
+            os.close(gate_fd)
+
+
+def gated_command(cmd: list) -> list:
+    """
+    Wrap a script command so it waits on stdin for ResourceLimits.release().
+    
+    The shell execs the script once released, which keeps the pid, and
+    with it the cgroup and rlimits; the script's stdin is /dev/null.
+    """
+    return ["/bin/sh", "-c", GATE_SCRIPT, "sh", *cmd]
+
+
+def _set_rlimit(pid: int, res: int, values: tuple) -> None:
+    """Lower a process's rlimit, never raising it above its inherited hard limit."""
+    soft, hard = values
+    _, current_hard = resource.prlimit(pid, res)
+    if current_hard != resource.RLIM_INFINITY:
+        hard = min(hard, current_hard)
+        soft = min(soft, hard)
+    resource.prlimit(pid, res, (soft, hard))
+
+
+class ScriptCgroup:
+    """cgroup v2 child group holding one script's process tree."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+    
+    @property
+    def procs_path(self) -> str:
+        """File a process writes "0" to in order to join the group."""
+        return str(self.path / "cgroup.procs")
+    
+    def add(self, pid: int) -> None:
+        """Move a process into the group."""
+        (self.path / "cgroup.procs").write_text(str(pid))
+    
+    def read_peak_memory_kb(self) -> Optional[int]:
+        """Peak memory usage of the group (needs memory.peak, Linux 5.19+)."""
+        value = self._read("memory.peak")
+        return int(value) // 1024 if value and value.isdigit() else None
+    
+    def read_cpu_seconds(self) -> Optional[float]:
+        """Total CPU time used by the group."""
+        stats = self._read_keyed("cpu.stat")
+        usage = stats.get("usage_usec")
+        return usage / 1_000_000 if usage is not None else None
+    
+    def oom_killed(self) -> bool:
+        """Whether the kernel OOM-killed a process of the group."""
+        return self._read_keyed("memory.events").get("oom_kill", 0) > 0
+    
+    def hit_process_limit(self) -> bool:
+        """Whether a fork was refused because of pids.max."""
+        return self._read_keyed("pids.events").get("max", 0) > 0
+    
+    def remove(self) -> None:
+        """Kill anything left in the group and remove it."""
+        try:
+            kill_file = self.path / "cgroup.kill"
+            if kill_file.exists():
+                kill_file.write_text("1")
+            else:
+                for pid in self._read("cgroup.procs").split():
+                    os.kill(int(pid), signal.SIGKILL)
+        except (OSError, ValueError):
+            pass
+        try:
+            self.path.rmdir()
+        except OSError as e:
+            logger.warning(f"Failed to remove cgroup {self.path}: {e}")
+    
+    def _read(self, name: str) -> str:
+        try:
+            return (self.path / name).read_text().strip()
+        except OSError:
+            return ""
+    
+    def _read_keyed(self, name: str) -> dict:
+        values = {}
+        for line in self._read(name).splitlines():
+            key, _, value = line.partition(" ")
+            if value.isdigit():
+                values[key] = int(value)
+        return values
+
+
+class CgroupManager:
+    """Creates per-script cgroups under SCRIPT_CGROUP_ROOT when cgroup v2 is usable."""
+    
+    def __init__(self, root: str = None):
+        self.root = Path(root if root is not None else settings.SCRIPT_CGROUP_ROOT)
+        self._counter = itertools.count()
+        self._available: Optional[bool] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        """Whether per-script cgroups can be created (checked once)."""
+        with self._lock:
+            if self._available is None:
+                self._available = self._setup()
+            return self._available
+    
+    def create(self, limits: ResourceLimits, name: str) -> Optional[ScriptCgroup]:
+        """
+        Create a child group with the given limits.
+        
+        Returns:
+            ScriptCgroup, or None if cgroups are not available
+        """
+        if not self.available:
+            return None
+        
+        path = self.root / f"{name}-{os.getpid()}-{next(self._counter)}"
+        try:
+            path.mkdir()
+            if limits.max_memory_mb > 0:
+                (path / "memory.max").write_text(str(limits.max_memory_mb * 1024 * 1024))
+                swap_max = path / "memory.swap.max"
+                if swap_max.exists():
+                    swap_max.write_text("0")
+            if limits.max_processes > 0:
+                (path / "pids.max").write_text(str(limits.max_processes))
+        except OSError as e:
+            logger.warning(f"Failed to create cgroup {path}: {e}")
+            try:
+                path.rmdir()
+            except OSError:
+                pass
+            return None
+        
+        return ScriptCgroup(path)
+    
+    def _setup(self) -> bool:
+        """Create the root group and enable the memory and pids controllers for its children."""
+        if not self.root or not (CGROUP_V2_MOUNT / "cgroup.controllers").exists():
+            logger.info("cgroup v2 not available, script limits use rlimits only")
+            return False
+        try:
+            self.root.mkdir(exist_ok=True)
+            (self.root / "cgroup.subtree_control").write_text("+memory +pids")
+        except OSError as e:
+            logger.info(f"cgroup v2 root {self.root} not usable ({e}), script limits use rlimits only")
+            return False
+        logger.info(f"Per-script cgroups enabled under {self.root}")
+        return True
+
+
+cgroup_manager = CgroupManager()
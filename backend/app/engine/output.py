@@ -0,0 +1,174 @@
+"""
+Script output capture.
+
+Script stdout/stderr is read from a pipe, written to the execution log as it
+arrives and kept in memory only as a bounded head and tail, which is all the
+result summary needs. PipeReader is the reading loop itself, shared with the
+verdict channel (app/engine/verdicts.py).
+"""
+import asyncio
+import codecs
+import os
+import select
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import IO, Optional
+
+from app.core.config import settings
+from app.engine.early_verdict import EarlyVerdict
+
+READ_CHUNK_SIZE = 65536
+
+# Seconds to keep reading after the script exited; processes it left behind
+# may still hold the pipe open
+DRAIN_GRACE_SECONDS = 1.0
+
+POLL_INTERVAL = 0.2
+
+
+class PipeReader(ABC):
+    """
+    Reads the read end of a script pipe and hands every chunk to feed().
+    
+    Blocking executors read in a thread (start()/finish()), the asyncio
+    engine from a stream (pump_async()/finish_async()).
+    """
+    
+    thread_name = "script-pipe"
+    
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    @abstractmethod
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """Consume a chunk of raw data; `final` marks the end of the stream."""
+    
+    def close(self) -> None:
+        """Called once the whole stream was read."""
+    
+    def start(self, read_fd: int) -> None:
+        """Start copying data from the read end of the pipe in a thread."""
+        self._thread = threading.Thread(target=self._pump, args=(read_fd,), name=self.thread_name, daemon=True)
+        self._thread.start()
+    
+    def finish(self, grace: float = DRAIN_GRACE_SECONDS) -> None:
+        """Wait for the reading thread once the script has exited."""
+        if self._thread is not None:
+            self._thread.join(grace)
+            if self._thread.is_alive():
+                self._stop.set()
+                self._thread.join()
+        self.feed(b"", final=True)
+        self.close()
+    
+    async def pump_async(self, reader: asyncio.StreamReader) -> None:
+        """Copy data from an asyncio stream until EOF."""
+        while True:
+            data = await reader.read(READ_CHUNK_SIZE)
+            if not data:
+                return
+            self.feed(data)
+    
+    async def finish_async(self, pump: asyncio.Task, grace: float = DRAIN_GRACE_SECONDS) -> None:
+        """Wait for pump_async() once the script has exited."""
+        try:
+            await asyncio.wait_for(asyncio.shield(pump), timeout=grace)
+        except asyncio.TimeoutError:
+            pump.cancel()
+        self.feed(b"", final=True)
+        self.close()
+    
+    def _pump(self, read_fd: int) -> None:
+        """Read the pipe until EOF, or until finish() gives up on it."""
+        poller = select.poll()
+        poller.register(read_fd, select.POLLIN)
+        try:
+            while not self._stop.is_set():
+                if not poller.poll(POLL_INTERVAL * 1000):
+                    continue
+                data = os.read(read_fd, READ_CHUNK_SIZE)
+                if not data:
+                    return
+                self.feed(data)
+        finally:
+            os.close(read_fd)
+
+
+class OutputCapture(PipeReader):
+    """
+    Copies script output into the log file and keeps its head and tail.
+    
+    The tail is a ring buffer of decoded chunks trimmed to `tail_chars`, so
+    memory stays bounded however much a script prints. With `early`, the
+    output is also watched for the case's verdict markers.
+    
+    Other writers to the same log, such as the verdict reader's thread, go
+    through write_log() so their lines are not interleaved with output.
+    """
+    
+    thread_name = "script-output"
+    
+    def __init__(self, log_file: IO[str], summary_chars: int = None, early: Optional[EarlyVerdict] = None):
+        super().__init__()
+        summary_chars = summary_chars or settings.SCRIPT_OUTPUT_SUMMARY_CHARS
+        self.log_file = log_file
+        self.early = early
+        self._log_lock = threading.Lock()
+        self.head_chars = summary_chars // 2
+        self.tail_chars = summary_chars - self.head_chars
+        self.total_chars = 0
+        self._head = ""
+        self._tail = deque()
+        self._tail_len = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """Write a chunk of raw output to the log and the buffers."""
+        text = self._decoder.decode(data, final)
+        if self.early is not None:
+            self.early.scan(text, final)
+        if not text:
+            return
+        
+        self.write_log(text)
+        self.total_chars += len(text)
+        
+        if len(self._head) < self.head_chars:
+            room = self.head_chars - len(self._head)
+            self._head += text[:room]
+            text = text[room:]
+            if not text:
+                return
+        
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail_len - len(self._tail[0]) >= self.tail_chars:
+            self._tail_len -= len(self._tail.popleft())
+    
+    def summary(self) -> Optional[str]:
+        """
+        Output summary for result messages.
+        
+        Returns:
+            The whole output if it fits, otherwise its head and tail; None if
+            the script printed nothing
+        """
+        tail = "".join(self._tail)[-self.tail_chars:] if self._tail else ""
+        omitted = self.total_chars - len(self._head) - len(tail)
+        if omitted > 0:
+            output = f"{self._head}\n... [{omitted} characters omitted] ...\n{tail}"
+        else:
+            output = self._head + tail
+        return output.strip() or None
+    
+    def write_log(self, text: str) -> None:
+        """Append text to the log file; safe to call from any thread."""
+        with self._log_lock:
+            self.log_file.write(text)
+    
+    def close(self) -> None:
+        """Flush the log once all output was copied."""
+        with self._log_lock:
+            self.log_file.flush()
@@ -0,0 +1,116 @@
+"""
+Target reachability checks run before and during a task.
+
+A target counts as alive as soon as one probe gets an answer: a TCP
+connection to any of TARGET_PREFLIGHT_PORTS that is accepted or refused
+(a refusal is a reset sent by the host itself), or an ICMP echo reply. Only
+a target for which every probe times out or reports the host unreachable is
+considered dead, so that its cases fail at once instead of each running
+into its script timeout.
+"""
+import shutil
+import socket
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Targets probed at once
+MAX_CONCURRENT_TARGETS = 32
+
+
+def tcp_probe(target_ip: str, port: int, timeout: float) -> bool:
+    """Whether the host answered a TCP connection attempt on the port."""
+    try:
+        with socket.create_connection((target_ip, port), timeout=timeout):
+            return True
+    except ConnectionRefusedError:
+        return True
+    except OSError:
+        return False
+
+
+def icmp_probe(target_ip: str, timeout: float) -> bool:
+    """Whether the host answered one ICMP echo request."""
+    ping = shutil.which("ping")
+    try:
+        completed = subprocess.run(
+            [ping, "-c", "1", "-W", str(max(1, int(round(timeout)))), target_ip],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout + 1,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return completed.returncode == 0
+
+
+def is_reachable(
+    target_ip: str,
+    ports: Optional[List[int]] = None,
+    timeout: Optional[float] = None,
+    icmp: Optional[bool] = None,
+) -> bool:
+    """
+    Probe a target on all configured ports and by ICMP at the same time.
+    
+    Args:
+        target_ip: Target IP address
+        ports: TCP ports to try, defaults to TARGET_PREFLIGHT_PORTS
+        timeout: Seconds per probe, defaults to TARGET_PREFLIGHT_TIMEOUT_SECONDS
+        icmp: Also ping the target, defaults to TARGET_PREFLIGHT_ICMP
+        
+    Returns:
+        True once any probe succeeds (or if there is nothing to probe),
+        False if all of them failed
+    """
+    ports = settings.TARGET_PREFLIGHT_PORTS if ports is None else ports
+    timeout = settings.TARGET_PREFLIGHT_TIMEOUT_SECONDS if timeout is None else timeout
+    icmp = settings.TARGET_PREFLIGHT_ICMP if icmp is None else icmp
+    # Without a ping binary only the TCP probes count
+    icmp = icmp and shutil.which("ping") is not None
+    
+    probes = [(tcp_probe, (target_ip, port, timeout)) for port in ports]
+    if icmp:
+        probes.append((icmp_probe, (target_ip, timeout)))
+    if not probes:
+        return True
+    
+    pool = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="preflight")
+    try:
+        remaining = {pool.submit(probe, *args) for probe, args in probes}
+        while remaining:
+            done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            if any(future.result() for future in done):
+                return True
+        return False
+    finally:
+        # Probes still running end on their own timeout
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def unreachable_targets(targets: Iterable[str]) -> Set[str]:
+    """
+    Probe several targets concurrently.
+    
+    Args:
+        targets: Target IP addresses
+        
+    Returns:
+        The targets that did not answer any probe
+    """
+    targets = sorted(set(targets))
+    if not targets:
+        return set()
+    
+    with ThreadPoolExecutor(max_workers=min(len(targets), MAX_CONCURRENT_TARGETS)) as pool:
+        reachable = dict(zip(targets, pool.map(is_reachable, targets)))
+    
+    dead = {target_ip for target_ip, alive in reachable.items() if not alive}
+    if dead:
+        logger.warning(f"Unreachable targets: {sorted(dead)}")
+    return dead
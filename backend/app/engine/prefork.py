@@ -0,0 +1,329 @@
+"""
+Pool of pre-forked Python interpreters for .py detection scripts.
+
+Each pool member is a zygote process (app/engine/zygote.py) that has already
+imported the modules listed in SCRIPT_PREFORK_MODULES. Running a script
+forks the zygote instead of starting a fresh python3, which removes the
+interpreter start-up and import cost from short checks.
+"""
+import asyncio
+import atexit
+import json
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.engine.limits import ProcessExit
+
+logger = get_logger(__name__)
+
+ZYGOTE_SCRIPT = Path(__file__).with_name("zygote.py")
+# How long a timed-out run still waits for the zygote to report the child's pid
+PID_GRACE_SECONDS = 5.0
+
+
+class _Zygote:
+    """One warm interpreter process listening on a Unix socket."""
+    
+    def __init__(self, socket_path: str, modules: List[str]):
+        self.socket_path = socket_path
+        self.modules = modules
+        self.process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+    
+    def ensure_running(self) -> None:
+        """Start (or restart) the zygote process."""
+        with self._lock:
+            if self.process is not None and self.process.poll() is None:
+                return
+            
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            
+            self.process = subprocess.Popen(
+                ["python3", str(ZYGOTE_SCRIPT), self.socket_path, *self.modules],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            # The zygote prints "ready" once its modules are imported
+            line = self.process.stdout.readline().strip()
+            if line != "ready":
+                self.process.kill()
+                raise RuntimeError(f"Interpreter pool process failed to start: {line!r}")
+            logger.info(f"Started warm interpreter {self.process.pid} at {self.socket_path}")
+    
+    def stop(self) -> None:
+        """Terminate the zygote process."""
+        with self._lock:
+            if self.process is not None and self.process.poll() is None:
+                self.process.terminate()
+                self.process.wait()
+            self.process = None
+
+
+class PythonInterpreterPool:
+    """
+    Runs .py scripts in children forked from warm interpreters.
+    
+    Children keep the plain `python3 script.py <target>` interface: same argv,
+    environment, working directory and exit code convention. Each child is its
+    own process group so a timeout kills everything it started, and runs with
+    the rlimits (and optional cgroup) requested by the executor.
+    """
+    
+    def __init__(self, size: int = None, modules: Optional[List[str]] = None):
+        size = max(1, size or settings.SCRIPT_PREFORK_POOL_SIZE)
+        modules = modules if modules is not None else settings.SCRIPT_PREFORK_MODULES
+        self._socket_dir = tempfile.mkdtemp(prefix="autosecdet-prefork-")
+        self._zygotes = [
+            _Zygote(os.path.join(self._socket_dir, f"zygote-{i}.sock"), modules)
+            for i in range(size)
+        ]
+        self._next = 0
+        self._lock = threading.Lock()
+    
+    def run(
+        self,
+        script: str,
+        argv: List[str],
+        env: dict,
+        cwd: str,
+        output_fd: int,
+        timeout: float,
+        rlimits: Optional[Dict[str, Tuple[int, int]]] = None,
+        cgroup_procs: Optional[str] = None,
+        on_start: Optional[Callable[[int], None]] = None,
+        verdict_fd: Optional[int] = None,
+    ) -> ProcessExit:
+        """
+        Run a script and wait for it to exit.
+        
+        Args:
+            script: Absolute path to the .py script
+            argv: sys.argv for the script
+            env: Environment variables
+            cwd: Working directory
+            output_fd: Descriptor that receives stdout and stderr
+            timeout: Seconds before the script is killed
+            rlimits: Limits to apply in the child, as {resource name: (soft, hard)}
+            cgroup_procs: cgroup.procs file the child moves itself into
+            on_start: Called with the script's pid (also its process group ID) once it started
+            verdict_fd: Write end of the verdict channel, handed to the script as VERDICT_FD
+            
+        Returns:
+            ProcessExit with the exit code (-N if killed by signal N) and resource usage
+            
+        Raises:
+            subprocess.TimeoutExpired: If the script exceeded the timeout (it has been killed)
+        """
+        conn = self._spawn(script, argv, env, cwd, output_fd, rlimits, cgroup_procs, verdict_fd)
+        deadline = time.monotonic() + timeout
+        pid = None
+        buffer = b""
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout()
+                conn.settimeout(remaining)
+                chunk = conn.recv(4096)
+                if not chunk:
+                    raise RuntimeError("Script process terminated without reporting an exit code")
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    message = self._parse(line)
+                    if "pid" in message:
+                        pid = message["pid"]
+                        if on_start is not None:
+                            on_start(pid)
+                    elif "returncode" in message:
+                        return self._exit(message)
+        except socket.timeout:
+            if pid is None:
+                pid = self._read_pid(conn, buffer)
+            self._kill(pid)
+            raise subprocess.TimeoutExpired(argv, timeout)
+        finally:
+            conn.close()
+    
+    async def run_async(
+        self,
+        script: str,
+        argv: List[str],
+        env: dict,
+        cwd: str,
+        output_fd: int,
+        timeout: float,
+        rlimits: Optional[Dict[str, Tuple[int, int]]] = None,
+        cgroup_procs: Optional[str] = None,
+        on_start: Optional[Callable[[int], None]] = None,
+        verdict_fd: Optional[int] = None,
+    ) -> ProcessExit:
+        """
+        Coroutine version of run() for the asyncio engine.
+        
+        Raises:
+            asyncio.TimeoutError: If the script exceeded the timeout (it has been killed)
+        """
+        conn = self._spawn(script, argv, env, cwd, output_fd, rlimits, cgroup_procs, verdict_fd)
+        reader, writer = await asyncio.open_unix_connection(sock=conn)
+        pid = None
+        
+        async def wait_exit() -> ProcessExit:
+            nonlocal pid
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise RuntimeError("Script process terminated without reporting an exit code")
+                message = self._parse(line)
+                if "pid" in message:
+                    pid = message["pid"]
+                    if on_start is not None:
+                        on_start(pid)
+                elif "returncode" in message:
+                    return self._exit(message)
+        
+        try:
+            return await asyncio.wait_for(wait_exit(), timeout=timeout)
+        except asyncio.TimeoutError:
+            if pid is None:
+                pid = await self._read_pid_async(reader)
+            self._kill(pid)
+            raise
+        finally:
+            writer.close()
+    
+    def shutdown(self) -> None:
+        """Stop every zygote process."""
+        for zygote in self._zygotes:
+            zygote.stop()
+    
+    def _spawn(
+        self,
+        script: str,
+        argv: List[str],
+        env: dict,
+        cwd: str,
+        output_fd: int,
+        rlimits: Optional[Dict[str, Tuple[int, int]]],
+        cgroup_procs: Optional[str],
+        verdict_fd: Optional[int] = None,
+    ) -> socket.socket:
+        """Send a run request to the next zygote and return the connection."""
+        with self._lock:
+            zygote = self._zygotes[self._next % len(self._zygotes)]
+            self._next += 1
+        
+        request = json.dumps({
+            "script": script,
+            "argv": argv,
+            "env": env,
+            "cwd": cwd,
+            "rlimits": rlimits or {},
+            "cgroup_procs": cgroup_procs,
+        })
+        request = (request + "\n").encode()
+        
+        fds = [output_fd] if verdict_fd is None else [output_fd, verdict_fd]
+        zygote.ensure_running()
+        try:
+            return self._send(zygote, request, fds)
+        except OSError:
+            # The zygote died since the last run, start a new one
+            zygote.stop()
+            zygote.ensure_running()
+            return self._send(zygote, request, fds)
+    
+    def _send(self, zygote: _Zygote, request: bytes, fds: List[int]) -> socket.socket:
+        """Connect to a zygote and pass it the request with the output (and verdict) descriptors."""
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(zygote.socket_path)
+            socket.send_fds(conn, [request], fds)
+        except OSError:
+            conn.close()
+            raise
+        return conn
+    
+    def _parse(self, line: bytes) -> dict:
+        """Decode one protocol line."""
+        message = json.loads(line.decode())
+        if "error" in message:
+            raise RuntimeError(f"Interpreter pool error: {message['error']}")
+        return message
+    
+    def _read_pid(self, conn: socket.socket, buffer: bytes) -> Optional[int]:
+        """
+        Wait briefly for the pid of a script that timed out before it was reported.
+        
+        Returns:
+            The script's pid, or None if it already exited or was never forked.
+            If the pid does not arrive in time, closing the connection makes the
+            zygote kill the script instead.
+        """
+        deadline = time.monotonic() + PID_GRACE_SECONDS
+        try:
+            while True:
+                # The pid is always the first line the zygote sends
+                if b"\n" in buffer:
+                    line = buffer.split(b"\n", 1)[0]
+                    return json.loads(line.decode()).get("pid")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                conn.settimeout(remaining)
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return None
+                buffer += chunk
+        except (OSError, ValueError):
+            return None
+    
+    async def _read_pid_async(self, reader: asyncio.StreamReader) -> Optional[int]:
+        """Coroutine version of _read_pid()."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=PID_GRACE_SECONDS)
+            return json.loads(line.decode()).get("pid") if line else None
+        except (asyncio.TimeoutError, OSError, ValueError):
+            return None
+    
+    def _exit(self, message: dict) -> ProcessExit:
+        """Build the ProcessExit reported by the zygote."""
+        return ProcessExit(
+            returncode=message["returncode"],
+            peak_memory_kb=message.get("peak_memory_kb"),
+            cpu_seconds=message.get("cpu_seconds"),
+        )
+    
+    def _kill(self, pid: Optional[int]) -> None:
+        """Kill a script's process group."""
+        if pid is None:
+            return
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+_pool: Optional[PythonInterpreterPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_interpreter_pool() -> PythonInterpreterPool:
+    """Get the process-wide interpreter pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PythonInterpreterPool()
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,877 @@
+"""
+Task scheduler for running a task's cases with bounded parallelism.
+"""
+import heapq
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.engine.async_executor import AsyncScriptExecutor
+from app.engine.discovery import TargetDiscovery
+from app.engine.early_verdict import VerdictMarkers
+from app.engine.executor import ErrorReason, ExecutionOutcome, ScriptExecutor
+from app.engine.preflight import unreachable_targets
+from app.engine.task_control import ControlAction, control_listener, task_processes
+from app.engine.target_limiter import TargetLimiter
+from app.models.case import Case
+from app.models.case_runtime_stats import CaseRuntimeStats
+from app.models.task import Task
+from app.models.task_result import TaskResult
+from app.services.case_stats_service import CaseStatsService
+from app.services.execution_service import ExecutionService, ResultStatus, TaskStatus
+from app.services.progress_buffer import ProgressBuffer, is_buffered, progress_flusher
+
+logger = get_logger(__name__)
+
+# Seconds between launch attempts while every remaining target is at its limit
+TARGET_RETRY_INTERVAL = 0.2
+
+# Targets discovered at once by one scheduler
+MAX_DISCOVERY_THREADS = 8
+
+# Errors that would happen again on a retry in the same run
+NON_RETRYABLE_REASONS = {
+    ErrorReason.MEMORY_LIMIT,
+    ErrorReason.CPU_LIMIT,
+    ErrorReason.NOFILE_LIMIT,
+    ErrorReason.PROCESS_LIMIT,
+    ErrorReason.STOPPED,
+}
+
+
+def resolve_parallelism(requested: Optional[int] = None) -> int:
+    """
+    Resolve the effective parallelism for a task.
+    
+    Args:
+        requested: Per-task override, or None to use the global default
+        
+    Returns:
+        Number of cases to run at once, clamped to TASK_MAX_PARALLELISM
+    """
+    parallelism = requested or settings.TASK_DEFAULT_PARALLELISM
+    return max(1, min(parallelism, settings.TASK_MAX_PARALLELISM))
+
+
+def compute_timeout(
+    explicit: Optional[int],
+    p99_seconds: Optional[float],
+    sample_count: int,
+) -> Tuple[int, bool]:
+    """
+    Work out the timeout of one case.
+    
+    An explicit Case.timeout_seconds wins. Otherwise, once a case has
+    SCRIPT_ADAPTIVE_TIMEOUT_MIN_SAMPLES runs of history, its timeout is its
+    p99 duration times SCRIPT_ADAPTIVE_TIMEOUT_MULTIPLIER, clamped to
+    [SCRIPT_ADAPTIVE_TIMEOUT_MIN_SECONDS, SCRIPT_ADAPTIVE_TIMEOUT_MAX_SECONDS].
+    
+    Returns:
+        Tuple of (timeout in seconds, whether it is adaptive)
+    """
+    if explicit:
+        return explicit, False
+    
+    if (
+        settings.SCRIPT_ADAPTIVE_TIMEOUT
+        and p99_seconds is not None
+        and sample_count >= settings.SCRIPT_ADAPTIVE_TIMEOUT_MIN_SAMPLES
+    ):
+        timeout = math.ceil(p99_seconds * settings.SCRIPT_ADAPTIVE_TIMEOUT_MULTIPLIER)
+        timeout = min(timeout, settings.SCRIPT_ADAPTIVE_TIMEOUT_MAX_SECONDS)
+        timeout = max(timeout, settings.SCRIPT_ADAPTIVE_TIMEOUT_MIN_SECONDS)
+        return timeout, True
+    
+    return settings.SCRIPT_TIMEOUT_SECONDS, False
+
+
+class PendingCase(NamedTuple):
+    """What the scheduler needs to run one pending result, read once before launching."""
+    result_id: int
+    case_id: int
+    target_ip: Optional[str]
+    case_name: Optional[str]  # None if the case no longer exists
+    script_path: Optional[str]
+    risk_level: Optional[str]
+    timeout: int
+    adaptive_timeout: bool
+    attempt: int = 0  # automatic retries so far in this run
+    check_id: Optional[str] = None  # set if the script reports a verdict for this case
+    group: Tuple["PendingCase", ...] = ()  # every result run by this process, if several
+    markers: Optional[VerdictMarkers] = None  # early verdict markers, if the case has any
+    
+    @property
+    def members(self) -> Tuple["PendingCase", ...]:
+        """The results whose outcome this run decides."""
+        return self.group or (self,)
+
+
+def load_pending_cases(db: Session, results: List[TaskResult]) -> List[PendingCase]:
+    """
+    Snapshot the results to run together with their case and timeout, in one query.
+    
+    Reading plain rows up front means the scheduler never touches the ORM
+    objects again, so the commits made while cases complete do not cause a
+    reload per result.
+    
+    Args:
+        db: Database session
+        results: Pending TaskResult objects
+        
+    Returns:
+        PendingCase per result, in the order of `results`
+    """
+    result_ids = [r.id for r in results]
+    if not result_ids:
+        return []
+    
+    rows = (
+        db.query(
+            TaskResult.id,
+            TaskResult.case_id,
+            TaskResult.target_ip,
+            Case.name,
+            Case.script_path,
+            Case.risk_level,
+            Case.timeout_seconds,
+            Case.check_id,
+            Case.pass_marker,
+            Case.fail_marker,
+            CaseRuntimeStats.p99_seconds,
+            CaseRuntimeStats.sample_count,
+        )
+        .outerjoin(Case, Case.id == TaskResult.case_id)
+        .outerjoin(CaseRuntimeStats, CaseRuntimeStats.case_id == TaskResult.case_id)
+        .filter(TaskResult.id.in_(result_ids))
+        .all()
+    )
+    by_id = {}
+    for (
+        result_id, case_id, target_ip, name, script_path, risk_level, explicit, check_id,
+        pass_marker, fail_marker, p99, sample_count,
+    ) in rows:
+        timeout, adaptive_timeout = compute_timeout(explicit, p99, sample_count or 0)
+        by_id[result_id] = PendingCase(
+            result_id, case_id, target_ip, name, script_path, risk_level, timeout, adaptive_timeout,
+            check_id=check_id,
+            markers=VerdictMarkers(pass_marker, fail_marker) if pass_marker or fail_marker else None,
+        )
+    return [by_id[result_id] for result_id in result_ids if result_id in by_id]
+
+
+def group_checks(items: List[PendingCase]) -> List[PendingCase]:
+    """
+    Merge the results that one script process can run together.
+    
+    Results against the same target whose cases share a script and all
+    have a check_id become one item in the place of the first of them,
+    which runs the script once and gets a verdict per check (see
+    app/engine/verdicts.py). The group's timeout is the longest of its
+    members'; it is never adaptive, as no single case's history fits it.
+    
+    Args:
+        items: Pending results in launch order
+        
+    Returns:
+        The items to launch, in the same order
+    """
+    groups: Dict[Tuple[Optional[str], str], List[PendingCase]] = {}
+    for item in items:
+        if item.check_id is not None:
+            groups.setdefault((item.target_ip, item.script_path), []).append(item)
+    
+    merged = []
+    for item in items:
+        members = groups.get((item.target_ip, item.script_path)) if item.check_id is not None else None
+        if not members or len(members) == 1:
+            merged.append(item)
+        elif members[0] is item:
+            merged.append(item._replace(
+                timeout=max(member.timeout for member in members),
+                adaptive_timeout=False,
+                group=tuple(members),
+            ))
+    return merged
+
+
+def order_results(db: Session, results: List, order: Optional[str] = None) -> List:
+    """
+    Order pending results for execution.
+    
+    With 'longest_first', results run in decreasing order of their case's
+    median duration so long checks do not start last and stretch the task.
+    Cases without history go first, both because they may be long and so
+    that they get measured.
+    
+    Args:
+        db: Database session
+        results: Pending TaskResult or PendingCase objects, in ID order
+        order: 'longest_first' or 'id', or None to use TASK_SCHEDULE_ORDER
+        
+    Returns:
+        Results in launch order
+    """
+    order = order or settings.TASK_SCHEDULE_ORDER
+    if order != "longest_first" or len(results) < 2:
+        return list(results)
+    
+    expected = CaseStatsService(db).get_expected_durations(r.case_id for r in results)
+    return sorted(
+        results,
+        key=lambda r: (r.case_id in expected, -expected.get(r.case_id, 0)),
+    )
+
+
+def retry_delay(attempt: int) -> float:
+    """
+    Seconds to wait before automatic retry number `attempt` (0-based).
+    
+    Exponential backoff from TASK_AUTO_RETRY_BACKOFF_SECONDS, capped at
+    TASK_AUTO_RETRY_BACKOFF_MAX_SECONDS, with jitter so that cases failing
+    together do not all retry at once.
+    """
+    delay = min(
+        settings.TASK_AUTO_RETRY_BACKOFF_SECONDS * (2 ** attempt),
+        settings.TASK_AUTO_RETRY_BACKOFF_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def create_script_executor(engine: Optional[str] = None) -> ScriptExecutor:
+    """
+    Create the script executor for the configured engine.
+    
+    Args:
+        engine: 'thread' or 'asyncio', or None to use SCRIPT_ENGINE
+        
+    Returns:
+        ScriptExecutor instance
+    """
+    engine = engine or settings.SCRIPT_ENGINE
+    if engine == "asyncio":
+        return AsyncScriptExecutor()
+    return ScriptExecutor()
+
+
+class TaskScheduler:
+    """
+    Runs the pending results of a task against its target.
+    
+    Scripts run on a bounded thread pool (or on the shared event loop with the
+    asyncio engine) while every database call stays on the calling thread, so
+    the ExecutionService session is never shared between threads and progress
+    counters are updated one completion at a time. Each launch also takes a
+    slot from the per-target limiter shared with other workers.
+    
+    Stop, pause and parallelism changes arrive through the task control
+    plane (app/engine/task_control.py), so launching a case costs no
+    database round trip beyond claiming its result.
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        task: Task,
+        script_executor: Optional[ScriptExecutor] = None,
+        target_limiter: Optional[TargetLimiter] = None,
+    ):
+        self.db = db
+        self.task = task
+        # Kept apart from `task`, which every commit expires
+        self.task_id = task.id
+        self.target_ip = task.target_ip
+        self.execution_service = ExecutionService(db)
+        self.script_executor = script_executor or create_script_executor()
+        self.parallelism = resolve_parallelism(task.parallelism)
+        self.discovery = settings.TARGET_DISCOVERY_ENABLED if task.discovery is None else task.discovery
+        # Extra script environment per target, from the discovery phase
+        self._target_env: Dict[str, Dict[str, str]] = {}
+        self.reuse_results = bool(task.reuse_results)
+        # Content hash per script path, recorded on each result for later reuse
+        self._script_hashes: Dict[str, Optional[str]] = {}
+        self._next_control_poll = 0.0
+        self._next_heartbeat = 0.0
+        # The task's targets were just probed by the pre-flight check
+        self._next_liveness_check = time.monotonic() + settings.TARGET_LIVENESS_INTERVAL_SECONDS
+        # Automatic retries waiting out their backoff: (ready at, result ID, case)
+        self._retries: List[Tuple[float, int, PendingCase]] = []
+        self.progress_buffer = ProgressBuffer() if is_buffered() else None
+        self.target_limiter = target_limiter or TargetLimiter(
+            max_concurrent=task.target_max_concurrency,
+            launch_rate=task.target_launch_rate,
+        )
+    
+    def run(self, results: List[TaskResult]) -> int:
+        """
+        Execute the given results, keeping at most `parallelism` scripts running.
+        
+        New cases are only launched while the task is neither stopped nor
+        paused. A stop kills the cases already running, which are then
+        recorded as stopped; after a pause, running cases finish normally and
+        the remaining results stay pending for resume. Either way the
+        scheduler returns once nothing is running. Control messages missed on
+        the broadcast channel are picked up from the database every
+        TASK_CONTROL_POLL_SECONDS. Results whose target is at its per-target
+        limit are skipped over until a slot frees up. Running results hold a
+        lease that the scheduler renews every TASK_HEARTBEAT_SECONDS. Targets
+        of waiting cases are re-probed every TARGET_LIVENESS_INTERVAL_SECONDS,
+        and the cases of a dead target are failed without being launched.
+        
+        Results that end with a transient error are retried up to
+        TASK_AUTO_RETRY_MAX_ATTEMPTS times within the run. They go back to
+        pending and rejoin the queue once their backoff has elapsed, while
+        other cases keep running.
+        
+        Cases and timeouts are read in one query before anything is
+        launched, and results whose case or script is missing are failed
+        right away without contacting the target. With discovery enabled,
+        each target is scanned once (or its cached scan reused) before the
+        first case starts, and the result is passed to every script. Cases
+        that share a script and report verdicts by check_id run as one
+        process per target (see group_checks()). With reuse_results, results
+        with a recent run of the same script are copied before anything else
+        happens (see _reuse_recent()).
+        
+        Args:
+            results: Pending TaskResult objects, ordered with order_results()
+            
+        Returns:
+            Number of cases that were executed
+        """
+        task_id = self.task_id
+        runnable = self._reuse_recent(self._fail_unrunnable(load_pending_cases(self.db, results)))
+        pending = deque(group_checks(order_results(self.db, runnable)))
+        in_flight: Dict[Future, Tuple[PendingCase, str]] = {}
+        
+        logger.info(f"Task {task_id}: running {len(pending)} cases with parallelism {self.parallelism}")
+        
+        control_listener.ensure_started()
+        if self.progress_buffer is not None:
+            progress_flusher.ensure_started()
+        task_processes.begin(task_id, self.task.parallelism)
+        try:
+            self._discover(pending)
+            with self._open_pool() as pool:
+                executed = self._run_pool(pool, pending, in_flight)
+        finally:
+            task_processes.end(task_id)
+            self._flush_progress()
+        
+        return executed
+    
+    def _discover(self, pending: Deque[PendingCase]) -> None:
+        """
+        Run the discovery phase for the targets of the pending cases, concurrently.
+        
+        Keeps the task's heartbeat going while scans run, so the reaper does
+        not take a long scan for a dead worker.
+        """
+        if not self.discovery or not pending:
+            return
+        
+        targets = sorted({self._target_of(item) for item in pending})
+        discovery = TargetDiscovery()
+        with ThreadPoolExecutor(
+            max_workers=min(len(targets), MAX_DISCOVERY_THREADS),
+            thread_name_prefix=f"discovery-{self.task_id}",
+        ) as pool:
+            futures = {pool.submit(discovery.env_for, target_ip): target_ip for target_ip in targets}
+            remaining = set(futures)
+            while remaining:
+                self.execution_service.heartbeat(self.task_id, [])
+                done, remaining = wait(remaining, timeout=settings.TASK_HEARTBEAT_SECONDS)
+                for future in done:
+                    try:
+                        env = future.result()
+                    except Exception as e:
+                        logger.warning(f"Task {self.task_id}: discovery of {futures[future]} failed: {e}")
+                        continue
+                    if env:
+                        self._target_env[futures[future]] = env
+        
+        logger.info(f"Task {self.task_id}: discovery done for {len(self._target_env)}/{len(targets)} targets")
+    
+    def _flush_progress(self) -> None:
+        """Write this task's buffered results before returning, so callers see final counts."""
+        if self.progress_buffer is None:
+            return
+        try:
+            self.progress_buffer.flush_task(self.db, self.task_id)
+        except Exception as e:
+            # Left in the buffer for the flusher thread
+            logger.warning(f"Task {self.task_id}: failed to flush buffered results: {e}")
+    
+    def _run_pool(
+        self,
+        pool: Optional[ThreadPoolExecutor],
+        pending: Deque[PendingCase],
+        in_flight: Dict[Future, Tuple[PendingCase, str]],
+    ) -> int:
+        """Launch and collect cases until none are pending, waiting for a retry or running."""
+        task_id = self.task_id
+        halted = False
+        executed = 0
+        
+        while in_flight or ((pending or self._retries) and not halted):
+            throttled = False
+            self._sync_control()
+            self._heartbeat(in_flight)
+            self.parallelism = resolve_parallelism(task_processes.parallelism(task_id))
+            
+            reason = None if halted else self._halt_reason()
+            if reason:
+                logger.info(f"Task {task_id} was {reason}, no further cases will be launched")
+                # Results waiting for a retry are pending in the database, so
+                # they are cancelled by the stop or picked up on resume
+                halted = True
+                self._retries.clear()
+            
+            if not halted:
+                self._check_liveness(pending)
+            self._release_retries(pending)
+            
+            # Fill free slots
+            while pending and not halted and len(in_flight) < self.parallelism:
+                claimed = self._claim_next(pending)
+                if claimed is None:
+                    # Every remaining target is at its limit
+                    throttled = True
+                    break
+                
+                item, token = claimed
+                launched = self._launch(pool, item)
+                if launched is None:
+                    self.target_limiter.release(self._target_of(item), token)
+                    continue
+                future, item = launched
+                in_flight[future] = (item, token)
+            
+            timeout = self._wait_timeout(throttled)
+            if not in_flight:
+                if throttled or (self._retries and not pending):
+                    time.sleep(timeout)
+                continue
+            
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                item, token = in_flight.pop(future)
+                self.target_limiter.release(self._target_of(item), token)
+                executed += self._record(future, item)
+        
+        return executed
+    
+    def _wait_timeout(self, throttled: bool) -> float:
+        """How long to wait for a running case before looking at the queue again."""
+        timeout = TARGET_RETRY_INTERVAL if throttled else settings.TASK_CONTROL_POLL_SECONDS
+        if self._retries:
+            timeout = min(timeout, max(0.0, self._retries[0][0] - time.monotonic()))
+        return timeout
+    
+    def _release_retries(self, pending: Deque[PendingCase]) -> None:
+        """Move retries whose backoff has elapsed to the front of the queue."""
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now:
+            _, _, item = heapq.heappop(self._retries)
+            pending.appendleft(item)
+    
+    def _schedule_retry(self, item: PendingCase, outcome: ExecutionOutcome) -> bool:
+        """
+        Put a result that ended with a transient error back in the queue after a backoff.
+        
+        Returns:
+            True if the result will be retried, False if the outcome is final
+        """
+        if (
+            outcome.status != ResultStatus.ERROR
+            or outcome.error_reason in NON_RETRYABLE_REASONS
+            or item.attempt >= settings.TASK_AUTO_RETRY_MAX_ATTEMPTS
+            or self._halt_reason()
+        ):
+            return False
+        
+        if not self.execution_service.requeue_result(
+            item.result_id,
+            error_message=outcome.error_message,
+            log_path=outcome.log_path,
+            error_reason=outcome.error_reason,
+        ):
+            return False
+        
+        delay = retry_delay(item.attempt)
+        heapq.heappush(
+            self._retries,
+            (time.monotonic() + delay, item.result_id, item._replace(attempt=item.attempt + 1)),
+        )
+        logger.info(
+            f"Task {self.task_id}: Case {item.case_id} failed ({outcome.error_message}), "
+            f"retry {item.attempt + 1}/{settings.TASK_AUTO_RETRY_MAX_ATTEMPTS} in {delay:.1f}s"
+        )
+        return True
+    
+    def _halt_reason(self) -> Optional[str]:
+        """'stopped' or 'paused' if no further cases may be launched, else None."""
+        if task_processes.is_stopped(self.task_id):
+            return TaskStatus.STOPPED
+        if task_processes.is_paused(self.task_id):
+            return TaskStatus.PAUSED
+        return None
+    
+    def _sync_control(self) -> None:
+        """
+        Reread the task's control state from the database every TASK_CONTROL_POLL_SECONDS.
+        
+        Catches up on control messages this worker missed; a stop found this
+        way also kills the task's running scripts.
+        """
+        now = time.monotonic()
+        if now < self._next_control_poll:
+            return
+        self._next_control_poll = now + settings.TASK_CONTROL_POLL_SECONDS
+        
+        status, parallelism = self.execution_service.get_control_state(self.task_id)
+        if status in (TaskStatus.STOPPED, None):
+            task_processes.apply(self.task_id, ControlAction.STOP)
+        elif status == TaskStatus.PAUSED:
+            task_processes.apply(self.task_id, ControlAction.PAUSE)
+        if parallelism is not None:
+            task_processes.apply(self.task_id, ControlAction.PARALLELISM, parallelism)
+    
+    def _heartbeat(self, in_flight: Dict[Future, Tuple[PendingCase, str]]) -> None:
+        """
+        Renew the leases of running cases every TASK_HEARTBEAT_SECONDS.
+        
+        A result whose lease runs out is requeued by the reaper, which also
+        resumes the task, so cases lost with a dead worker run again.
+        """
+        now = time.monotonic()
+        if now < self._next_heartbeat:
+            return
+        self._next_heartbeat = now + settings.TASK_HEARTBEAT_SECONDS
+        self.execution_service.heartbeat(
+            self.task_id,
+            [member.result_id for item, _ in in_flight.values() for member in item.members],
+        )
+    
+    def _check_liveness(self, pending: Deque[PendingCase]) -> None:
+        """
+        Re-probe the targets of waiting cases every TARGET_LIVENESS_INTERVAL_SECONDS.
+        
+        Cases of a target that stopped answering are dropped from the queue
+        and failed, rather than each running into its timeout. Cases already
+        running against it are left to finish.
+        """
+        if not settings.TARGET_PREFLIGHT_ENABLED or settings.TARGET_LIVENESS_INTERVAL_SECONDS <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_liveness_check:
+            return
+        
+        waiting = list(pending) + [item for _, _, item in self._retries]
+        dead = unreachable_targets({self._target_of(item) for item in waiting})
+        self._next_liveness_check = time.monotonic() + settings.TARGET_LIVENESS_INTERVAL_SECONDS
+        if not dead:
+            return
+        
+        kept = [item for item in pending if self._target_of(item) not in dead]
+        pending.clear()
+        pending.extend(kept)
+        self._retries = [entry for entry in self._retries if self._target_of(entry[2]) not in dead]
+        heapq.heapify(self._retries)
+        
+        for target_ip in sorted(dead):
+            failed = self.execution_service.fail_pending_results(
+                self.task_id,
+                [
+                    member.result_id
+                    for item in waiting if self._target_of(item) == target_ip
+                    for member in item.members
+                ],
+                f"Target {target_ip} stopped responding",
+                ErrorReason.TARGET_UNREACHABLE,
+            )
+            logger.warning(f"Task {self.task_id}: target {target_ip} stopped responding, {failed} cases failed")
+    
+    def _target_of(self, item: PendingCase) -> str:
+        """Target IP a result runs against."""
+        return item.target_ip or self.target_ip
+    
+    def _fail_unrunnable(self, items: List[PendingCase]) -> List[PendingCase]:
+        """
+        Fail the results whose case was deleted or whose script is missing, in one write.
+        
+        Each distinct script path is checked once.
+        
+        Returns:
+            The results that can be launched
+        """
+        exists: Dict[str, bool] = {}
+        runnable = []
+        outcomes = {}
+        now = datetime.utcnow()
+        for item in items:
+            if item.script_path is None:
+                error_message = "Case not found"
+            else:
+                if item.script_path not in exists:
+                    exists[item.script_path] = (self.script_executor.scripts_dir / item.script_path).exists()
+                    if not exists[item.script_path]:
+                        logger.error(f"Task {self.task_id}: script not found: {item.script_path}")
+                if exists[item.script_path]:
+                    runnable.append(item)
+                    continue
+                error_message = f"Script not found: {item.script_path}"
+            outcomes[item.result_id] = {
+                "status": ResultStatus.ERROR,
+                "end_time": now,
+                "error_message": error_message,
+            }
+        
+        if outcomes:
+            self.execution_service.complete_results(self.task_id, outcomes)
+            logger.info(f"Task {self.task_id}: {len(outcomes)} cases failed before launch")
+        return runnable
+    
+    def _script_hash(self, script_path: str) -> Optional[str]:
+        """Content hash of a script, computed once per run."""
+        if script_path not in self._script_hashes:
+            self._script_hashes[script_path] = self.script_executor.script_sha256(script_path)
+        return self._script_hashes[script_path]
+    
+    def _reuse_recent(self, items: List[PendingCase]) -> List[PendingCase]:
+        """
+        Copy recent results of unchanged scripts instead of running them again.
+        
+        Only for tasks created with reuse_results. A result is reused from a
+        pass or fail of the same case against the same target, run with a
+        script of identical content within the last
+        TASK_RESULT_REUSE_TTL_SECONDS; errors are always run again.
+        
+        Returns:
+            The results still to launch
+        """
+        if not self.reuse_results or not items:
+            return items
+        
+        keys = {}
+        for item in items:
+            script_hash = self._script_hash(item.script_path)
+            if script_hash is not None:
+                keys[item.result_id] = (self._target_of(item), item.case_id, script_hash)
+        since = datetime.utcnow() - timedelta(seconds=settings.TASK_RESULT_REUSE_TTL_SECONDS)
+        reused = set(self.execution_service.reuse_results(self.task_id, keys, since))
+        
+        if reused:
+            logger.info(f"Task {self.task_id}: reused {len(reused)} recent results, {len(items) - len(reused)} to run")
+        return [item for item in items if item.result_id not in reused]
+    
+    def _claim_next(self, pending: Deque[PendingCase]) -> Optional[Tuple[PendingCase, str]]:
+        """
+        Take the first pending result whose target has a free slot.
+        
+        Returns:
+            Tuple of (result, limiter token), or None if every target is at its limit
+        """
+        blocked = set()
+        for index, item in enumerate(pending):
+            target_ip = self._target_of(item)
+            if target_ip in blocked:
+                continue
+            token = self.target_limiter.try_acquire(target_ip, lease_seconds=item.timeout)
+            if token is not None:
+                del pending[index]
+                return item, token
+            blocked.add(target_ip)
+        return None
+    
+    def _open_pool(self):
+        """Open the thread pool used by the blocking engine."""
+        if isinstance(self.script_executor, AsyncScriptExecutor):
+            # Scripts are supervised by the process-wide event loop
+            return nullcontext()
+        # Sized for the largest parallelism the task may be changed to; threads
+        # are only started as cases are launched
+        return ThreadPoolExecutor(
+            max_workers=settings.TASK_MAX_PARALLELISM,
+            thread_name_prefix=f"task-{self.task_id}",
+        )
+    
+    def _launch(
+        self,
+        pool: Optional[ThreadPoolExecutor],
+        item: PendingCase,
+    ) -> Optional[Tuple[Future, PendingCase]]:
+        """
+        Claim a result (or every result of a group) and submit its script to the pool.
+        
+        Returns:
+            Tuple of (future of the script's ExecutionOutcome, item as launched),
+            or None if nothing was launched. A group loses the members that
+            another scheduler claimed first.
+        """
+        script_hash = self._script_hash(item.script_path)
+        if item.group:
+            claimed = set(self.execution_service.claim_results(
+                [member.result_id for member in item.group], script_hash,
+            ))
+            members = tuple(member for member in item.group if member.result_id in claimed)
+            if not members:
+                return None
+            item = members[0]._replace(timeout=item.timeout, adaptive_timeout=False, group=members)
+        elif not self.execution_service.claim_result(item.result_id, script_hash):
+            # Already taken by another scheduler of this task
+            return None
+        
+        extra_env = dict(self._target_env.get(self._target_of(item), {}))
+        if item.check_id is not None:
+            extra_env["CHECK_IDS"] = ",".join(member.check_id for member in item.members)
+            extra_env["RESULT_IDS"] = ",".join(str(member.result_id) for member in item.members)
+        
+        if item.group:
+            logger.info(
+                f"Task {self.task_id}: Executing checks {extra_env['CHECK_IDS']} of {item.script_path} "
+                f"as one run (timeout {item.timeout}s)"
+            )
+        else:
+            logger.info(
+                f"Task {self.task_id}: Executing case {item.case_id} - {item.case_name} (timeout {item.timeout}s)"
+            )
+        kwargs = dict(
+            script_path=item.script_path,
+            target_ip=self._target_of(item),
+            task_id=self.task_id,
+            result_id=item.result_id,
+            timeout=item.timeout,
+            adaptive_timeout=item.adaptive_timeout,
+            extra_env=extra_env or None,
+            collect_verdicts=item.check_id is not None,
+            # Members of a group each have their own markers, which one run cannot honour
+            markers=None if item.group else item.markers,
+        )
+        if pool is None:
+            return self.script_executor.submit(**kwargs), item
+        return pool.submit(self.script_executor.execute, **kwargs), item
+    
+    def _record(self, future: Future, item: PendingCase) -> int:
+        """
+        Store the outcome of a finished script, or schedule a retry.
+        
+        Returns:
+            Number of results completed: 0 if the case will be retried, more
+            than 1 for a group
+        """
+        try:
+            outcome = future.result()
+        except Exception as e:
+            logger.exception(f"Task {self.task_id}: Case {item.case_id} crashed: {e}")
+            outcome = ExecutionOutcome(ResultStatus.ERROR, str(e))
+        
+        outcomes = self._apply_verdicts(item, outcome)
+        # A group is not retried: the checks that did report a verdict are done
+        if not item.group and self._schedule_retry(item, outcomes[0][1]):
+            return 0
+        
+        remaining = []
+        for member, member_outcome in outcomes:
+            buffered = self.progress_buffer is not None and self.progress_buffer.complete_result(
+                self.task_id,
+                member.result_id,
+                member_outcome.status,
+                error_message=member_outcome.error_message,
+                log_path=member_outcome.log_path,
+                error_reason=member_outcome.error_reason,
+                peak_memory_kb=member_outcome.peak_memory_kb,
+                cpu_seconds=member_outcome.cpu_seconds,
+                duration_seconds=member_outcome.duration_seconds,
+            )
+            if not buffered:
+                remaining.append((member, member_outcome))
+        
+        if len(remaining) == 1:
+            member, member_outcome = remaining[0]
+            self.execution_service.complete_result(
+                member.result_id,
+                member_outcome.status,
+                error_message=member_outcome.error_message,
+                log_path=member_outcome.log_path,
+                error_reason=member_outcome.error_reason,
+                peak_memory_kb=member_outcome.peak_memory_kb,
+                cpu_seconds=member_outcome.cpu_seconds,
+                duration_seconds=member_outcome.duration_seconds,
+            )
+        elif remaining:
+            now = datetime.utcnow()
+            self.execution_service.complete_results(self.task_id, {
+                member.result_id: {
+                    "status": member_outcome.status,
+                    "end_time": now,
+                    "error_message": member_outcome.error_message,
+                    "log_path": member_outcome.log_path,
+                    "error_reason": member_outcome.error_reason,
+                    "peak_memory_kb": member_outcome.peak_memory_kb,
+                    "cpu_seconds": member_outcome.cpu_seconds,
+                    "duration_seconds": member_outcome.duration_seconds,
+                }
+                for member, member_outcome in remaining
+            })
+        
+        for member, member_outcome in outcomes:
+            logger.info(f"Task {self.task_id}: Case {member.case_id} completed with status: {member_outcome.status}")
+        return len(outcomes)
+    
+    def _apply_verdicts(
+        self,
+        item: PendingCase,
+        outcome: ExecutionOutcome,
+    ) -> List[Tuple[PendingCase, ExecutionOutcome]]:
+        """
+        Split the outcome of a run into the outcome of each result it decides.
+        
+        A verdict reported for a member's check sets its status, even if the
+        script later timed out or hit a limit, unless the task was stopped.
+        Without a verdict, a single case falls back to the exit code, while
+        a group member gets the run's error, or an error of its own if the
+        script exited normally without reporting its check.
+        
+        Returns:
+            List of (member, outcome) pairs
+        """
+        if item.check_id is None:
+            return [(item, outcome)]
+        
+        verdicts = outcome.verdicts or {}
+        outcomes = []
+        for member in item.members:
+            verdict = verdicts.get(member.check_id)
+            if verdict is not None and outcome.error_reason != ErrorReason.STOPPED:
+                error_message = verdict.message
+                if error_message is None and verdict.status != ResultStatus.PASS:
+                    error_message = outcome.error_message
+                member_outcome = replace(
+                    outcome,
+                    status=verdict.status,
+                    error_message=error_message,
+                    error_reason=None,
+                )
+            elif item.group and outcome.status != ResultStatus.ERROR:
+                member_outcome = replace(
+                    outcome,
+                    status=ResultStatus.ERROR,
+                    error_message=f"Script reported no verdict for check {member.check_id}",
+                )
+            else:
+                member_outcome = replace(outcome)
+            if item.group:
+                # The run's duration says nothing about how long one check takes
+                member_outcome.duration_seconds = None
+            outcomes.append((member, member_outcome))
+        return outcomes
@@ -0,0 +1,125 @@
+"""
+Per-target concurrency and launch-rate limiting shared by every worker.
+
+Each target IP has a Redis sorted set of running-script leases (scored by
+their expiry time, so slots held by a crashed worker free themselves) and a
+short-lived key spacing out script launches.
+"""
+import uuid
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "autosecdet:target"
+
+# Extra lease time on top of the script's timeout, covering queueing and log handling
+LEASE_MARGIN_SECONDS = 60
+
+# KEYS[1] = lease set, KEYS[2] = launch spacing key
+# ARGV = token, lease_ms, max_concurrent, launch_interval_ms
+# Returns 1 if a slot was taken, 0 if the target is at its limit
+ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local lease_ms = tonumber(ARGV[2])
+local max_concurrent = tonumber(ARGV[3])
+local interval_ms = tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if max_concurrent > 0 and redis.call('ZCARD', KEYS[1]) >= max_concurrent then
+    return 0
+end
+if interval_ms > 0 and not redis.call('SET', KEYS[2], ARGV[1], 'PX', interval_ms, 'NX') then
+    return 0
+end
+
+redis.call('ZADD', KEYS[1], now + lease_ms, ARGV[1])
+-- Leases differ in length: only ever extend the set's TTL, so a short lease
+-- cannot make the set expire while a longer one is still held
+if redis.call('PTTL', KEYS[1]) < lease_ms then
+    redis.call('PEXPIRE', KEYS[1], lease_ms)
+end
+return 1
+"""
+
+
+class TargetLimiter:
+    """
+    Limits how many scripts run against one target at a time, and how fast
+    they are started, across all workers.
+    
+    If Redis cannot be reached the limiter lets launches through rather
+    than stalling every task.
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        launch_rate: Optional[float] = None,
+        client: Optional[redis.Redis] = None,
+    ):
+        self.max_concurrent = settings.TARGET_MAX_CONCURRENT_SCRIPTS if max_concurrent is None else max_concurrent
+        launch_rate = settings.TARGET_LAUNCH_RATE_PER_SECOND if launch_rate is None else launch_rate
+        self.launch_interval_ms = int(1000 / launch_rate) if launch_rate > 0 else 0
+        self.client = client or redis_client
+        self._acquire = self.client.register_script(ACQUIRE_SCRIPT)
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether any per-target limit is configured."""
+        return self.max_concurrent > 0 or self.launch_interval_ms > 0
+    
+    def try_acquire(self, target_ip: str, lease_seconds: Optional[int] = None) -> Optional[str]:
+        """
+        Take a slot for one script against a target, without waiting.
+        
+        Args:
+            target_ip: Target IP address
+            lease_seconds: Script timeout; the slot frees itself shortly after
+            
+        Returns:
+            Lease token to pass to release(), or None if the target is at its limit
+        """
+        token = uuid.uuid4().hex
+        if not self.enabled:
+            return token
+        
+        lease_ms = ((lease_seconds or settings.SCRIPT_TIMEOUT_SECONDS) + LEASE_MARGIN_SECONDS) * 1000
+        try:
+            acquired = self._acquire(
+                keys=[self._lease_key(target_ip), self._launch_key(target_ip)],
+                args=[token, lease_ms, self.max_concurrent, self.launch_interval_ms],
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Target limiter unavailable, launching without limit: {e}")
+            return token
+        return token if acquired else None
+    
+    def release(self, target_ip: str, token: str) -> None:
+        """
+        Give back a slot taken by try_acquire().
+        
+        Args:
+            target_ip: Target IP address
+            token: Lease token returned by try_acquire()
+        """
+        if not self.enabled or self.max_concurrent <= 0:
+            return
+        
+        try:
+            self.client.zrem(self._lease_key(target_ip), token)
+        except redis.RedisError as e:
+            # The lease expires on its own
+            logger.warning(f"Failed to release target slot for {target_ip}: {e}")
+    
+    def _lease_key(self, target_ip: str) -> str:
+        return f"{KEY_PREFIX}:{target_ip}:leases"
+    
+    def _launch_key(self, target_ip: str) -> str:
+        return f"{KEY_PREFIX}:{target_ip}:next_launch"
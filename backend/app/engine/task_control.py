@@ -0,0 +1,273 @@
+"""
+Task control plane shared by every worker.
+
+Stopping, pausing, resuming or resizing a task publishes a control message on
+a Redis pub/sub channel. Every worker process listens on that channel and
+applies it to the schedulers it runs: a stop kills the process groups of the
+task's running scripts, a pause stops new launches, and a parallelism change
+takes effect on the next launch. The task row in the database stays the
+source of truth; schedulers reread it every TASK_CONTROL_POLL_SECONDS in case
+a message was missed.
+"""
+import json
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Set
+
+import redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+
+logger = get_logger(__name__)
+
+CONTROL_CHANNEL = "autosecdet:task:control"
+
+# Seconds between reconnection attempts when Redis is unavailable
+RECONNECT_INTERVAL = 5.0
+
+
+class ControlAction:
+    """Control messages understood by the workers."""
+    STOP = "stop"
+    PAUSE = "pause"
+    RESUME = "resume"
+    PARALLELISM = "parallelism"
+
+
+def publish_control(
+    task_id: int,
+    action: str,
+    value: Optional[int] = None,
+    client: Optional[redis.Redis] = None,
+) -> None:
+    """
+    Broadcast a control action for a task to every worker.
+    
+    Call this after the change has been committed to the task row.
+    
+    Args:
+        task_id: Task ID
+        action: ControlAction value
+        value: New parallelism, for ControlAction.PARALLELISM
+    """
+    message = json.dumps({"task_id": task_id, "action": action, "value": value})
+    try:
+        (client or redis_client).publish(CONTROL_CHANNEL, message)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish {action} for task {task_id}: {e}")
+
+
+class TaskProcessRegistry:
+    """
+    Control state and script process groups of the tasks run by this worker process.
+    
+    Every script runs as the leader of its own process group, so killing the
+    group also kills whatever the script started.
+    """
+    
+    def __init__(self, grace: float = None):
+        self.grace = settings.TASK_STOP_GRACE_SECONDS if grace is None else grace
+        self._lock = threading.Lock()
+        self._groups: Dict[int, Set[int]] = {}
+        self._active: Dict[int, int] = {}
+        self._stopped: Set[int] = set()
+        self._paused: Set[int] = set()
+        self._parallelism: Dict[int, int] = {}
+    
+    def begin(self, task_id: int, parallelism: Optional[int] = None) -> None:
+        """Mark a task as being run by a scheduler in this process."""
+        with self._lock:
+            self._active[task_id] = self._active.get(task_id, 0) + 1
+            if parallelism is not None:
+                self._parallelism[task_id] = parallelism
+    
+    def end(self, task_id: int) -> None:
+        """Undo begin() once the scheduler has returned."""
+        with self._lock:
+            remaining = self._active.get(task_id, 0) - 1
+            if remaining > 0:
+                self._active[task_id] = remaining
+            else:
+                self._active.pop(task_id, None)
+                self._stopped.discard(task_id)
+                self._paused.discard(task_id)
+                self._parallelism.pop(task_id, None)
+    
+    def register(self, task_id: int, pgid: int) -> None:
+        """Record a started script; it is killed at once if its task was already stopped."""
+        with self._lock:
+            self._groups.setdefault(task_id, set()).add(pgid)
+            stopped = task_id in self._stopped
+        if stopped:
+            self._terminate({pgid})
+    
+    def unregister(self, task_id: int, pgid: int) -> None:
+        """Forget a script once it has been reaped."""
+        with self._lock:
+            groups = self._groups.get(task_id)
+            if groups is not None:
+                groups.discard(pgid)
+                if not groups:
+                    del self._groups[task_id]
+    
+    @contextmanager
+    def track(self, task_id: int) -> Iterator[Callable[[int], None]]:
+        """
+        Register the process groups started inside the block.
+        
+        Yields a callback taking the pid of each started script; everything
+        registered through it is unregistered when the block exits.
+        """
+        pgids = []
+        
+        def on_start(pgid: int) -> None:
+            pgids.append(pgid)
+            self.register(task_id, pgid)
+        
+        try:
+            yield on_start
+        finally:
+            for pgid in pgids:
+                self.unregister(task_id, pgid)
+    
+    def is_stopped(self, task_id: int) -> bool:
+        """Whether a stop for the task reached this worker."""
+        with self._lock:
+            return task_id in self._stopped
+    
+    def is_paused(self, task_id: int) -> bool:
+        """Whether a pause for the task reached this worker and was not resumed."""
+        with self._lock:
+            return task_id in self._paused
+    
+    def parallelism(self, task_id: int) -> Optional[int]:
+        """Latest parallelism requested for the task, if any."""
+        with self._lock:
+            return self._parallelism.get(task_id)
+    
+    def apply(self, task_id: int, action: str, value: Optional[int] = None) -> None:
+        """
+        Apply a control action. Actions for tasks this process is not running are ignored.
+        
+        Args:
+            task_id: Task ID
+            action: ControlAction value
+            value: New parallelism, for ControlAction.PARALLELISM
+        """
+        if action == ControlAction.STOP:
+            self.stop(task_id)
+            return
+        
+        with self._lock:
+            if task_id not in self._active:
+                return
+            if action == ControlAction.PAUSE:
+                self._paused.add(task_id)
+            elif action == ControlAction.RESUME:
+                self._paused.discard(task_id)
+            elif action == ControlAction.PARALLELISM and value is not None:
+                self._parallelism[task_id] = int(value)
+            else:
+                logger.warning(f"Ignoring unknown control action for task {task_id}: {action!r}")
+    
+    def stop(self, task_id: int) -> int:
+        """
+        Kill every running script of a task: SIGTERM first, SIGKILL after the grace period.
+        
+        Stops for tasks this process is not running are ignored.
+        
+        Returns:
+            Number of process groups signalled
+        """
+        with self._lock:
+            if task_id not in self._active or task_id in self._stopped:
+                return 0
+            self._stopped.add(task_id)
+            groups = set(self._groups.get(task_id, ()))
+        if groups:
+            logger.info(f"Task {task_id}: killing {len(groups)} running scripts")
+            self._terminate(groups)
+        return len(groups)
+    
+    def _terminate(self, groups: Set[int]) -> None:
+        """SIGTERM the groups now and SIGKILL them after the grace period."""
+        self._signal(groups, signal.SIGTERM)
+        if self.grace > 0:
+            timer = threading.Timer(self.grace, self._signal, args=(groups, signal.SIGKILL))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._signal(groups, signal.SIGKILL)
+    
+    def _signal(self, groups: Set[int], sig: int) -> None:
+        """Send a signal to process groups that may already be gone."""
+        for pgid in groups:
+            try:
+                os.killpg(pgid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+
+task_processes = TaskProcessRegistry()
+
+
+class ControlListener:
+    """
+    Subscribes to CONTROL_CHANNEL in a daemon thread and applies messages to the registry.
+    
+    Started lazily by the scheduler, once per worker process.
+    """
+    
+    def __init__(self, registry: TaskProcessRegistry, client: Optional[redis.Redis] = None):
+        self.registry = registry
+        self.client = client or redis_client
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+    
+    def ensure_started(self) -> None:
+        """Start the listener thread if it is not running in this process."""
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._listen, name="task-control-listener", daemon=True)
+            self._thread.start()
+    
+    def _listen(self) -> None:
+        """Receive control messages forever, resubscribing after Redis errors."""
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CONTROL_CHANNEL)
+                for message in pubsub.listen():
+                    self._handle(message.get("data"))
+            except redis.RedisError as e:
+                logger.warning(f"Task control listener disconnected, retrying in {RECONNECT_INTERVAL}s: {e}")
+            finally:
+                try:
+                    pubsub.close()
+                except redis.RedisError:
+                    pass
+            time.sleep(RECONNECT_INTERVAL)
+    
+    def _handle(self, data) -> None:
+        """Apply one control message."""
+        try:
+            message = json.loads(data)
+            task_id = int(message["task_id"])
+            action = message["action"]
+            value = message.get("value")
+        except (TypeError, ValueError, KeyError):
+            logger.warning(f"Ignoring malformed task control message: {data!r}")
+            return
+        self.registry.apply(task_id, action, value)
+
+
+control_listener = ControlListener(task_processes)
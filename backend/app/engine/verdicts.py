@@ -0,0 +1,106 @@
+"""
+Structured verdicts reported by scripts on a dedicated descriptor.
+
+A case with a check_id receives VERDICT_FD in its environment: the number
+of a descriptor, open for writing, on which the script reports results as
+JSON lines, one object per check:
+
+    {"check": "ssh-root-login", "status": "fail", "message": "PermitRootLogin yes"}
+
+`status` is 'pass', 'fail' or 'error'; `message` is optional. Cases that
+share a script and a target run as one process when they all have a
+check_id: the script gets the requested checks in CHECK_IDS (comma
+separated) and reports a verdict for each, so an expensive setup such as a
+login happens once instead of once per case. A verdict overrides the exit
+code for its check. For example, from a shell script:
+
+    echo '{"check": "telnet-enabled", "status": "pass"}' >&"$VERDICT_FD"
+"""
+import codecs
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from app.core.logging import get_logger
+from app.engine.output import PipeReader
+
+logger = get_logger(__name__)
+
+VERDICT_STATUSES = ("pass", "fail", "error")
+
+# Longest verdict line kept; a script writing garbage cannot exhaust memory
+MAX_LINE_CHARS = 65536
+
+
+@dataclass
+class Verdict:
+    """Result of one check reported by a script."""
+    check: str
+    status: str
+    message: Optional[str] = None
+
+
+def parse_verdict(line: str) -> Verdict:
+    """
+    Parse one verdict line.
+    
+    Raises:
+        ValueError: If the line is not a valid verdict
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("verdict must be a JSON object")
+    check = data.get("check")
+    status = data.get("status")
+    if not isinstance(check, str) or not check:
+        raise ValueError("verdict needs a 'check' string")
+    if status not in VERDICT_STATUSES:
+        raise ValueError(f"verdict status must be one of {', '.join(VERDICT_STATUSES)}")
+    message = data.get("message")
+    return Verdict(check, status, str(message) if message is not None else None)
+
+
+class VerdictReader(PipeReader):
+    """
+    Parses verdict lines as they arrive and notes each one in the execution log.
+    
+    The last verdict reported for a check wins. Log lines go through
+    `write_log`, normally OutputCapture.write_log(), since the output and
+    verdict pipes are read by different threads.
+    """
+    
+    thread_name = "script-verdicts"
+    
+    def __init__(self, write_log: Optional[Callable[[str], None]] = None):
+        super().__init__()
+        self.write_log = write_log
+        self.verdicts: Dict[str, Verdict] = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+    
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """Parse the complete lines in a chunk, keeping a trailing partial line."""
+        text = self._partial + self._decoder.decode(data, final)
+        lines = text.split("\n")
+        self._partial = "" if final else lines.pop()
+        if len(self._partial) > MAX_LINE_CHARS:
+            self._partial = ""
+        for line in lines:
+            line = line.strip()
+            if line:
+                self._add(line)
+    
+    def _add(self, line: str) -> None:
+        """Record one verdict line."""
+        try:
+            verdict = parse_verdict(line)
+        except ValueError as e:
+            self._log(f"[verdict] ignored invalid line ({e}): {line[:200]}")
+            return
+        self.verdicts[verdict.check] = verdict
+        self._log(f"[verdict] {verdict.check}: {verdict.status}" + (f" - {verdict.message}" if verdict.message else ""))
+    
+    def _log(self, text: str) -> None:
+        """Note a verdict event in the execution log."""
+        if self.write_log is not None:
+            self.write_log(f"\n{text}\n")
@@ -0,0 +1,287 @@
+"""
+Warm Python interpreter that forks a child per detection script.
+
+Started by app.engine.prefork as a standalone process:
+
+    python3 zygote.py <socket_path> [module ...]
+
+The listed modules are imported once at startup. For every request received
+on the Unix socket, the zygote forks; the child becomes its own process group,
+attaches the output descriptor passed with the request to stdout/stderr
+(exposing the verdict descriptor, if any, as VERDICT_FD) and runs the script
+as __main__ with the requested argv, environment and working directory, so
+scripts see the same interface as `python3 script.py <target>`.
+Resource limits from the request are applied in the child before the script
+runs; the zygote reaps its children with wait4() and reports their exit status
+and resource usage. If the worker closes a connection before the exit was
+reported (it gave up on the script), the child's process group is killed.
+
+Protocol (one connection per script, JSON lines):
+    request  -> {"script": ..., "argv": [...], "env": {...}, "cwd": ...,
+                 "rlimits": {name: [soft, hard]}, "cgroup_procs": path|null}
+                + the output fd, and optionally the verdict fd
+    response <- {"pid": <child pid>}            sent after fork
+    response <- {"returncode": <code>, "peak_memory_kb": ..., "cpu_seconds": ...}
+                                                sent once the child was reaped
+                                                (returncode is -N for signal N)
+
+This file must not import the app package: the zygote only holds the modules
+scripts need.
+"""
+import importlib
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import traceback
+
+MAX_REQUEST_BYTES = 1024 * 1024
+PARENT_CHECK_INTERVAL = 1.0
+
+
+def _preload(modules):
+    """Import common modules so forked children start warm."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # Optional libraries may be missing on this node
+            pass
+
+
+def _exit_code(exc: SystemExit) -> int:
+    """Translate SystemExit into a process exit code like the interpreter does."""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _apply_limits(request: dict) -> None:
+    """Join the script's cgroup and lower the rlimits requested for it."""
+    cgroup_procs = request.get("cgroup_procs")
+    if cgroup_procs:
+        with open(cgroup_procs, "w") as f:
+            f.write("0")
+    for name, (soft, hard) in (request.get("rlimits") or {}).items():
+        res = getattr(resource, name)
+        _, current_hard = resource.getrlimit(res)
+        if current_hard != resource.RLIM_INFINITY:
+            hard = min(hard, current_hard)
+            soft = min(soft, hard)
+        resource.setrlimit(res, (soft, hard))
+
+
+def _kill(pid: int) -> None:
+    """Kill a child's process group, or the child if it has not called setsid() yet."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _run_child(inherited_fds: list, request: dict, output_fd: int, verdict_fd: int = None) -> None:
+    """Run one script inside the forked child. Never returns."""
+    code = 1
+    try:
+        signal.set_wakeup_fd(-1)
+        for fd in inherited_fds:
+            os.close(fd)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.setsid()
+        _apply_limits(request)
+        
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(output_fd, 1)
+        os.dup2(output_fd, 2)
+        os.close(output_fd)
+        
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        if verdict_fd is not None:
+            # Also kept open across exec for commands the script runs
+            os.set_inheritable(verdict_fd, True)
+            os.environ["VERDICT_FD"] = str(verdict_fd)
+        
+        script = request["script"]
+        sys.argv = list(request["argv"])
+        sys.path[0] = os.path.dirname(os.path.abspath(script))
+        
+        import runpy
+        try:
+            runpy.run_path(script, run_name="__main__")
+            code = 0
+        except SystemExit as e:
+            code = _exit_code(e)
+        except BaseException as e:
+            # Hide the zygote and runpy frames, like a plain interpreter would
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != script:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb or e.__traceback__)
+            code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            pass
+        os._exit(code)
+
+
+def _handle(conn: socket.socket, inherited_fds: list) -> int:
+    """
+    Receive one request, fork its child and report the child's PID.
+    
+    Args:
+        conn: Connection the request arrived on
+        inherited_fds: Zygote descriptors the child must close
+        
+    Returns:
+        PID of the forked child, or 0 if the request was rejected
+    """
+    data, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST_BYTES, 2)
+    if not fds:
+        conn.sendall(b'{"error": "missing output descriptor"}\n')
+        return 0
+    
+    output_fd = fds[0]
+    verdict_fd = fds[1] if len(fds) > 1 else None
+    try:
+        while not data.endswith(b"\n") and len(data) < MAX_REQUEST_BYTES:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        request = json.loads(data.decode())
+        pid = os.fork()
+        if pid == 0:
+            _run_child([conn.fileno(), *inherited_fds], request, output_fd, verdict_fd)
+        try:
+            conn.sendall((json.dumps({"pid": pid}) + "\n").encode())
+        except OSError:
+            # The worker hung up already, the child is still reaped as usual
+            _kill(pid)
+        return pid
+    except Exception as e:
+        conn.sendall((json.dumps({"error": str(e)}) + "\n").encode())
+        return 0
+    finally:
+        os.close(output_fd)
+        if verdict_fd is not None:
+            os.close(verdict_fd)
+
+
+def _abandoned(conn: socket.socket) -> bool:
+    """Return True if the worker closed a child's connection."""
+    try:
+        return not conn.recv(4096, socket.MSG_DONTWAIT)
+    except BlockingIOError:
+        return False
+    except OSError:
+        return True
+
+
+def _reap(children: dict, selector: selectors.BaseSelector) -> None:
+    """Collect finished children and send their exit status and usage."""
+    while children:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        conn = children.pop(pid, None)
+        if conn is None:
+            continue
+        try:
+            selector.unregister(conn)
+        except KeyError:
+            # Already dropped when the worker hung up
+            pass
+        message = {
+            "returncode": os.waitstatus_to_exitcode(status),
+            "peak_memory_kb": usage.ru_maxrss,
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+        }
+        try:
+            conn.sendall((json.dumps(message) + "\n").encode())
+        except OSError:
+            # The worker gave up on this script (timeout)
+            pass
+        conn.close()
+
+
+def main(argv) -> None:
+    socket_path = argv[1]
+    _preload(argv[2:])
+    
+    # SIGCHLD wakes the selector through the wakeup pipe
+    wakeup = os.pipe()
+    for fd in wakeup:
+        os.set_blocking(fd, False)
+    signal.set_wakeup_fd(wakeup[1])
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+    
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(wakeup[0], selectors.EVENT_READ)
+    
+    children = {}
+    parent_pid = os.getppid()
+    print("ready", flush=True)
+    
+    while True:
+        events = selector.select(PARENT_CHECK_INTERVAL)
+        
+        # Exit with the worker process that started us
+        if os.getppid() != parent_pid:
+            return
+        
+        for key, _ in events:
+            if key.fileobj is listener:
+                conn, _ = listener.accept()
+                conn.settimeout(None)
+                inherited_fds = [listener.fileno(), *wakeup, *(c.fileno() for c in children.values())]
+                try:
+                    pid = _handle(conn, inherited_fds)
+                except Exception:
+                    traceback.print_exc()
+                    pid = 0
+                if pid:
+                    children[pid] = conn
+                    selector.register(conn, selectors.EVENT_READ, pid)
+                else:
+                    conn.close()
+            elif key.data is not None:
+                # The worker only reads after its request, so this is a hang-up
+                if _abandoned(key.fileobj):
+                    selector.unregister(key.fileobj)
+                    _kill(key.data)
+            else:
+                try:
+                    while os.read(wakeup[0], 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+        
+        _reap(children, selector)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -5,6 +5,7 @@ from app.models.case import Case
 from app.models.task import Task
 from app.models.task_result import TaskResult
 from app.models.audit_log import AuditLog
+from app.models.case_runtime_stats import CaseRuntimeStats
 
 __all__ = [
     "User",
@@ -13,4 +14,5 @@ __all__ = [
     "Task",
     "TaskResult",
     "AuditLog",
+    "CaseRuntimeStats",
 ]
@@ -23,6 +23,11 @@ class Case(Base, TimestampMixin):
     description = Column(Text, nullable=True)
     fix_suggestion = Column(Text, nullable=True)
     script_path = Column(String(500), nullable=False)
+    timeout_seconds = Column(Integer, nullable=True)  # NULL = adaptive or SCRIPT_TIMEOUT_SECONDS
+    check_id = Column(String(100), nullable=True)  # identifier in the script's verdicts, see app/engine/verdicts.py
+    # Output markers that decide the result early, see app/engine/early_verdict.py
+    pass_marker = Column(String(200), nullable=True)
+    fail_marker = Column(String(200), nullable=True)
     is_enabled = Column(Boolean, nullable=False, default=True, index=True)
     is_deleted = Column(Boolean, nullable=False, default=False, index=True)
     deleted_at = Column(DateTime, nullable=True)
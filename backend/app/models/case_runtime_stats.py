@@ -0,0 +1,23 @@
+"""
+CaseRuntimeStats model for per-case execution duration history.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.database import Base
+
+
+class CaseRuntimeStats(Base):
+    """Rolling duration statistics of one case, used to order task execution."""
+    
+    __tablename__ = "case_runtime_stats"
+    
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="CASCADE"), primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)  # all samples ever recorded
+    recent_durations = Column(JSONB, nullable=False, default=list)  # last CASE_DURATION_WINDOW durations in seconds
+    p50_seconds = Column(Float, nullable=True)
+    p95_seconds = Column(Float, nullable=True)
+    p99_seconds = Column(Float, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
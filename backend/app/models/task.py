@@ -1,7 +1,7 @@
 """
 Task model for detection tasks.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, Float, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -13,18 +13,27 @@ class Task(Base):
     __tablename__ = "tasks"
     
     id = Column(Integer, primary_key=True, index=True)
-    target_ip = Column(String(15), nullable=False, index=True)
+    target_ip = Column(String(50), nullable=False, index=True)  # IP, CIDR or "first_ip (+N)" for target lists
+    target_count = Column(Integer, nullable=False, default=1)
     description = Column(Text, nullable=True)  # 备注说明（版本、机型等）
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     status = Column(String(20), nullable=False, default="pending", index=True)
-    # Status: 'pending' | 'running' | 'completed' | 'stopped' | 'error'
+    # Status: 'queued' | 'pending' | 'running' | 'paused' | 'completed' | 'stopped' | 'error'
     total_cases = Column(Integer, nullable=False, default=0)
     completed_cases = Column(Integer, nullable=False, default=0)
     passed_count = Column(Integer, nullable=False, default=0)
     failed_count = Column(Integer, nullable=False, default=0)
     error_count = Column(Integer, nullable=False, default=0)
+    parallelism = Column(Integer, nullable=True)  # NULL = TASK_DEFAULT_PARALLELISM
+    dispatch_mode = Column(String(20), nullable=True)  # 'single' | 'distributed', NULL = TASK_DISPATCH_MODE
+    target_max_concurrency = Column(Integer, nullable=True)  # NULL = TARGET_MAX_CONCURRENT_SCRIPTS
+    target_launch_rate = Column(Float, nullable=True)  # scripts started per second, NULL = TARGET_LAUNCH_RATE_PER_SECOND
+    priority = Column(Integer, nullable=False, default=5, server_default="5")  # 0-9, higher runs first
+    discovery = Column(Boolean, nullable=True)  # nmap each target before the cases, NULL = TARGET_DISCOVERY_ENABLED
+    reuse_results = Column(Boolean, nullable=False, default=False, server_default="false")  # see TASK_RESULT_REUSE_TTL_SECONDS
     start_time = Column(DateTime, nullable=True)
     end_time = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # last sign of life from a scheduler running the task
     created_at = Column(DateTime, nullable=False, server_default="CURRENT_TIMESTAMP", index=True)
     
     # Relationships
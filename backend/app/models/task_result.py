@@ -1,7 +1,7 @@
 """
 TaskResult model for individual case execution results.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -15,13 +15,24 @@ class TaskResult(Base):
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
+    target_ip = Column(String(15), nullable=True, index=True)
     status = Column(String(20), nullable=False, default="pending", index=True)
     # Status: 'pending' | 'running' | 'pass' | 'fail' | 'error'
     retry_count = Column(Integer, nullable=False, default=0)
     start_time = Column(DateTime, nullable=True)
     end_time = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)  # a running result past its lease is requeued
+    lease_recoveries = Column(Integer, nullable=False, default=0, server_default="0")  # requeues after a lost worker
     log_path = Column(String(500), nullable=True)
     error_message = Column(Text, nullable=True)
+    error_reason = Column(String(30), nullable=True)
+    # Reason: 'timeout' | 'memory_limit' | 'cpu_limit' | 'nofile_limit' | 'process_limit'
+    #   | 'worker_lost' | 'target_unreachable' | 'not_executed'
+    peak_memory_kb = Column(Integer, nullable=True)
+    cpu_seconds = Column(Float, nullable=True)
+    script_sha256 = Column(String(64), nullable=True, index=True)  # script content the result was run with
+    # Set if the result was copied from this earlier run instead of executed
+    reused_from_id = Column(Integer, ForeignKey("task_results.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime, nullable=False, server_default="CURRENT_TIMESTAMP")
     
     # Relationships
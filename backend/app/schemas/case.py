@@ -6,6 +6,9 @@ from typing import Optional
 
 from pydantic import BaseModel, Field, field_validator
 
+# Passed to scripts comma separated in CHECK_IDS
+CHECK_ID_PATTERN = r"^[A-Za-z0-9_.:-]+$"
+
 
 class CaseBase(BaseModel):
     """Base case schema with common fields."""
@@ -15,6 +18,10 @@ class CaseBase(BaseModel):
     description: Optional[str] = None
     fix_suggestion: Optional[str] = None
     script_path: str = Field(..., min_length=1, max_length=500)
+    timeout_seconds: Optional[int] = Field(None, ge=1, le=86400, description="Script timeout for this case. Defaults to an adaptive value or SCRIPT_TIMEOUT_SECONDS.")
+    check_id: Optional[str] = Field(None, min_length=1, max_length=100, pattern=CHECK_ID_PATTERN, description="Identifier of this check in the verdicts the script writes to VERDICT_FD. Cases sharing a script and all having a check_id run as one process per target.")
+    pass_marker: Optional[str] = Field(None, min_length=1, max_length=200, description="Output text that decides a pass as soon as it appears; the script is then ended after a grace period.")
+    fail_marker: Optional[str] = Field(None, min_length=1, max_length=200, description="Output text that decides a fail as soon as it appears; the script is then ended after a grace period.")
 
 
 class CaseCreate(CaseBase):
@@ -30,6 +37,10 @@ class CaseUpdate(BaseModel):
     description: Optional[str] = None
     fix_suggestion: Optional[str] = None
     script_path: Optional[str] = Field(None, min_length=1, max_length=500)
+    timeout_seconds: Optional[int] = Field(None, ge=1, le=86400)
+    check_id: Optional[str] = Field(None, min_length=1, max_length=100, pattern=CHECK_ID_PATTERN)
+    pass_marker: Optional[str] = Field(None, min_length=1, max_length=200)
+    fail_marker: Optional[str] = Field(None, min_length=1, max_length=200)
     is_enabled: Optional[bool] = None
 
 
@@ -43,6 +54,10 @@ class CaseResponse(BaseModel):
     description: Optional[str] = None
     fix_suggestion: Optional[str] = None
     script_path: str
+    timeout_seconds: Optional[int] = None
+    check_id: Optional[str] = None
+    pass_marker: Optional[str] = None
+    fail_marker: Optional[str] = None
     is_enabled: bool
     created_at: datetime
     updated_at: datetime
@@ -1,11 +1,23 @@
 """
 Task Pydantic schemas for request/response validation.
 """
+import ipaddress
 import re
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.core.config import settings
+
+IPV4_PATTERN = r"^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$"
+
+
+def _check_parallelism(v: Optional[int]) -> Optional[int]:
+    """Reject a parallelism the scheduler would clamp to TASK_MAX_PARALLELISM."""
+    if v is not None and v > settings.TASK_MAX_PARALLELISM:
+        raise ValueError(f"parallelism must be at most {settings.TASK_MAX_PARALLELISM}")
+    return v
 
 
 class TaskBase(BaseModel):
@@ -14,18 +26,101 @@ class TaskBase(BaseModel):
     
     @field_validator("target_ip")
     @classmethod
-    def validate_ip(cls, v: str) -> str:
+    def validate_ip(cls, v: Optional[str]) -> Optional[str]:
         """Validate IPv4 address format."""
-        pattern = r"^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$"
-        if not re.match(pattern, v):
+        if v is None:
+            return v
+        if not re.match(IPV4_PATTERN, v):
             raise ValueError("Invalid IPv4 address format")
         return v
 
 
 class TaskCreate(TaskBase):
-    """Schema for creating a new task."""
+    """
+    Schema for creating a new task.
+    
+    Exactly one of target_ip, targets or target_cidr must be given.
+    """
+    target_ip: Optional[str] = Field(None, min_length=7, max_length=15)
+    targets: Optional[List[str]] = Field(None, min_length=1, description="List of IPv4 addresses to scan")
+    target_cidr: Optional[str] = Field(None, max_length=18, description="IPv4 network to scan, e.g. 192.168.1.0/24")
     description: Optional[str] = Field(None, max_length=500, description="Task description/notes (e.g., version, device model)")
     case_ids: Optional[List[int]] = Field(None, description="Specific case IDs to run. If empty, runs all enabled cases.")
+    parallelism: Optional[int] = Field(None, ge=1, description="Number of cases to run at once, at most TASK_MAX_PARALLELISM. Defaults to TASK_DEFAULT_PARALLELISM.")
+    dispatch_mode: Optional[str] = Field(None, pattern="^(single|distributed)$", description="'single' runs on one worker, 'distributed' fans out case chunks to all workers. Defaults to TASK_DISPATCH_MODE.")
+    target_max_concurrency: Optional[int] = Field(None, ge=1, le=64, description="Maximum scripts running against one target across all workers. Defaults to TARGET_MAX_CONCURRENT_SCRIPTS.")
+    target_launch_rate: Optional[float] = Field(None, gt=0, le=100, description="Maximum scripts started per second against one target. Defaults to TARGET_LAUNCH_RATE_PER_SECOND.")
+    priority: Optional[int] = Field(None, ge=0, le=9, description="0-9, higher runs first. Defaults to TASK_DEFAULT_PRIORITY.")
+    discovery: Optional[bool] = Field(None, description="Scan each target with nmap once before the cases and pass the result to every script. Defaults to TARGET_DISCOVERY_ENABLED.")
+    reuse_results: bool = Field(False, description="Copy pass/fail results of the same case against the same target from the last TASK_RESULT_REUSE_TTL_SECONDS, if its script is unchanged, instead of running it again.")
+    
+    @field_validator("targets")
+    @classmethod
+    def validate_targets(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        """Validate every address in the target list."""
+        if v is None:
+            return v
+        for ip in v:
+            if not re.match(IPV4_PATTERN, ip):
+                raise ValueError(f"Invalid IPv4 address format: {ip}")
+        # Drop duplicates but keep submission order
+        return list(dict.fromkeys(v))
+    
+    @field_validator("parallelism")
+    @classmethod
+    def validate_parallelism(cls, v: Optional[int]) -> Optional[int]:
+        """Cap parallelism at TASK_MAX_PARALLELISM."""
+        return _check_parallelism(v)
+    
+    @field_validator("target_cidr")
+    @classmethod
+    def validate_cidr(cls, v: Optional[str]) -> Optional[str]:
+        """Validate and normalize an IPv4 network."""
+        if v is None:
+            return v
+        try:
+            network = ipaddress.IPv4Network(v, strict=False)
+        except ValueError:
+            raise ValueError("Invalid IPv4 CIDR format")
+        return str(network)
+    
+    @model_validator(mode="after")
+    def validate_target_spec(self) -> "TaskCreate":
+        """Require exactly one way of specifying targets."""
+        given = [f for f in (self.target_ip, self.targets, self.target_cidr) if f is not None]
+        if len(given) != 1:
+            raise ValueError("Exactly one of target_ip, targets or target_cidr is required")
+        return self
+    
+    def count_targets(self) -> int:
+        """Return the number of targets without expanding a CIDR."""
+        if self.target_cidr is not None:
+            network = ipaddress.IPv4Network(self.target_cidr)
+            if network.num_addresses <= 2:
+                return network.num_addresses
+            return network.num_addresses - 2
+        if self.targets is not None:
+            return len(self.targets)
+        return 1
+    
+    def expand_targets(self) -> List[str]:
+        """Return the list of IPv4 addresses this task should scan."""
+        if self.target_cidr is not None:
+            network = ipaddress.IPv4Network(self.target_cidr)
+            return [str(ip) for ip in network.hosts()]
+        if self.targets is not None:
+            return self.targets
+        return [self.target_ip]
+    
+    def target_label(self) -> str:
+        """Return the value stored in Task.target_ip for display and filtering."""
+        if self.target_cidr is not None:
+            return self.target_cidr
+        if self.targets is not None:
+            if len(self.targets) == 1:
+                return self.targets[0]
+            return f"{self.targets[0]} (+{len(self.targets) - 1})"
+        return self.target_ip
 
 
 class TaskResponse(BaseModel):
@@ -41,6 +136,16 @@ class TaskResponse(BaseModel):
     passed_count: int
     failed_count: int
     error_count: int
+    target_count: int = 1
+    parallelism: Optional[int] = None
+    dispatch_mode: Optional[str] = None
+    target_max_concurrency: Optional[int] = None
+    target_launch_rate: Optional[float] = None
+    priority: int = 5
+    discovery: Optional[bool] = None
+    reuse_results: bool = False
+    queue_position: Optional[int] = None  # 1-based, queued tasks only
+    estimated_start_time: Optional[datetime] = None
     progress: float = 0.0
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
@@ -63,6 +168,7 @@ class TaskResultResponse(BaseModel):
     id: int
     task_id: int
     case_id: int
+    target_ip: Optional[str] = None
     case_name: Optional[str] = None
     category_name: Optional[str] = None
     risk_level: Optional[str] = None
@@ -71,6 +177,10 @@ class TaskResultResponse(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     error_message: Optional[str] = None
+    error_reason: Optional[str] = None
+    peak_memory_kb: Optional[int] = None
+    cpu_seconds: Optional[float] = None
+    reused_from_id: Optional[int] = None  # set if copied from an earlier run instead of executed
     
     class Config:
         from_attributes = True
@@ -81,8 +191,29 @@ class TaskDetailResponse(TaskResponse):
     results: List[TaskResultResponse] = []
 
 
+class TaskQueueStats(BaseModel):
+    """Schema for the admission queue's load and limits (0 = unlimited)."""
+    running_tasks: int
+    running_cases: int
+    queued_tasks: int
+    max_running_tasks: int
+    max_running_cases: int
+    max_queued_tasks: int
+
+
+class TaskParallelismUpdate(BaseModel):
+    """Schema for changing a task's parallelism."""
+    parallelism: int = Field(..., ge=1, description="Number of cases to run at once, at most TASK_MAX_PARALLELISM")
+    
+    @field_validator("parallelism")
+    @classmethod
+    def validate_parallelism(cls, v: int) -> int:
+        """Cap parallelism at TASK_MAX_PARALLELISM."""
+        return _check_parallelism(v)
+
+
 class TaskFilter(BaseModel):
     """Schema for task filtering."""
-    status: Optional[str] = Field(None, pattern="^(pending|running|completed|stopped|error)$")
+    status: Optional[str] = Field(None, pattern="^(queued|pending|running|paused|completed|stopped|error)$")
     target_ip: Optional[str] = None
     user_id: Optional[int] = None
@@ -5,6 +5,7 @@ from app.services.case_service import CaseService
 from app.services.category_service import CategoryService
 from app.services.task_service import TaskService
 from app.services.execution_service import ExecutionService
+from app.services.case_stats_service import CaseStatsService
 from app.services.report_service import ReportService
 
 __all__ = [
@@ -14,5 +15,6 @@ __all__ = [
     "CategoryService",
     "TaskService",
     "ExecutionService",
+    "CaseStatsService",
     "ReportService",
 ]
@@ -100,6 +100,10 @@ class CaseService:
             existing_deleted.description = case_data.description
             existing_deleted.fix_suggestion = case_data.fix_suggestion
             existing_deleted.script_path = case_data.script_path
+            existing_deleted.timeout_seconds = case_data.timeout_seconds
+            existing_deleted.check_id = case_data.check_id
+            existing_deleted.pass_marker = case_data.pass_marker
+            existing_deleted.fail_marker = case_data.fail_marker
             existing_deleted.is_enabled = True
             existing_deleted.updated_at = datetime.utcnow()
             self.db.commit()
@@ -113,6 +117,10 @@ class CaseService:
             description=case_data.description,
             fix_suggestion=case_data.fix_suggestion,
             script_path=case_data.script_path,
+            timeout_seconds=case_data.timeout_seconds,
+            check_id=case_data.check_id,
+            pass_marker=case_data.pass_marker,
+            fail_marker=case_data.fail_marker,
         )
         self.db.add(case)
         self.db.commit()
@@ -0,0 +1,106 @@
+"""
+Case runtime statistics service.
+"""
+import math
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.case_runtime_stats import CaseRuntimeStats
+
+logger = get_logger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+    
+    Args:
+        values: Sorted, non-empty list of values
+        pct: Percentile between 0 and 100
+        
+    Returns:
+        The smallest value with at least pct% of values at or below it
+    """
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+class CaseStatsService:
+    """Service class for per-case duration statistics."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def record_duration(self, case_id: int, seconds: float) -> CaseRuntimeStats:
+        """
+        Add one execution duration to a case's rolling window.
+        
+        The stats row is locked for the update so concurrent workers do not
+        lose samples. The caller commits.
+        
+        Args:
+            case_id: Case ID
+            seconds: Duration of the run
+            
+        Returns:
+            Updated stats
+        """
+        stats = self._get_for_update(case_id)
+        
+        window = settings.CASE_DURATION_WINDOW
+        durations = (list(stats.recent_durations or []) + [round(seconds, 3)])[-window:]
+        ordered = sorted(durations)
+        
+        stats.recent_durations = durations
+        stats.sample_count = (stats.sample_count or 0) + 1
+        stats.p50_seconds = percentile(ordered, 50)
+        stats.p95_seconds = percentile(ordered, 95)
+        stats.p99_seconds = percentile(ordered, 99)
+        return stats
+    
+    def get_expected_durations(self, case_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Get the median duration of each case that has history.
+        
+        Args:
+            case_ids: Case IDs to look up
+            
+        Returns:
+            Dict of case_id -> p50 duration in seconds (cases without history are absent)
+        """
+        case_ids = list(set(case_ids))
+        if not case_ids:
+            return {}
+        
+        rows = (
+            self.db.query(CaseRuntimeStats.case_id, CaseRuntimeStats.p50_seconds)
+            .filter(
+                CaseRuntimeStats.case_id.in_(case_ids),
+                CaseRuntimeStats.p50_seconds.isnot(None),
+            )
+            .all()
+        )
+        return {case_id: p50 for case_id, p50 in rows}
+    
+    def get_stats(self, case_id: int) -> Optional[CaseRuntimeStats]:
+        """Get the stats row of a case, or None if it never ran."""
+        return self.db.query(CaseRuntimeStats).filter(CaseRuntimeStats.case_id == case_id).first()
+    
+    def _get_for_update(self, case_id: int) -> CaseRuntimeStats:
+        """Lock a case's stats row, creating it on first use."""
+        query = self.db.query(CaseRuntimeStats).filter(CaseRuntimeStats.case_id == case_id)
+        stats = query.with_for_update().first()
+        if stats is not None:
+            return stats
+        
+        try:
+            with self.db.begin_nested():
+                self.db.add(CaseRuntimeStats(case_id=case_id, sample_count=0, recent_durations=[]))
+        except IntegrityError:
+            # Another worker created it first
+            logger.debug(f"Runtime stats for case {case_id} created concurrently")
+        return query.with_for_update().populate_existing().one()
@@ -1,24 +1,30 @@
 """
 Execution service for managing task execution state and progress.
 """
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import and_, case, func, or_, select, update
 from sqlalchemy.orm import Session
 
 from app.models.task import Task
 from app.models.task_result import TaskResult
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.engine.executor import ErrorReason
+from app.services.case_stats_service import CaseStatsService
 
 logger = get_logger(__name__)
 
 
 class TaskStatus:
     """Task status constants."""
+    QUEUED = "queued"
     PENDING = "pending"
     RUNNING = "running"
     COMPLETED = "completed"
     STOPPED = "stopped"
+    PAUSED = "paused"
     ERROR = "error"
 
 
@@ -31,38 +37,315 @@ class ResultStatus:
     ERROR = "error"
 
 
+# Task counter incremented for each final result status
+_STATUS_COUNTERS = {
+    ResultStatus.PASS: "passed",
+    ResultStatus.FAIL: "failed",
+    ResultStatus.ERROR: "errors",
+}
+
+# Fields of a result's last run, cleared when the result goes back to pending
+# for a manual retry or rerun
+_RUN_FIELDS_CLEARED = {
+    "start_time": None,
+    "end_time": None,
+    "error_message": None,
+    "error_reason": None,
+    "peak_memory_kb": None,
+    "cpu_seconds": None,
+    "lease_expires_at": None,
+    "lease_recoveries": 0,
+    "script_sha256": None,
+    "reused_from_id": None,
+}
+
+
+def _progress_delta(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, int]:
+    """Counter changes for a result moving from one status to another."""
+    delta = {"completed": 0, "passed": 0, "failed": 0, "errors": 0}
+    if old_status in _STATUS_COUNTERS:
+        delta["completed"] -= 1
+        delta[_STATUS_COUNTERS[old_status]] -= 1
+    if new_status in _STATUS_COUNTERS:
+        delta["completed"] += 1
+        delta[_STATUS_COUNTERS[new_status]] += 1
+    return delta
+
+
+def is_duration_sampled(status: str, error_reason: Optional[str]) -> bool:
+    """
+    Whether a finished run's duration goes into its case's history.
+    
+    Only complete runs are sampled; errors often end early and would skew
+    the estimates. A run cut off by an adaptive timeout counts with the
+    timeout as its duration, so a too-tight estimate grows on the next run.
+    """
+    return status in (ResultStatus.PASS, ResultStatus.FAIL) or error_reason == ErrorReason.ADAPTIVE_TIMEOUT
+
+
+def lease_deadline(now: Optional[datetime] = None) -> datetime:
+    """Expiry of a result lease taken or renewed now."""
+    return (now or datetime.utcnow()) + timedelta(seconds=settings.TASK_RESULT_LEASE_SECONDS)
+
+
 class ExecutionService:
     """Service class for task execution state management."""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def start_task(self, task_id: int) -> Optional[Task]:
+    def get_task(self, task_id: int) -> Optional[Task]:
+        """Get task by ID."""
+        return self.db.query(Task).filter(Task.id == task_id).first()
+    
+    def start_task(self, task_id: int) -> Tuple[Optional[Task], bool]:
         """
-        Start a task execution.
+        Start a task execution in a single conditional UPDATE.
+        
+        A pending task is started. A running task is only taken over if its
+        heartbeat is older than TASK_RESULT_LEASE_SECONDS, so a redelivered
+        message cannot start a second scheduler next to a live one.
         
         Args:
             task_id: Task ID to start
             
         Returns:
-            Updated task or None if not found
+            Tuple of (task or None if not found, whether this call started it)
         """
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.TASK_RESULT_LEASE_SECONDS)
+        started = (
+            self.db.query(Task)
+            .filter(
+                Task.id == task_id,
+                or_(
+                    Task.status == TaskStatus.PENDING,
+                    and_(
+                        Task.status == TaskStatus.RUNNING,
+                        func.coalesce(Task.heartbeat_at, Task.start_time) < stale_before,
+                    ),
+                ),
+            )
+            .update(
+                {
+                    "status": TaskStatus.RUNNING,
+                    "heartbeat_at": now,
+                    # A resumed task keeps its original start time
+                    "start_time": func.coalesce(Task.start_time, now),
+                },
+                synchronize_session=False,
+            )
+        ) == 1
+        self.db.commit()
+        
+        task = self.get_task(task_id)
         if not task:
             logger.error(f"Task {task_id} not found")
-            return None
+            return None, False
+        if started:
+            logger.info(f"Task {task_id} started")
+        else:
+            logger.warning(f"Task {task_id} not started, it is {task.status}")
+        return task, started
+    
+    def claim_result(self, result_id: int, script_sha256: Optional[str] = None) -> bool:
+        """
+        Mark a pending result as running in a single UPDATE.
         
-        if task.status != TaskStatus.PENDING:
-            logger.warning(f"Task {task_id} is not in pending state: {task.status}")
-            return task
+        Only a result that is still pending matches, so two schedulers working
+        on the same task (for example around a pause and resume) never run a
+        case twice. The claim comes with a lease of TASK_RESULT_LEASE_SECONDS,
+        which the scheduler renews with heartbeat() while the case runs.
+        
+        Args:
+            result_id: TaskResult ID
+            script_sha256: Hash of the script about to run, kept for result reuse
+            
+        Returns:
+            True if this caller claimed the result
+        """
+        now = datetime.utcnow()
+        claimed = (
+            self.db.query(TaskResult)
+            .filter(TaskResult.id == result_id, TaskResult.status == ResultStatus.PENDING)
+            .update(
+                {
+                    "status": ResultStatus.RUNNING,
+                    "start_time": now,
+                    "lease_expires_at": lease_deadline(now),
+                    "script_sha256": script_sha256,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return claimed == 1
+    
+    def claim_results(self, result_ids: List[int], script_sha256: Optional[str] = None) -> List[int]:
+        """
+        Claim several pending results run by one script process, in a single UPDATE.
         
-        task.status = TaskStatus.RUNNING
-        task.start_time = datetime.utcnow()
+        Args:
+            result_ids: TaskResult IDs
+            script_sha256: Hash of the script about to run, kept for result reuse
+            
+        Returns:
+            IDs of the results this caller claimed, in the order of `result_ids`
+        """
+        now = datetime.utcnow()
+        rows = self.db.execute(
+            update(TaskResult)
+            .where(TaskResult.id.in_(result_ids), TaskResult.status == ResultStatus.PENDING)
+            .values(
+                status=ResultStatus.RUNNING,
+                start_time=now,
+                lease_expires_at=lease_deadline(now),
+                script_sha256=script_sha256,
+            )
+            .returning(TaskResult.id)
+            .execution_options(synchronize_session=False)
+        ).all()
         self.db.commit()
-        self.db.refresh(task)
+        claimed = {row.id for row in rows}
+        return [result_id for result_id in result_ids if result_id in claimed]
+    
+    def heartbeat(self, task_id: int, result_ids: List[int]) -> None:
+        """
+        Renew the leases of a scheduler's running results and mark its task alive.
         
-        logger.info(f"Task {task_id} started")
-        return task
+        Args:
+            task_id: Task ID
+            result_ids: TaskResult IDs the scheduler is running
+        """
+        now = datetime.utcnow()
+        if result_ids:
+            (
+                self.db.query(TaskResult)
+                .filter(TaskResult.id.in_(result_ids), TaskResult.status == ResultStatus.RUNNING)
+                .update({"lease_expires_at": lease_deadline(now)}, synchronize_session=False)
+            )
+        self.db.query(Task).filter(Task.id == task_id).update({"heartbeat_at": now}, synchronize_session=False)
+        self.db.commit()
+    
+    def release_expired_results(self) -> Dict[int, int]:
+        """
+        Requeue running results whose lease expired because their worker died.
+        
+        Only results of running tasks are released; those of a paused or
+        stopped task are left alone until it is resumed or closed. Each
+        result goes back to pending with its lease recovery count
+        incremented, so a resumed task runs it again. A result already
+        recovered TASK_LEASE_MAX_RECOVERIES times is failed with reason
+        'worker_lost' instead, so a case that keeps killing its worker cannot
+        stall the task forever. Automatic and manual retries do not count
+        towards that limit. Results claimed before leases existed expire
+        TASK_RESULT_LEASE_SECONDS after they started.
+        
+        Returns:
+            {task_id: number of results requeued or failed}
+        """
+        now = datetime.utcnow()
+        expired_filter = and_(
+            TaskResult.status == ResultStatus.RUNNING,
+            or_(
+                TaskResult.lease_expires_at < now,
+                and_(
+                    TaskResult.lease_expires_at.is_(None),
+                    TaskResult.start_time < now - timedelta(seconds=settings.TASK_RESULT_LEASE_SECONDS),
+                ),
+            ),
+        )
+        expired = (
+            self.db.query(TaskResult.id, TaskResult.task_id, TaskResult.lease_recoveries)
+            .join(Task, Task.id == TaskResult.task_id)
+            .filter(expired_filter, Task.status == TaskStatus.RUNNING)
+            .all()
+        )
+        if not expired:
+            return {}
+        
+        released: Dict[int, int] = {}
+        lost: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        requeue_ids = []
+        for result_id, task_id, lease_recoveries in expired:
+            released[task_id] = released.get(task_id, 0) + 1
+            if lease_recoveries >= settings.TASK_LEASE_MAX_RECOVERIES:
+                lost.setdefault(task_id, {})[result_id] = {
+                    "status": ResultStatus.ERROR,
+                    "end_time": now,
+                    "error_message": "Worker lost while running the case",
+                    "error_reason": ErrorReason.WORKER_LOST,
+                }
+            else:
+                requeue_ids.append(result_id)
+        
+        if requeue_ids:
+            (
+                self.db.query(TaskResult)
+                .filter(TaskResult.id.in_(requeue_ids), expired_filter)
+                .update(
+                    {
+                        "status": ResultStatus.PENDING,
+                        "lease_recoveries": TaskResult.lease_recoveries + 1,
+                        "start_time": None,
+                        "lease_expires_at": None,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            self.db.commit()
+        for task_id, outcomes in lost.items():
+            self.complete_results(task_id, outcomes)
+        
+        logger.warning(
+            f"Requeued {len(requeue_ids)} and failed {len(expired) - len(requeue_ids)} results "
+            f"with expired leases (tasks {sorted(released)})"
+        )
+        return released
+    
+    def get_stale_tasks(self) -> List[Task]:
+        """
+        Running tasks without a heartbeat for TASK_RESULT_LEASE_SECONDS.
+        
+        Returns:
+            Tasks whose scheduler is presumably gone
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.TASK_RESULT_LEASE_SECONDS)
+        return (
+            self.db.query(Task)
+            .filter(
+                Task.status == TaskStatus.RUNNING,
+                func.coalesce(Task.heartbeat_at, Task.start_time) < cutoff,
+            )
+            .order_by(Task.id)
+            .all()
+        )
+    
+    def requeue_task(self, task_id: int, stale_before: Optional[datetime] = None) -> bool:
+        """
+        Put a running task back in the queue so that it resumes on a worker.
+        
+        Args:
+            task_id: Task ID
+            stale_before: Only requeue the task if its last heartbeat is older
+            
+        Returns:
+            True if the task was running (and stale) and is now queued
+        """
+        query = self.db.query(Task).filter(Task.id == task_id, Task.status == TaskStatus.RUNNING)
+        if stale_before is not None:
+            query = query.filter(func.coalesce(Task.heartbeat_at, Task.start_time) < stale_before)
+        requeued = query.update({"status": TaskStatus.QUEUED}, synchronize_session=False)
+        self.db.commit()
+        return requeued == 1
+    
+    def has_pending_results(self, task_id: int) -> bool:
+        """Whether any result of the task is still waiting to run."""
+        return self.db.query(
+            self.db.query(TaskResult.id)
+            .filter(TaskResult.task_id == task_id, TaskResult.status == ResultStatus.PENDING)
+            .exists()
+        ).scalar()
     
     def start_result(self, result_id: int) -> Optional[TaskResult]:
         """
@@ -90,6 +373,10 @@ class ExecutionService:
         status: str,
         error_message: Optional[str] = None,
         log_path: Optional[str] = None,
+        error_reason: Optional[str] = None,
+        peak_memory_kb: Optional[int] = None,
+        cpu_seconds: Optional[float] = None,
+        duration_seconds: Optional[float] = None,
     ) -> Optional[TaskResult]:
         """
         Complete a task result with final status.
@@ -99,26 +386,284 @@ class ExecutionService:
             status: Final status (pass, fail, error)
             error_message: Optional error message
             log_path: Optional path to execution log
+            error_reason: Optional ErrorReason for error results
+            peak_memory_kb: Peak memory used by the script
+            cpu_seconds: CPU time used by the script
+            duration_seconds: Script run time, added to the case's duration history
             
         Returns:
             Updated result or None
         """
-        result = self.db.query(TaskResult).filter(TaskResult.id == result_id).first()
+        # Lock the row so a concurrent completion (a redelivered run, the
+        # reaper) cannot count the same transition twice
+        result = (
+            self.db.query(TaskResult)
+            .filter(TaskResult.id == result_id)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
         if not result:
             return None
         
+        delta = _progress_delta(result.status, status)
         result.status = status
         result.end_time = datetime.utcnow()
         result.error_message = error_message
         result.log_path = log_path
-        self.db.commit()
-        self.db.refresh(result)
+        result.error_reason = error_reason
+        result.peak_memory_kb = peak_memory_kb
+        result.cpu_seconds = cpu_seconds
+        
+        if duration_seconds is not None and is_duration_sampled(status, error_reason):
+            CaseStatsService(self.db).record_duration(result.case_id, duration_seconds)
         
-        # Update task progress
-        self._update_task_progress(result.task_id)
+        # Update task progress in the same transaction
+        self.adjust_progress(result.task_id, **delta)
+        self.db.commit()
         
         return result
     
+    def complete_results(self, task_id: int, outcomes: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Complete many results of one task in a single transaction.
+        
+        Used to flush the write-behind progress buffer and to fail results
+        that cannot be launched: one SELECT for the current statuses, one
+        batched UPDATE for the results and one for the task counters. The
+        SELECT locks the rows, in ID order, until the commit.
+        
+        Args:
+            task_id: Task ID
+            outcomes: {result_id: {"status", "end_time", "error_message", "log_path",
+                "error_reason", "peak_memory_kb", "cpu_seconds", "duration_seconds"}}
+            
+        Returns:
+            Number of results updated
+        """
+        if not outcomes:
+            return 0
+        
+        current = (
+            self.db.query(TaskResult.id, TaskResult.status, TaskResult.case_id)
+            .filter(TaskResult.task_id == task_id, TaskResult.id.in_(list(outcomes)))
+            .order_by(TaskResult.id)
+            .with_for_update()
+            .all()
+        )
+        
+        delta = {"completed": 0, "passed": 0, "failed": 0, "errors": 0}
+        rows = []
+        stats_service = CaseStatsService(self.db)
+        for result_id, old_status, case_id in current:
+            outcome = outcomes[result_id]
+            for key, value in _progress_delta(old_status, outcome["status"]).items():
+                delta[key] += value
+            rows.append({
+                "id": result_id,
+                "status": outcome["status"],
+                "end_time": outcome["end_time"],
+                "error_message": outcome.get("error_message"),
+                "log_path": outcome.get("log_path"),
+                "error_reason": outcome.get("error_reason"),
+                "peak_memory_kb": outcome.get("peak_memory_kb"),
+                "cpu_seconds": outcome.get("cpu_seconds"),
+            })
+            duration_seconds = outcome.get("duration_seconds")
+            if duration_seconds is not None and is_duration_sampled(outcome["status"], outcome.get("error_reason")):
+                stats_service.record_duration(case_id, duration_seconds)
+        
+        if rows:
+            self.db.execute(update(TaskResult), rows)
+            self.adjust_progress(task_id, **delta)
+        self.db.commit()
+        return len(rows)
+    
+    def fail_pending_results(
+        self,
+        task_id: int,
+        result_ids: List[int],
+        error_message: str,
+        error_reason: Optional[str] = None,
+    ) -> int:
+        """
+        Fail results that will not be run, in a single UPDATE.
+        
+        Only results that are still pending change; the task's counters are
+        updated in the same transaction.
+        
+        Args:
+            task_id: Task ID
+            result_ids: TaskResult IDs to fail
+            error_message: Error recorded on each result
+            error_reason: ErrorReason recorded on each result
+            
+        Returns:
+            Number of results failed
+        """
+        if not result_ids:
+            return 0
+        
+        failed = (
+            self.db.query(TaskResult)
+            .filter(
+                TaskResult.task_id == task_id,
+                TaskResult.id.in_(result_ids),
+                TaskResult.status == ResultStatus.PENDING,
+            )
+            .update(
+                {
+                    "status": ResultStatus.ERROR,
+                    "end_time": datetime.utcnow(),
+                    "error_message": error_message,
+                    "error_reason": error_reason,
+                },
+                synchronize_session=False,
+            )
+        )
+        if failed:
+            self.adjust_progress(task_id, completed=failed, errors=failed)
+        self.db.commit()
+        return failed
+    
+    def reuse_results(
+        self,
+        task_id: int,
+        keys: Dict[int, Tuple[str, int, str]],
+        since: datetime,
+    ) -> List[int]:
+        """
+        Complete pending results with copies of recent runs, in one transaction.
+        
+        A result is copied from the latest pass or fail of the same case
+        against the same target, run with the same script content and ended
+        after `since`. The copy takes the status, message, log and resource
+        usage of its source and points to it in reused_from_id. Copies are
+        never sources themselves, so a verdict cannot outlive its window by
+        being passed on from task to task.
+        
+        Args:
+            task_id: Task ID
+            keys: {result_id: (target_ip, case_id, script_sha256)} of pending results
+            since: Oldest end time a source may have
+            
+        Returns:
+            IDs of the results that were reused
+        """
+        if not keys:
+            return []
+        
+        sources = (
+            self.db.query(
+                TaskResult.id,
+                TaskResult.target_ip,
+                TaskResult.case_id,
+                TaskResult.script_sha256,
+                TaskResult.status,
+                TaskResult.error_message,
+                TaskResult.log_path,
+                TaskResult.peak_memory_kb,
+                TaskResult.cpu_seconds,
+            )
+            .filter(
+                TaskResult.target_ip.in_({key[0] for key in keys.values()}),
+                TaskResult.case_id.in_({key[1] for key in keys.values()}),
+                TaskResult.script_sha256.in_({key[2] for key in keys.values()}),
+                TaskResult.status.in_((ResultStatus.PASS, ResultStatus.FAIL)),
+                TaskResult.reused_from_id.is_(None),
+                TaskResult.end_time >= since,
+            )
+            .order_by(TaskResult.end_time)
+            .all()
+        )
+        # Later runs overwrite earlier ones
+        latest = {(s.target_ip, s.case_id, s.script_sha256): s for s in sources}
+        pending = {
+            result_id
+            for (result_id,) in self.db.query(TaskResult.id).filter(
+                TaskResult.task_id == task_id,
+                TaskResult.id.in_(list(keys)),
+                TaskResult.status == ResultStatus.PENDING,
+            )
+        }
+        
+        now = datetime.utcnow()
+        delta = {"completed": 0, "passed": 0, "failed": 0, "errors": 0}
+        rows = []
+        for result_id, key in keys.items():
+            source = latest.get(key)
+            if source is None or result_id not in pending:
+                continue
+            for name, value in _progress_delta(ResultStatus.PENDING, source.status).items():
+                delta[name] += value
+            rows.append({
+                "id": result_id,
+                "status": source.status,
+                "start_time": now,
+                "end_time": now,
+                "error_message": source.error_message,
+                "log_path": source.log_path,
+                "error_reason": None,
+                "peak_memory_kb": source.peak_memory_kb,
+                "cpu_seconds": source.cpu_seconds,
+                "script_sha256": source.script_sha256,
+                "reused_from_id": source.id,
+            })
+        
+        if rows:
+            self.db.execute(update(TaskResult), rows)
+            self.adjust_progress(task_id, **delta)
+        self.db.commit()
+        return [row["id"] for row in rows]
+    
+    def requeue_result(
+        self,
+        result_id: int,
+        error_message: Optional[str] = None,
+        log_path: Optional[str] = None,
+        error_reason: Optional[str] = None,
+    ) -> bool:
+        """
+        Put a running result back to pending for an automatic retry, in a single UPDATE.
+        
+        The failed attempt's error and log stay on the result until the retry
+        finishes. Progress counters are unchanged, since neither status is
+        counted. Nothing changes once the task is no longer running: a stop
+        has already failed the task's pending results, and a requeued one
+        would stay pending forever.
+        
+        Args:
+            result_id: TaskResult ID
+            error_message: Error of the failed attempt
+            log_path: Log of the failed attempt
+            error_reason: ErrorReason of the failed attempt
+            
+        Returns:
+            False if the result or its task was no longer running
+        """
+        task_running = (
+            select(Task.id)
+            .where(Task.id == TaskResult.task_id, Task.status == TaskStatus.RUNNING)
+            .exists()
+        )
+        requeued = (
+            self.db.query(TaskResult)
+            .filter(TaskResult.id == result_id, TaskResult.status == ResultStatus.RUNNING, task_running)
+            .update(
+                {
+                    "status": ResultStatus.PENDING,
+                    "retry_count": TaskResult.retry_count + 1,
+                    "start_time": None,
+                    "error_message": error_message,
+                    "log_path": log_path,
+                    "error_reason": error_reason,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return requeued == 1
+    
     def retry_result(self, result_id: int) -> Optional[TaskResult]:
         """
         Increment retry count for a result.
@@ -133,56 +678,109 @@ class ExecutionService:
         if not result:
             return None
         
+        delta = _progress_delta(result.status, ResultStatus.PENDING)
         result.retry_count += 1
         result.status = ResultStatus.PENDING
         result.start_time = None
         result.end_time = None
         result.error_message = None
+        self.adjust_progress(result.task_id, **delta)
         self.db.commit()
         self.db.refresh(result)
         return result
     
-    def _update_task_progress(self, task_id: int) -> None:
+    def adjust_progress(
+        self,
+        task_id: int,
+        completed: int = 0,
+        passed: int = 0,
+        failed: int = 0,
+        errors: int = 0,
+    ) -> Optional[str]:
+        """
+        Add to a task's progress counters with a single UPDATE.
+        
+        Counters are changed relative to their stored values, so workers
+        finishing cases at the same time never overwrite each other. The same
+        statement completes a running task once every result is done. Does
+        not commit.
+        
+        Args:
+            task_id: Task ID
+            completed: Change to completed_cases
+            passed: Change to passed_count
+            failed: Change to failed_count
+            errors: Change to error_count
+            
+        Returns:
+            Task status after the update, or None if the task does not exist
+        """
+        finishing = and_(
+            Task.status == TaskStatus.RUNNING,
+            Task.completed_cases + completed >= Task.total_cases,
+        )
+        row = self.db.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(
+                completed_cases=Task.completed_cases + completed,
+                passed_count=Task.passed_count + passed,
+                failed_count=Task.failed_count + failed,
+                error_count=Task.error_count + errors,
+                status=case((finishing, TaskStatus.COMPLETED), else_=Task.status),
+                end_time=case((finishing, datetime.utcnow()), else_=Task.end_time),
+            )
+            .returning(Task.status, Task.completed_cases, Task.total_cases)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            return None
+        
+        # Log only the update that crossed the finish line
+        crossed = row.completed_cases - completed < row.total_cases <= row.completed_cases
+        if row.status == TaskStatus.COMPLETED and crossed:
+            logger.info(f"Task {task_id} completed ({row.completed_cases} cases)")
+        return row.status
+    
+    def recount_task_progress(self, task_id: int) -> Optional[Task]:
         """
-        Update task progress based on completed results.
+        Recompute a task's progress counters from its results.
+        
+        Repair routine for counters that drifted (for example after a worker
+        died between updating a result and its task); normal progress goes
+        through adjust_progress().
         
         Args:
-            task_id: Task ID to update
+            task_id: Task ID
+            
+        Returns:
+            Updated task or None
         """
         task = self.db.query(Task).filter(Task.id == task_id).first()
         if not task:
-            return
-        
-        # Count results by status
-        results = self.db.query(TaskResult).filter(TaskResult.task_id == task_id).all()
-        
-        completed = 0
-        passed = 0
-        failed = 0
-        errors = 0
-        
-        for r in results:
-            if r.status in (ResultStatus.PASS, ResultStatus.FAIL, ResultStatus.ERROR):
-                completed += 1
-                if r.status == ResultStatus.PASS:
-                    passed += 1
-                elif r.status == ResultStatus.FAIL:
-                    failed += 1
-                elif r.status == ResultStatus.ERROR:
-                    errors += 1
-        
-        task.completed_cases = completed
-        task.passed_count = passed
-        task.failed_count = failed
-        task.error_count = errors
-        
-        # Check if task is complete
-        if completed >= task.total_cases:
+            return None
+        
+        counts = dict(
+            self.db.query(TaskResult.status, func.count(TaskResult.id))
+            .filter(TaskResult.task_id == task_id)
+            .group_by(TaskResult.status)
+            .all()
+        )
+        
+        task.passed_count = counts.get(ResultStatus.PASS, 0)
+        task.failed_count = counts.get(ResultStatus.FAIL, 0)
+        task.error_count = counts.get(ResultStatus.ERROR, 0)
+        task.completed_cases = task.passed_count + task.failed_count + task.error_count
+        
+        # Check if task is complete (a stopped task keeps its status)
+        if task.completed_cases >= task.total_cases and task.status == TaskStatus.RUNNING:
             task.status = TaskStatus.COMPLETED
             task.end_time = datetime.utcnow()
-            logger.info(f"Task {task_id} completed: passed={passed}, failed={failed}, errors={errors}")
+            logger.info(f"Task {task_id} completed: passed={task.passed_count}, failed={task.failed_count}, errors={task.error_count}")
         
         self.db.commit()
+        self.db.refresh(task)
+        return task
     
     def complete_task_with_error(self, task_id: int, error_message: str) -> Optional[Task]:
         """
@@ -207,6 +805,64 @@ class ExecutionService:
         logger.error(f"Task {task_id} failed: {error_message}")
         return task
     
+    def close_task(self, task_id: int) -> Optional[Task]:
+        """
+        Close a task once every dispatched chunk has finished.
+        
+        Results that are still pending or running at this point were never
+        executed (for example because a chunk message was lost) and are
+        marked as errors. Counters are then recomputed from all results.
+        
+        While a result still holds an unexpired lease, its chunk's worker may
+        have died mid-case: the task is left running, and the reaper requeues
+        the result and resumes the task once the lease expires.
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            Updated task or None
+        """
+        task = self.db.query(Task).filter(Task.id == task_id).first()
+        if not task:
+            return None
+        
+        if task.status == TaskStatus.RUNNING:
+            leased = (
+                self.db.query(func.count(TaskResult.id))
+                .filter(
+                    TaskResult.task_id == task_id,
+                    TaskResult.status == ResultStatus.RUNNING,
+                    TaskResult.lease_expires_at >= datetime.utcnow(),
+                )
+                .scalar()
+            )
+            if leased:
+                logger.warning(f"Task {task_id}: {leased} results still leased, leaving the task to the reaper")
+                return task
+            
+            orphaned = (
+                self.db.query(TaskResult)
+                .filter(
+                    TaskResult.task_id == task_id,
+                    TaskResult.status.in_([ResultStatus.PENDING, ResultStatus.RUNNING]),
+                )
+                .update(
+                    {
+                        "status": ResultStatus.ERROR,
+                        "end_time": datetime.utcnow(),
+                        "error_message": "Case was not executed",
+                        "error_reason": ErrorReason.NOT_EXECUTED,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            self.db.commit()
+            if orphaned:
+                logger.warning(f"Task {task_id}: {orphaned} results were not executed")
+        
+        return self.recount_task_progress(task_id)
+    
     def get_pending_results(self, task_id: int) -> list[TaskResult]:
         """
         Get all pending results for a task.
@@ -224,6 +880,28 @@ class ExecutionService:
             .all()
         )
     
+    def get_pending_results_by_ids(self, task_id: int, result_ids: list[int]) -> list[TaskResult]:
+        """
+        Get the subset of the given results that are still pending.
+        
+        Args:
+            task_id: Task ID
+            result_ids: TaskResult IDs to look up
+            
+        Returns:
+            List of pending TaskResult objects
+        """
+        return (
+            self.db.query(TaskResult)
+            .filter(
+                TaskResult.task_id == task_id,
+                TaskResult.id.in_(result_ids),
+                TaskResult.status == ResultStatus.PENDING,
+            )
+            .order_by(TaskResult.id)
+            .all()
+        )
+    
     def is_task_stopped(self, task_id: int) -> bool:
         """
         Check if a task has been stopped.
@@ -234,8 +912,24 @@ class ExecutionService:
         Returns:
             True if task is stopped
         """
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        return task is not None and task.status == TaskStatus.STOPPED
+        # Column query, so a Task already loaded in this session is not reused
+        status = self.db.query(Task.status).filter(Task.id == task_id).scalar()
+        return status == TaskStatus.STOPPED
+    
+    def get_control_state(self, task_id: int) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Read the columns operators change while a task runs.
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            Tuple of (status, parallelism); (None, None) if the task is gone
+        """
+        row = self.db.query(Task.status, Task.parallelism).filter(Task.id == task_id).first()
+        if row is None:
+            return None, None
+        return row.status, row.parallelism
     
     def get_task_stats(self, task_id: int) -> dict:
         """
@@ -288,28 +982,31 @@ class ExecutionService:
         Returns:
             Number of results queued for retry
         """
-        results = (
+        retry_count = (
             self.db.query(TaskResult)
             .filter(
                 TaskResult.task_id == task_id,
                 TaskResult.status == ResultStatus.ERROR,
                 TaskResult.retry_count < max_retries,
             )
-            .all()
+            .update(
+                {
+                    "retry_count": TaskResult.retry_count + 1,
+                    "status": ResultStatus.PENDING,
+                    **_RUN_FIELDS_CLEARED,
+                },
+                synchronize_session=False,
+            )
         )
         
-        retry_count = 0
-        for result in results:
-            self.retry_result(result.id)
-            retry_count += 1
-        
         # Reset task status if there are retries
         if retry_count > 0:
+            self.adjust_progress(task_id, completed=-retry_count, errors=-retry_count)
             task = self.db.query(Task).filter(Task.id == task_id).first()
             if task and task.status in (TaskStatus.COMPLETED, TaskStatus.ERROR):
                 task.status = TaskStatus.PENDING
                 task.end_time = None
-                self.db.commit()
+        self.db.commit()
         
         logger.info(f"Task {task_id}: {retry_count} results queued for retry")
         return retry_count
@@ -331,10 +1028,8 @@ class ExecutionService:
             .update(
                 {
                     "status": ResultStatus.PENDING,
-                    "start_time": None,
-                    "end_time": None,
-                    "error_message": None,
                     "log_path": None,
+                    **_RUN_FIELDS_CLEARED,
                 },
                 synchronize_session=False,
             )
@@ -370,14 +1065,14 @@ class ExecutionService:
         if not task:
             return None
         
-        if task.status not in (TaskStatus.PENDING, TaskStatus.RUNNING):
+        if task.status not in (TaskStatus.QUEUED, TaskStatus.PENDING, TaskStatus.RUNNING):
             return task
         
         task.status = TaskStatus.STOPPED
         task.end_time = datetime.utcnow()
         
         # Mark all pending/running results as cancelled
-        self.db.query(TaskResult).filter(
+        cancelled = self.db.query(TaskResult).filter(
             TaskResult.task_id == task_id,
             TaskResult.status.in_([ResultStatus.PENDING, ResultStatus.RUNNING]),
         ).update(
@@ -385,11 +1080,11 @@ class ExecutionService:
             synchronize_session=False,
         )
         
+        # Update final counts
+        self.adjust_progress(task_id, completed=cancelled, errors=cancelled)
+        
         self.db.commit()
         self.db.refresh(task)
         
-        # Update final counts
-        self._update_task_progress(task_id)
-        
         logger.info(f"Task {task_id} stopped")
         return task
@@ -0,0 +1,246 @@
+"""
+Write-behind buffer for result updates.
+
+With PROGRESS_WRITE_MODE=buffered, schedulers write finished results to a
+Redis hash per task instead of committing each one. A flusher thread in every
+worker process moves them to task_results and tasks in batched updates every
+PROGRESS_FLUSH_INTERVAL_MS, and API reads add the buffered results to the
+stored counters so live progress is never behind.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+from app.services.execution_service import ExecutionService, ResultStatus
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "autosecdet:progress"
+DIRTY_KEY = f"{KEY_PREFIX}:dirty"
+
+# KEYS[1] = task results hash, KEYS[2] = dirty set; ARGV[1] = task ID
+# Takes every buffered result of a task in one step, so concurrent flushers
+# never apply the same result twice
+TAKE_SCRIPT = """
+local results = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], ARGV[1])
+return results
+"""
+
+_COUNTER_FIELDS = {
+    ResultStatus.PASS: "passed_count",
+    ResultStatus.FAIL: "failed_count",
+    ResultStatus.ERROR: "error_count",
+}
+
+
+def is_buffered() -> bool:
+    """Whether result updates go through the write-behind buffer."""
+    return settings.PROGRESS_WRITE_MODE == "buffered"
+
+
+class ProgressBuffer:
+    """Redis side of the write-behind buffer."""
+    
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.client = client or redis_client
+        self._take = self.client.register_script(TAKE_SCRIPT)
+    
+    def complete_result(
+        self,
+        task_id: int,
+        result_id: int,
+        status: str,
+        error_message: Optional[str] = None,
+        log_path: Optional[str] = None,
+        error_reason: Optional[str] = None,
+        peak_memory_kb: Optional[int] = None,
+        cpu_seconds: Optional[float] = None,
+        duration_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Buffer the final state of a result.
+        
+        Returns:
+            False if Redis is unavailable; the caller should then write the
+            result directly
+        """
+        outcome = json.dumps({
+            "status": status,
+            "end_time": datetime.utcnow().isoformat(),
+            "error_message": error_message,
+            "log_path": log_path,
+            "error_reason": error_reason,
+            "peak_memory_kb": peak_memory_kb,
+            "cpu_seconds": cpu_seconds,
+            "duration_seconds": duration_seconds,
+        })
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.hset(self._results_key(task_id), result_id, outcome)
+                pipe.sadd(DIRTY_KEY, task_id)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Progress buffer unavailable, writing result {result_id} directly: {e}")
+            return False
+        return True
+    
+    def pending_results(self, task_id: int) -> Dict[int, Dict[str, Any]]:
+        """Buffered results of a task that have not been flushed yet, by result ID."""
+        try:
+            raw = self.client.hgetall(self._results_key(task_id))
+        except redis.RedisError as e:
+            logger.warning(f"Progress buffer unavailable: {e}")
+            return {}
+        return {int(result_id): json.loads(outcome) for result_id, outcome in raw.items()}
+    
+    def pending_counts(self, task_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """
+        Counter increments not yet flushed for each task.
+        
+        Buffered results were running when they finished, so each adds one
+        completed case and one to the counter of its status.
+        
+        Returns:
+            {task_id: {"completed_cases": n, "passed_count": n, ...}} for tasks with buffered results
+        """
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        try:
+            with self.client.pipeline(transaction=False) as pipe:
+                for task_id in task_ids:
+                    pipe.hvals(self._results_key(task_id))
+                values = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Progress buffer unavailable: {e}")
+            return {}
+        
+        counts = {}
+        for task_id, outcomes in zip(task_ids, values):
+            if not outcomes:
+                continue
+            task_counts = {"completed_cases": 0, "passed_count": 0, "failed_count": 0, "error_count": 0}
+            for outcome in outcomes:
+                field = _COUNTER_FIELDS.get(json.loads(outcome)["status"])
+                if field:
+                    task_counts["completed_cases"] += 1
+                    task_counts[field] += 1
+            counts[task_id] = task_counts
+        return counts
+    
+    def flush_task(self, db: Session, task_id: int) -> int:
+        """
+        Write a task's buffered results to the database.
+        
+        Results are put back into the buffer if the database write fails.
+        
+        Returns:
+            Number of results written
+        """
+        raw = self._take(keys=[self._results_key(task_id), DIRTY_KEY], args=[task_id])
+        if not raw:
+            return 0
+        # HGETALL comes back from Lua as a flat [field, value, ...] list
+        taken = dict(zip(raw[::2], raw[1::2]))
+        
+        outcomes = {}
+        for result_id, outcome in taken.items():
+            outcome = json.loads(outcome)
+            outcome["end_time"] = datetime.fromisoformat(outcome["end_time"])
+            outcomes[int(result_id)] = outcome
+        
+        try:
+            return ExecutionService(db).complete_results(task_id, outcomes)
+        except Exception:
+            db.rollback()
+            self._restore(task_id, taken)
+            raise
+    
+    def flush_all(self, db: Session) -> int:
+        """
+        Flush every task with buffered results.
+        
+        Returns:
+            Number of results written
+        """
+        flushed = 0
+        for task_id in self.client.smembers(DIRTY_KEY):
+            try:
+                flushed += self.flush_task(db, int(task_id))
+            except Exception as e:
+                logger.exception(f"Failed to flush buffered results of task {task_id}: {e}")
+        return flushed
+    
+    def _restore(self, task_id: int, taken: Dict[str, str]) -> None:
+        """Put results taken by flush_task() back, without overwriting newer ones."""
+        try:
+            with self.client.pipeline() as pipe:
+                for result_id, outcome in taken.items():
+                    pipe.hsetnx(self._results_key(task_id), result_id, outcome)
+                pipe.sadd(DIRTY_KEY, task_id)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Lost {len(taken)} buffered results of task {task_id}: {e}")
+    
+    def _results_key(self, task_id: int) -> str:
+        """Hash of buffered results for a task, keyed by result ID."""
+        return f"{KEY_PREFIX}:{task_id}:results"
+
+
+class ProgressFlusher:
+    """
+    Flushes the buffer from a daemon thread every PROGRESS_FLUSH_INTERVAL_MS.
+    
+    Started lazily by the scheduler, once per worker process.
+    """
+    
+    def __init__(self, buffer: Optional[ProgressBuffer] = None):
+        self._buffer = buffer
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+    
+    @property
+    def buffer(self) -> ProgressBuffer:
+        """Buffer to flush, created on first use."""
+        if self._buffer is None:
+            self._buffer = ProgressBuffer()
+        return self._buffer
+    
+    def ensure_started(self) -> None:
+        """Start the flusher thread if it is not running in this process."""
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        """Flush forever; errors are logged and retried on the next interval."""
+        interval = settings.PROGRESS_FLUSH_INTERVAL_MS / 1000
+        while True:
+            time.sleep(interval)
+            db = SessionLocal()
+            try:
+                self.buffer.flush_all(db)
+            except redis.RedisError as e:
+                logger.warning(f"Progress flusher cannot reach Redis: {e}")
+            finally:
+                db.close()
+
+
+progress_flusher = ProgressFlusher()
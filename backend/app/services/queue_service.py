@@ -0,0 +1,262 @@
+"""
+Admission control and fair-share ordering of tasks waiting to run.
+
+Starting a task puts it in the 'queued' state. The dispatcher admits queued
+tasks (status 'pending', execute_task sent) while fewer than
+TASK_MAX_RUNNING_TASKS tasks are admitted and their parallelism adds up to
+at most TASK_MAX_RUNNING_CASES. It runs whenever a task is queued or
+finishes, and periodically from Celery beat in case such a call was lost.
+
+Every task has a priority from 0 to 9 (higher runs first). A user's waiting
+tasks are penalised by one step for each task of theirs that is already
+running or queued ahead of it, so one user submitting many scans cannot
+starve another user's single check: their first task competes at full
+priority, the next ones interleave with everybody else's.
+
+The resulting effective priority decides the admission order, and becomes
+the Celery message priority of the task's execute_task and execute_chunk
+messages.
+
+Fair share therefore works at admission, and per chunk for distributed
+tasks. Once admitted, a task in single dispatch mode runs all of its cases
+in one scheduler, so the cases of single-mode tasks from different users
+are not interleaved with each other; TASK_MAX_RUNNING_TASKS bounds how many
+such tasks share the workers at once.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import redis_client
+from app.engine.scheduler import resolve_parallelism
+from app.models.task import Task
+from app.services.execution_service import TaskStatus
+
+logger = get_logger(__name__)
+
+MIN_PRIORITY = 0
+MAX_PRIORITY = 9
+
+# Statuses that hold an admission slot: admitted but not started, and running
+ADMITTED_STATUSES = (TaskStatus.PENDING, TaskStatus.RUNNING)
+
+# Serialises admission across API processes and workers
+ADMISSION_LOCK = "autosecdet:admission:lock"
+
+# Finished tasks used to estimate how long a task occupies a slot
+DURATION_SAMPLE_SIZE = 50
+
+
+def effective_priority(priority: Optional[int], user_load: int) -> int:
+    """
+    Priority of a task after the fair-share penalty.
+    
+    Args:
+        priority: Task.priority, or None for TASK_DEFAULT_PRIORITY
+        user_load: Tasks of the same user running or queued ahead of it
+    """
+    if priority is None:
+        priority = settings.TASK_DEFAULT_PRIORITY
+    return max(MIN_PRIORITY, min(priority, MAX_PRIORITY) - user_load)
+
+
+class QueueService:
+    """Service for task queue ordering and estimates."""
+    
+    def __init__(self, db: Session, client: Optional[redis.Redis] = None):
+        self.db = db
+        self.client = client or redis_client
+    
+    def message_priority(self, task: Task) -> int:
+        """
+        Celery message priority for a task's messages.
+        
+        The Redis broker delivers lower numbers first, so the effective
+        priority is inverted.
+        """
+        user_load = (
+            self.db.query(func.count(Task.id))
+            .filter(
+                Task.user_id == task.user_id,
+                Task.id != task.id,
+                or_(
+                    Task.status.in_(ADMITTED_STATUSES),
+                    (Task.status == TaskStatus.QUEUED) & (Task.id < task.id),
+                ),
+            )
+            .scalar()
+        )
+        return MAX_PRIORITY - effective_priority(task.priority, user_load)
+    
+    def waiting_tasks(self) -> List[Task]:
+        """
+        Queued tasks in the order they should be admitted.
+        
+        Returns:
+            Tasks by decreasing effective priority, oldest first among equals
+        """
+        running = dict(
+            self.db.query(Task.user_id, func.count(Task.id))
+            .filter(Task.status.in_(ADMITTED_STATUSES))
+            .group_by(Task.user_id)
+            .all()
+        )
+        waiting = self.db.query(Task).filter(Task.status == TaskStatus.QUEUED).order_by(Task.id).all()
+        
+        queued_ahead: Dict[int, int] = defaultdict(int)
+        keyed = []
+        for task in waiting:
+            user_load = running.get(task.user_id, 0) + queued_ahead[task.user_id]
+            queued_ahead[task.user_id] += 1
+            keyed.append((-effective_priority(task.priority, user_load), task.id, task))
+        return [task for _, _, task in sorted(keyed, key=lambda k: k[:2])]
+    
+    def queue_positions(self) -> Dict[int, Tuple[int, Optional[datetime]]]:
+        """
+        Queue position and estimated start time of every queued task.
+        
+        Start times assume TASK_MAX_RUNNING_TASKS tasks run at once and that
+        each takes as long as recently finished tasks did on average; they
+        are None until some task has finished.
+        
+        Returns:
+            {task_id: (1-based position, estimated start time)}
+        """
+        waiting = self.waiting_tasks()
+        if not waiting:
+            return {}
+        
+        admitted = self.db.query(func.count(Task.id)).filter(Task.status.in_(ADMITTED_STATUSES)).scalar()
+        average = self._average_task_seconds()
+        slots = settings.TASK_MAX_RUNNING_TASKS or (admitted + len(waiting))
+        now = datetime.utcnow()
+        
+        positions = {}
+        for position, task in enumerate(waiting, start=1):
+            rounds = (admitted + position - 1) // slots
+            if rounds == 0:
+                estimate = now
+            elif average is not None:
+                estimate = now + timedelta(seconds=rounds * average)
+            else:
+                estimate = None
+            positions[task.id] = (position, estimate)
+        return positions
+    
+    def enqueue(self, task: Task) -> Task:
+        """Put a task in the queue; admit() starts it when there is capacity."""
+        task.status = TaskStatus.QUEUED
+        self.db.commit()
+        self.db.refresh(task)
+        return task
+    
+    def is_full(self) -> bool:
+        """Whether TASK_MAX_QUEUED_TASKS tasks are already waiting."""
+        if not settings.TASK_MAX_QUEUED_TASKS:
+            return False
+        queued = self.db.query(func.count(Task.id)).filter(Task.status == TaskStatus.QUEUED).scalar()
+        return queued >= settings.TASK_MAX_QUEUED_TASKS
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Current load against the admission limits.
+        
+        Returns:
+            Dict with running and queued counts and the configured limits
+        """
+        admitted = self.db.query(Task.parallelism).filter(Task.status.in_(ADMITTED_STATUSES)).all()
+        queued = self.db.query(func.count(Task.id)).filter(Task.status == TaskStatus.QUEUED).scalar()
+        return {
+            "running_tasks": len(admitted),
+            "running_cases": sum(resolve_parallelism(p) for p, in admitted),
+            "queued_tasks": queued,
+            "max_running_tasks": settings.TASK_MAX_RUNNING_TASKS,
+            "max_running_cases": settings.TASK_MAX_RUNNING_CASES,
+            "max_queued_tasks": settings.TASK_MAX_QUEUED_TASKS,
+        }
+    
+    def admit(self) -> List[Task]:
+        """
+        Admit queued tasks, in fair-share order, while there is capacity.
+        
+        Admission stops at the first task that does not fit, so a large task
+        is not overtaken indefinitely by smaller ones. A task larger than
+        TASK_MAX_RUNNING_CASES is admitted once nothing else is running.
+        Each task is moved from queued to pending with a conditional UPDATE,
+        so it is admitted only once even if the lock is unavailable.
+        
+        Returns:
+            Admitted tasks (now pending); the caller sends their execute_task
+        """
+        lock = self.client.lock(ADMISSION_LOCK, timeout=30, blocking_timeout=5)
+        try:
+            if not lock.acquire():
+                # Another process is admitting right now
+                return []
+        except redis.RedisError as e:
+            logger.warning(f"Admission lock unavailable, admitting without it: {e}")
+            lock = None
+        
+        try:
+            return self._admit()
+        finally:
+            if lock is not None:
+                try:
+                    lock.release()
+                except redis.RedisError as e:
+                    logger.warning(f"Failed to release admission lock: {e}")
+    
+    def _admit(self) -> List[Task]:
+        """admit() without the lock."""
+        max_tasks = settings.TASK_MAX_RUNNING_TASKS
+        max_cases = settings.TASK_MAX_RUNNING_CASES
+        stats = self.get_stats()
+        running_tasks, running_cases = stats["running_tasks"], stats["running_cases"]
+        
+        admitted = []
+        for task in self.waiting_tasks():
+            cases = resolve_parallelism(task.parallelism)
+            if max_tasks and running_tasks >= max_tasks:
+                break
+            if max_cases and running_cases and running_cases + cases > max_cases:
+                break
+            
+            claimed = (
+                self.db.query(Task)
+                .filter(Task.id == task.id, Task.status == TaskStatus.QUEUED)
+                .update({"status": TaskStatus.PENDING}, synchronize_session=False)
+            )
+            self.db.commit()
+            if not claimed:
+                continue
+            running_tasks += 1
+            running_cases += cases
+            admitted.append(task)
+        
+        if admitted:
+            logger.info(f"Admitted tasks {[t.id for t in admitted]} ({running_tasks} running, {running_cases} cases)")
+        return admitted
+    
+    def _average_task_seconds(self) -> Optional[float]:
+        """Average run time of the most recently finished tasks."""
+        rows = (
+            self.db.query(Task.start_time, Task.end_time)
+            .filter(
+                Task.status.in_(("completed", "stopped", "error")),
+                Task.start_time.isnot(None),
+                Task.end_time.isnot(None),
+            )
+            .order_by(Task.end_time.desc())
+            .limit(DURATION_SAMPLE_SIZE)
+            .all()
+        )
+        durations = [(end - start).total_seconds() for start, end in rows if end >= start]
+        if not durations:
+            return None
+        return sum(durations) / len(durations)
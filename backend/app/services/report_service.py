@@ -54,6 +54,7 @@ class ReportService:
         
         result_details = []
         categories_summary = {}
+        targets_summary = {}
         
         for r in results:
             case = self.db.query(Case).filter(Case.id == r.case_id).first()
@@ -79,8 +80,26 @@ class ReportService:
             else:
                 categories_summary[category_name]["error"] += 1
             
+            # Update target summary
+            target_ip = r.target_ip or task.target_ip
+            if target_ip not in targets_summary:
+                targets_summary[target_ip] = {
+                    "total": 0,
+                    "passed": 0,
+                    "failed": 0,
+                    "error": 0,
+                }
+            targets_summary[target_ip]["total"] += 1
+            if r.status == "pass":
+                targets_summary[target_ip]["passed"] += 1
+            elif r.status == "fail":
+                targets_summary[target_ip]["failed"] += 1
+            else:
+                targets_summary[target_ip]["error"] += 1
+            
             result_details.append({
                 "id": r.id,
+                "target_ip": target_ip,
                 "case_id": r.case_id,
                 "case_name": case.name if case else "Unknown",
                 "category": category_name,
@@ -92,6 +111,10 @@ class ReportService:
                 "start_time": r.start_time.isoformat() if r.start_time else None,
                 "end_time": r.end_time.isoformat() if r.end_time else None,
                 "error_message": r.error_message,
+                "error_reason": r.error_reason,
+                "peak_memory_kb": r.peak_memory_kb,
+                "cpu_seconds": r.cpu_seconds,
+                "reused_from_id": r.reused_from_id,
             })
         
         # Calculate pass rate
@@ -101,6 +124,7 @@ class ReportService:
             "task": {
                 "id": task.id,
                 "target_ip": task.target_ip,
+                "target_count": task.target_count,
                 "description": task.description,
                 "status": task.status,
                 "total_cases": task.total_cases,
@@ -118,6 +142,7 @@ class ReportService:
                 "username": user.username if user else "Unknown",
             },
             "categories_summary": categories_summary,
+            "targets_summary": targets_summary,
             "results": result_details,
             "generated_at": datetime.utcnow().isoformat(),
         }
@@ -175,7 +200,9 @@ class ReportService:
         task = data["task"]
         user = data["user"]
         categories = data["categories_summary"]
+        targets = data["targets_summary"]
         results = data["results"]
+        multi_target = len(targets) > 1
         
         # Status color mapping
         status_colors = {
@@ -189,8 +216,10 @@ class ReportService:
         results_rows = ""
         for r in results:
             status_color = status_colors.get(r["status"], "#6c757d")
+            target_cell = f"<td>{r['target_ip']}</td>" if multi_target else ""
             results_rows += f"""
             <tr>
+                {target_cell}
                 <td>{r['case_name']}</td>
                 <td>{r['category']}</td>
                 <td><span class="risk-{r['risk_level']}">{r['risk_level'].upper()}</span></td>
@@ -212,6 +241,38 @@ class ReportService:
             </tr>
             """
         
+        # Build target summary section (multi-target tasks only)
+        target_section = ""
+        if multi_target:
+            target_rows = ""
+            for target_ip, stats in targets.items():
+                target_rows += f"""
+            <tr>
+                <td>{target_ip}</td>
+                <td>{stats['total']}</td>
+                <td style="color: #28a745;">{stats['passed']}</td>
+                <td style="color: #dc3545;">{stats['failed']}</td>
+                <td style="color: #ffc107;">{stats['error']}</td>
+            </tr>
+            """
+            target_section = f"""
+        <h2>🎯 目标统计</h2>
+        <table>
+            <thead>
+                <tr>
+                    <th>目标 IP</th>
+                    <th>总数</th>
+                    <th>通过</th>
+                    <th>失败</th>
+                    <th>错误</th>
+                </tr>
+            </thead>
+            <tbody>
+                {target_rows}
+            </tbody>
+        </table>
+        """
+        
         html = f"""
 <!DOCTYPE html>
 <html lang="zh-CN">
@@ -267,6 +328,8 @@ class ReportService:
             </div>
         </div>
         
+        {target_section}
+        
         <h2>📊 分类统计</h2>
         <table>
             <thead>
@@ -287,6 +350,7 @@ class ReportService:
         <table>
             <thead>
                 <tr>
+                    {'<th>目标 IP</th>' if multi_target else ''}
                     <th>用例名称</th>
                     <th>分类</th>
                     <th>风险等级</th>
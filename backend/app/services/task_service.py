@@ -4,13 +4,17 @@ Task service for detection task management.
 from datetime import datetime
 from typing import Optional, List
 
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.engine.task_control import ControlAction, publish_control
 from app.models.task import Task
 from app.models.task_result import TaskResult
 from app.models.case import Case
 from app.models.user import User
 from app.schemas.task import TaskCreate, TaskFilter
+from app.services.execution_service import ExecutionService
 
 
 class TaskService:
@@ -36,7 +40,12 @@ class TaskService:
             if filters.status is not None:
                 query = query.filter(Task.status == filters.status)
             if filters.target_ip is not None:
-                query = query.filter(Task.target_ip == filters.target_ip)
+                query = query.filter(
+                    or_(
+                        Task.target_ip == filters.target_ip,
+                        Task.results.any(TaskResult.target_ip == filters.target_ip),
+                    )
+                )
             if filters.user_id is not None:
                 query = query.filter(Task.user_id == filters.user_id)
         
@@ -50,7 +59,12 @@ class TaskService:
             if filters.status is not None:
                 query = query.filter(Task.status == filters.status)
             if filters.target_ip is not None:
-                query = query.filter(Task.target_ip == filters.target_ip)
+                query = query.filter(
+                    or_(
+                        Task.target_ip == filters.target_ip,
+                        Task.results.any(TaskResult.target_ip == filters.target_ip),
+                    )
+                )
             if filters.user_id is not None:
                 query = query.filter(Task.user_id == filters.user_id)
         
@@ -58,7 +72,7 @@ class TaskService:
     
     def create(self, task_data: TaskCreate, user_id: int, case_ids: Optional[List[int]] = None) -> Task:
         """
-        Create a new task with task results for each case.
+        Create a new task with task results for each case on each target.
         
         Args:
             task_data: Task creation data
@@ -83,30 +97,45 @@ class TaskService:
                 .all()
             )
         
+        targets = task_data.expand_targets()
+        
         # Create task
         task = Task(
-            target_ip=task_data.target_ip,
+            target_ip=task_data.target_label(),
+            target_count=len(targets),
             description=task_data.description,
             user_id=user_id,
             status="pending",
-            total_cases=len(cases),
+            total_cases=len(cases) * len(targets),
             completed_cases=0,
             passed_count=0,
             failed_count=0,
             error_count=0,
+            parallelism=task_data.parallelism,
+            dispatch_mode=task_data.dispatch_mode,
+            target_max_concurrency=task_data.target_max_concurrency,
+            target_launch_rate=task_data.target_launch_rate,
+            priority=settings.TASK_DEFAULT_PRIORITY if task_data.priority is None else task_data.priority,
+            discovery=task_data.discovery,
+            reuse_results=task_data.reuse_results,
         )
         self.db.add(task)
         self.db.flush()  # Get task ID
         
-        # Create task results for each case
-        for case in cases:
-            task_result = TaskResult(
-                task_id=task.id,
-                case_id=case.id,
-                status="pending",
-                retry_count=0,
-            )
-            self.db.add(task_result)
+        # Create task results for each (target, case) pair in one bulk insert
+        rows = [
+            {
+                "task_id": task.id,
+                "case_id": case.id,
+                "target_ip": target_ip,
+                "status": "pending",
+                "retry_count": 0,
+            }
+            for target_ip in targets
+            for case in cases
+        ]
+        if rows:
+            self.db.execute(insert(TaskResult), rows)
         
         self.db.commit()
         self.db.refresh(task)
@@ -133,21 +162,67 @@ class TaskService:
         return task
     
     def stop_task(self, task: Task) -> Task:
-        """Stop a running task."""
-        if task.status not in ("pending", "running"):
+        """Stop a running task and kill its running scripts on every worker."""
+        if task.status not in ("queued", "pending", "running", "paused"):
             return task
         
         task.status = "stopped"
         task.end_time = datetime.utcnow()
         
         # Mark pending results as stopped
-        self.db.query(TaskResult).filter(
+        cancelled = self.db.query(TaskResult).filter(
             TaskResult.task_id == task.id,
             TaskResult.status == "pending",
         ).update({"status": "error", "error_message": "Task stopped by user"})
+        ExecutionService(self.db).adjust_progress(task.id, completed=cancelled, errors=cancelled)
         
         self.db.commit()
         self.db.refresh(task)
+        
+        publish_control(task.id, ControlAction.STOP)
+        return task
+    
+    def pause_task(self, task: Task) -> Task:
+        """
+        Pause a task: no new cases are launched, running cases finish normally.
+        
+        Pending results stay pending, so resume_task() continues where the
+        task left off.
+        """
+        if task.status not in ("queued", "pending", "running"):
+            return task
+        
+        task.status = "paused"
+        self.db.commit()
+        self.db.refresh(task)
+        
+        publish_control(task.id, ControlAction.PAUSE)
+        return task
+    
+    def resume_task(self, task: Task) -> Task:
+        """
+        Resume a paused task.
+        
+        The task goes back to the queue; the caller admits it with
+        queue_task() to run its remaining results.
+        """
+        if task.status != "paused":
+            return task
+        
+        task.status = "queued"
+        self.db.commit()
+        self.db.refresh(task)
+        
+        publish_control(task.id, ControlAction.RESUME)
+        return task
+    
+    def set_parallelism(self, task: Task, parallelism: int) -> Task:
+        """Change how many cases a task runs at once, including while it runs."""
+        task.parallelism = parallelism
+        self.db.commit()
+        self.db.refresh(task)
+        
+        publish_control(task.id, ControlAction.PARALLELISM, parallelism)
         return task
     
     def get_username(self, user_id: int) -> Optional[str]:
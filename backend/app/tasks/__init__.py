@@ -4,12 +4,27 @@ from app.tasks.cleanup import (
     cleanup_expired_tasks,
     archive_audit_logs,
 )
-from app.tasks.executor import execute_task, test_celery
+from app.tasks.executor import (
+    execute_task,
+    execute_chunk,
+    finalize_task,
+    dispatch_queued_tasks,
+    reap_stale_tasks,
+    queue_task,
+    admit_queued_tasks,
+    test_celery,
+)
 
 __all__ = [
     "cleanup_expired_logs",
     "cleanup_expired_tasks",
     "archive_audit_logs",
     "execute_task",
+    "execute_chunk",
+    "finalize_task",
+    "dispatch_queued_tasks",
+    "reap_stale_tasks",
+    "queue_task",
+    "admit_queued_tasks",
     "test_celery",
 ]
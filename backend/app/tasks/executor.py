@@ -1,12 +1,21 @@
 """
 Task execution module for running security detection tasks.
 """
+from datetime import datetime, timedelta
+
+from celery import chord
+from sqlalchemy.orm import Session
+
 from app.core.celery import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.logging import get_logger
-from app.engine.executor import ScriptExecutor
-from app.services.execution_service import ExecutionService, TaskStatus, ResultStatus
-from app.models.case import Case
+from app.engine.executor import ErrorReason
+from app.engine.preflight import unreachable_targets
+from app.engine.scheduler import TaskScheduler, order_results
+from app.models.task import Task
+from app.services.execution_service import ExecutionService, TaskStatus
+from app.services.queue_service import QueueService
 
 logger = get_logger(__name__)
 
@@ -27,55 +36,44 @@ def execute_task(self, task_id: int):
     db = SessionLocal()
     try:
         execution_service = ExecutionService(db)
-        script_executor = ScriptExecutor()
         
         # Start task
-        task = execution_service.start_task(task_id)
+        task, started = execution_service.start_task(task_id)
         if not task:
             logger.error(f"Task {task_id} not found")
             return {"task_id": task_id, "status": "error", "message": "Task not found"}
         
-        # Get pending results
+        # A redelivered message while a live scheduler runs the task; a dead
+        # one is taken over by start_task() or by the reaper's requeue
+        if not started and task.status == TaskStatus.RUNNING:
+            logger.warning(f"Task {task_id} is already running with a live heartbeat, ignoring redelivery")
+            return {"task_id": task_id, "status": task.status}
+        
+        # Paused or stopped before a worker picked it up
+        if task.status != TaskStatus.RUNNING:
+            logger.info(f"Task {task_id} is {task.status}, not executing")
+            return {"task_id": task_id, "status": task.status}
+        
+        # Get pending results, without those of targets that are down
         pending_results = execution_service.get_pending_results(task_id)
+        pending_results = _preflight(execution_service, task, pending_results)
         logger.info(f"Task {task_id}: {len(pending_results)} cases to execute")
         
-        for result in pending_results:
-            # Check if task was stopped
-            if execution_service.is_task_stopped(task_id):
-                logger.info(f"Task {task_id} was stopped, aborting execution")
-                break
-            
-            # Get case info
-            case = db.query(Case).filter(Case.id == result.case_id).first()
-            if not case:
-                execution_service.complete_result(
-                    result.id,
-                    ResultStatus.ERROR,
-                    error_message="Case not found",
-                )
-                continue
-            
-            # Mark result as running
-            execution_service.start_result(result.id)
-            
-            # Execute script
-            logger.info(f"Task {task_id}: Executing case {case.id} - {case.name}")
-            status, error_message, log_path = script_executor.execute(
-                script_path=case.script_path,
-                target_ip=task.target_ip,
-                task_id=task_id,
-                result_id=result.id,
-            )
-            
-            # Update result
-            execution_service.complete_result(
-                result.id,
-                status,
-                error_message=error_message,
-                log_path=log_path,
-            )
-            
-            logger.info(f"Task {task_id}: Case {case.id} completed with status: {status}")
+        # Fan out to the whole worker fleet
+        if is_distributed(task):
+            # Longest cases go into the first chunks
+            chunks = _chunk_result_ids(order_results(db, pending_results))
+            _dispatch_chunks(task_id, chunks, QueueService(db).message_priority(task))
+            logger.info(f"Task {task_id}: dispatched {len(chunks)} chunks")
+            return {"task_id": task_id, "status": "dispatched", "chunks": len(chunks)}
+        
+        # Run cases with the task's parallelism. With nothing left to run
+        # (the last cases finished while the task was paused) no result
+        # completes the task, so close it here
+        if pending_results:
+            TaskScheduler(db, task).run(pending_results)
+        else:
+            execution_service.close_task(task_id)
         
         # Get final stats
         stats = execution_service.get_task_stats(task_id)
@@ -97,9 +95,251 @@ def execute_task(self, task_id: int):
             pass
         return {"task_id": task_id, "status": "error", "message": str(e)}
     finally:
+        # A finished task frees an admission slot
+        _admit_quietly(db)
+        db.close()
+
+
+@celery_app.task(name="app.tasks.executor.execute_chunk", bind=True)
+def execute_chunk(self, task_id: int, result_ids: list[int]):
+    """
+    Execute one chunk of a distributed task.
+    
+    Never raises, so a failing chunk cannot prevent the chord callback
+    from closing the task.
+    
+    Args:
+        task_id: The ID of the task the chunk belongs to
+        result_ids: TaskResult IDs in this chunk
+        
+    Returns:
+        dict: Chunk execution summary
+    """
+    db = SessionLocal()
+    try:
+        execution_service = ExecutionService(db)
+        
+        task = execution_service.get_task(task_id)
+        if not task:
+            return {"task_id": task_id, "status": "error", "message": "Task not found"}
+        
+        pending_results = execution_service.get_pending_results_by_ids(task_id, result_ids)
+        executed = TaskScheduler(db, task).run(pending_results)
+        
+        return {"task_id": task_id, "status": "ok", "executed": executed}
+        
+    except Exception as e:
+        logger.exception(f"Task {task_id} chunk execution failed: {e}")
+        return {"task_id": task_id, "status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.tasks.executor.finalize_task")
+def finalize_task(chunk_summaries: list[dict], task_id: int):
+    """
+    Close a distributed task after all of its chunks have run.
+    
+    Args:
+        chunk_summaries: Return values of the execute_chunk calls
+        task_id: The ID of the task to close
+        
+    Returns:
+        dict: Execution result summary
+    """
+    db = SessionLocal()
+    try:
+        execution_service = ExecutionService(db)
+        
+        # Results of lost chunks or released by the reaper: run them again
+        if execution_service.has_pending_results(task_id) and execution_service.requeue_task(task_id):
+            logger.warning(f"Task {task_id}: results still pending after all chunks ran, resuming the task")
+            return {"task_id": task_id, "status": TaskStatus.QUEUED}
+        
+        execution_service.close_task(task_id)
+        
+        stats = execution_service.get_task_stats(task_id)
+        logger.info(f"Task {task_id} execution completed ({len(chunk_summaries)} chunks): {stats}")
+        
+        return {
+            "task_id": task_id,
+            "status": stats.get("status", "completed"),
+            "passed": stats.get("passed_count", 0),
+            "failed": stats.get("failed_count", 0),
+            "errors": stats.get("error_count", 0),
+        }
+    finally:
+        _admit_quietly(db)
         db.close()
 
 
+@celery_app.task(name="app.tasks.executor.dispatch_queued_tasks")
+def dispatch_queued_tasks():
+    """
+    Admit queued tasks that fit within the running limits.
+    
+    Scheduled by beat as a fallback; tasks are normally admitted as soon as
+    they are queued or another task finishes.
+    
+    Returns:
+        dict: Number of tasks admitted
+    """
+    db = SessionLocal()
+    try:
+        return {"admitted": admit_queued_tasks(db)}
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.tasks.executor.reap_stale_tasks")
+def reap_stale_tasks():
+    """
+    Recover tasks whose worker died while running them.
+    
+    Running results whose lease expired go back to pending, and running
+    tasks without a heartbeat for TASK_RESULT_LEASE_SECONDS are queued again
+    so that they resume from their pending results on another worker. A
+    stale task with nothing left to run only has its counters recomputed,
+    which completes it.
+    
+    A distributed task is only resumed when some of its leases expired: its
+    chunks may simply still be waiting for a worker.
+    
+    Returns:
+        dict: Numbers of results released and tasks resumed or closed
+    """
+    db = SessionLocal()
+    try:
+        execution_service = ExecutionService(db)
+        released = execution_service.release_expired_results()
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.TASK_RESULT_LEASE_SECONDS)
+        
+        resumed, closed = [], []
+        for task in execution_service.get_stale_tasks():
+            if task.id not in released and is_distributed(task):
+                continue
+            if execution_service.has_pending_results(task.id):
+                if execution_service.requeue_task(task.id, stale_before=stale_before):
+                    resumed.append(task.id)
+            else:
+                execution_service.recount_task_progress(task.id)
+                closed.append(task.id)
+        
+        if resumed:
+            logger.warning(f"Resuming tasks {resumed} after their worker was lost")
+            admit_queued_tasks(db)
+        return {"released": sum(released.values()), "resumed": len(resumed), "closed": len(closed)}
+    finally:
+        db.close()
+
+
+def is_distributed(task: Task) -> bool:
+    """
+    Whether a task's cases are spread over the worker fleet in chunks.
+    
+    Multi-target tasks always fan out so that different targets are
+    scanned in parallel.
+    """
+    dispatch_mode = task.dispatch_mode or settings.TASK_DISPATCH_MODE
+    return dispatch_mode == "distributed" or task.target_count > 1
+
+
+def _preflight(execution_service: ExecutionService, task: Task, results: list) -> list:
+    """
+    Probe the task's targets and fail every pending result of the unreachable ones.
+    
+    Returns:
+        The results whose target answered
+    """
+    if not settings.TARGET_PREFLIGHT_ENABLED or not results:
+        return results
+    
+    by_target: dict[str, list[int]] = {}
+    for r in results:
+        by_target.setdefault(r.target_ip or task.target_ip, []).append(r.id)
+    
+    dead = unreachable_targets(by_target)
+    for target_ip in sorted(dead):
+        failed = execution_service.fail_pending_results(
+            task.id,
+            by_target[target_ip],
+            f"Target {target_ip} unreachable before the task started",
+            ErrorReason.TARGET_UNREACHABLE,
+        )
+        logger.warning(f"Task {task.id}: target {target_ip} is unreachable, {failed} cases failed")
+    return [r for r in results if (r.target_ip or task.target_ip) not in dead]
+
+
+def _chunk_result_ids(results: list) -> list[list[int]]:
+    """
+    Split pending results into chunks of at most TASK_CHUNK_SIZE result IDs.
+    
+    A chunk never mixes targets. Chunks are interleaved across targets so
+    that every target starts being scanned as soon as workers are free.
+    """
+    size = max(1, settings.TASK_CHUNK_SIZE)
+    
+    by_target: dict[str, list[int]] = {}
+    for r in results:
+        by_target.setdefault(r.target_ip, []).append(r.id)
+    
+    per_target = [
+        [result_ids[i:i + size] for i in range(0, len(result_ids), size)]
+        for result_ids in by_target.values()
+    ]
+    return [
+        chunks[i]
+        for i in range(max((len(c) for c in per_target), default=0))
+        for chunks in per_target
+        if i < len(chunks)
+    ]
+
+
+def _dispatch_chunks(task_id: int, chunks: list[list[int]], priority: int) -> None:
+    """
+    Send one execute_chunk message per chunk, with finalize_task as the chord callback.
+    
+    Chunks carry the task's message priority, so the chunks of tasks from
+    different users interleave on the scan queue.
+    """
+    if not chunks:
+        finalize_task.apply_async(([], task_id), priority=priority)
+        return
+    
+    chord(
+        execute_chunk.s(task_id, result_ids).set(priority=priority) for result_ids in chunks
+    )(finalize_task.s(task_id).set(priority=priority))
+
+
+def queue_task(db: Session, task: Task) -> None:
+    """Queue a task and start it right away if the running limits allow."""
+    QueueService(db).enqueue(task)
+    admit_queued_tasks(db)
+
+
+def admit_queued_tasks(db: Session) -> int:
+    """
+    Admit queued tasks and send their execute_task with fair-share message priority.
+    
+    Returns:
+        Number of tasks admitted
+    """
+    queue_service = QueueService(db)
+    admitted = queue_service.admit()
+    for task in admitted:
+        execute_task.apply_async((task.id,), priority=queue_service.message_priority(task))
+    return len(admitted)
+
+
+def _admit_quietly(db: Session) -> None:
+    """admit_queued_tasks() for cleanup paths, where a failure must not mask the task's outcome."""
+    try:
+        db.rollback()
+        admit_queued_tasks(db)
+    except Exception as e:
+        logger.warning(f"Failed to admit queued tasks: {e}")
+
+
 @celery_app.task(name="app.tasks.executor.test_celery")
 def test_celery():
     """
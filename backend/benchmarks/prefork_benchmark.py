@@ -0,0 +1,92 @@
+"""
+Benchmark: plain Popen vs the pre-forked interpreter pool for .py scripts.
+
+Runs the same short detection-style script N times with each runner and
+prints wall-clock statistics.
+
+Usage (from the backend directory):
+    python benchmarks/prefork_benchmark.py [--runs 50] [--modules socket,ssl,json,requests]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="autosecdet-bench-")
+os.environ.setdefault("SCRIPTS_DIR", os.path.join(WORK_DIR, "scripts"))
+os.environ.setdefault("LOGS_DIR", os.path.join(WORK_DIR, "logs"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.engine.executor import ScriptExecutor  # noqa: E402
+from app.engine.prefork import PythonInterpreterPool  # noqa: E402
+import app.engine.executor as executor_module  # noqa: E402
+
+SCRIPT_TEMPLATE = """
+import sys
+{imports}
+target = sys.argv[1]
+print("checking", target)
+sys.exit(0)
+"""
+
+
+def run_series(executor: ScriptExecutor, runs: int) -> list:
+    """Run the benchmark script `runs` times and return per-run seconds."""
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        status, error_message, _ = executor.execute("bench.py", "127.0.0.1", 0, i)
+        timings.append(time.perf_counter() - start)
+        if status != "pass":
+            raise RuntimeError(f"Benchmark script failed: {error_message}")
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    """Print summary statistics for one runner."""
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{name:<8} runs={len(timings):<4} "
+        f"mean={statistics.mean(timings) * 1000:8.1f}ms "
+        f"p50={statistics.median(timings) * 1000:8.1f}ms "
+        f"p95={p95 * 1000:8.1f}ms "
+        f"total={sum(timings):6.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--modules", default=",".join(settings.SCRIPT_PREFORK_MODULES))
+    args = parser.parse_args()
+    
+    modules = [m for m in args.modules.split(",") if m]
+    imports = "\n".join(
+        f"try:\n    import {m}\nexcept ImportError:\n    pass" for m in modules
+    )
+    
+    executor = ScriptExecutor()
+    with open(executor.scripts_dir / "bench.py", "w") as f:
+        f.write(SCRIPT_TEMPLATE.format(imports=imports))
+    
+    print(f"Script imports: {', '.join(modules)}")
+    
+    settings.SCRIPT_PYTHON_RUNNER = "popen"
+    report("popen", run_series(executor, args.runs))
+    
+    pool = PythonInterpreterPool(size=1, modules=modules)
+    executor_module.get_interpreter_pool = lambda: pool
+    settings.SCRIPT_PYTHON_RUNNER = "prefork"
+    try:
+        run_series(executor, 1)  # start the zygote outside the measurement
+        report("prefork", run_series(executor, args.runs))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,18 @@
 Celery worker entry point.
 
 Usage:
-    # Start worker
-    celery -A celery_worker.celery_app worker --loglevel=info
+    # Start worker consuming every queue
+    celery -A celery_worker.celery_app worker -Q scan,maintenance,celery --loglevel=info
+    
+    # Start one pool per queue (production)
+    celery -A celery_worker.celery_app worker -Q scan -n scan@%h --concurrency=4 --prefetch-multiplier=1 --loglevel=info
+    celery -A celery_worker.celery_app worker -Q maintenance,celery -n maintenance@%h --concurrency=1 --loglevel=info
     
     # Start beat scheduler
     celery -A celery_worker.celery_app beat --loglevel=info
     
     # Start worker with beat (development only)
-    celery -A celery_worker.celery_app worker --beat --loglevel=info
+    celery -A celery_worker.celery_app worker --beat -Q scan,maintenance,celery --loglevel=info
 """
 from app.core.celery import celery_app
 
@@ -19,6 +23,10 @@ from app.tasks import (
     cleanup_expired_tasks,
     archive_audit_logs,
     execute_task,
+    execute_chunk,
+    finalize_task,
+    dispatch_queued_tasks,
+    reap_stale_tasks,
     test_celery,
 )
 
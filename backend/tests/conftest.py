@@ -0,0 +1,17 @@
+"""
+Shared test fixtures.
+"""
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+def redis_server():
+    """In-memory Redis server, fresh for each test."""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    """Client of the in-memory Redis server; Lua scripts run through lupa."""
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
@@ -0,0 +1,65 @@
+"""
+Tests for parsing target discovery scans.
+"""
+from app.engine.discovery import open_ports, parse_nmap_xml
+
+NMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<nmaprun scanner="nmap" args="nmap -oX - -sV 10.0.0.1">
+  <host>
+    <status state="up" reason="syn-ack"/>
+    <address addr="10.0.0.1" addrtype="ipv4"/>
+    <ports>
+      <port protocol="tcp" portid="22">
+        <state state="open" reason="syn-ack"/>
+        <service name="ssh" product="OpenSSH" version="8.9p1"/>
+      </port>
+      <port protocol="tcp" portid="80">
+        <state state="open" reason="syn-ack"/>
+        <service name="http"/>
+      </port>
+      <port protocol="tcp" portid="443">
+        <state state="filtered" reason="no-response"/>
+      </port>
+      <port protocol="udp" portid="161">
+        <state state="open" reason="udp-response"/>
+        <service name="snmp"/>
+      </port>
+    </ports>
+  </host>
+</nmaprun>
+"""
+
+
+def test_parses_ports_and_services():
+    result = parse_nmap_xml("10.0.0.1", NMAP_XML)
+    
+    assert result["target_ip"] == "10.0.0.1"
+    assert result["host_state"] == "up"
+    assert result["scanned_at"]
+    assert result["ports"][0] == {
+        "port": 22,
+        "protocol": "tcp",
+        "state": "open",
+        "service": "ssh",
+        "product": "OpenSSH",
+        "version": "8.9p1",
+    }
+    assert result["ports"][2] == {
+        "port": 443,
+        "protocol": "tcp",
+        "state": "filtered",
+        "service": None,
+        "product": None,
+        "version": None,
+    }
+
+
+def test_open_ports_are_open_tcp_ports():
+    assert open_ports(parse_nmap_xml("10.0.0.1", NMAP_XML)) == [22, 80]
+
+
+def test_host_that_did_not_answer():
+    result = parse_nmap_xml("10.0.0.2", '<nmaprun><runstats/></nmaprun>')
+    
+    assert result["host_state"] is None
+    assert result["ports"] == []
@@ -0,0 +1,69 @@
+"""
+Tests for script output capture.
+"""
+import io
+import os
+
+from app.engine.output import OutputCapture
+
+
+def test_short_output_is_kept_whole_and_logged():
+    log = io.StringIO()
+    capture = OutputCapture(log, summary_chars=100)
+    
+    capture.feed(b"hello\n")
+    capture.feed(b"world\n", final=True)
+    
+    assert capture.summary() == "hello\nworld"
+    assert log.getvalue() == "hello\nworld\n"
+
+
+def test_long_output_keeps_head_and_tail():
+    log = io.StringIO()
+    capture = OutputCapture(log, summary_chars=10)
+    
+    for chunk in (b"abcde", b"fghij", b"klmno", b"pqrst"):
+        capture.feed(chunk)
+    capture.feed(b"", final=True)
+    
+    assert capture.summary() == "abcde\n... [10 characters omitted] ...\npqrst"
+    assert log.getvalue() == "abcdefghijklmnopqrst"
+
+
+def test_tail_buffer_stays_bounded():
+    capture = OutputCapture(io.StringIO(), summary_chars=10)
+    
+    for _ in range(1000):
+        capture.feed(b"x" * 100)
+    
+    assert capture.total_chars == 100000
+    assert capture._tail_len <= 100 + capture.tail_chars
+
+
+def test_multibyte_characters_split_across_chunks():
+    capture = OutputCapture(io.StringIO(), summary_chars=100)
+    data = "détecté".encode("utf-8")
+    
+    capture.feed(data[:2])
+    capture.feed(data[2:], final=True)
+    
+    assert capture.summary() == "détecté"
+
+
+def test_no_output_gives_no_summary():
+    capture = OutputCapture(io.StringIO(), summary_chars=100)
+    capture.feed(b"  \n", final=True)
+    
+    assert capture.summary() is None
+
+
+def test_reads_a_pipe_in_a_thread():
+    capture = OutputCapture(io.StringIO(), summary_chars=100)
+    read_fd, write_fd = os.pipe()
+    capture.start(read_fd)
+    
+    os.write(write_fd, b"from the script\n")
+    os.close(write_fd)
+    capture.finish()
+    
+    assert capture.summary() == "from the script"
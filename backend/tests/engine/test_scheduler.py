@@ -0,0 +1,42 @@
+"""
+Tests for the task scheduler's pure helpers.
+"""
+import pytest
+
+from app.core.config import settings
+from app.engine.scheduler import compute_timeout
+
+
+@pytest.fixture
+def adaptive(monkeypatch):
+    """Adaptive timeouts: 3x p99, between 30s and 1800s, after 5 runs."""
+    monkeypatch.setattr(settings, "SCRIPT_TIMEOUT_SECONDS", 300)
+    monkeypatch.setattr(settings, "SCRIPT_ADAPTIVE_TIMEOUT", True)
+    monkeypatch.setattr(settings, "SCRIPT_ADAPTIVE_TIMEOUT_MULTIPLIER", 3.0)
+    monkeypatch.setattr(settings, "SCRIPT_ADAPTIVE_TIMEOUT_MIN_SECONDS", 30)
+    monkeypatch.setattr(settings, "SCRIPT_ADAPTIVE_TIMEOUT_MAX_SECONDS", 1800)
+    monkeypatch.setattr(settings, "SCRIPT_ADAPTIVE_TIMEOUT_MIN_SAMPLES", 5)
+
+
+def test_explicit_timeout_wins(adaptive):
+    assert compute_timeout(45, p99_seconds=100.0, sample_count=50) == (45, False)
+
+
+def test_default_timeout_without_enough_history(adaptive):
+    assert compute_timeout(None, p99_seconds=None, sample_count=0) == (300, False)
+    assert compute_timeout(None, p99_seconds=100.0, sample_count=4) == (300, False)
+
+
+def test_adaptive_timeout_from_p99(adaptive):
+    assert compute_timeout(None, p99_seconds=100.2, sample_count=5) == (301, True)
+
+
+@pytest.mark.parametrize("p99, expected", [(1.0, 30), (5000.0, 1800)])
+def test_adaptive_timeout_is_clamped(adaptive, p99, expected):
+    assert compute_timeout(None, p99_seconds=p99, sample_count=20) == (expected, True)
+
+
+def test_adaptive_timeouts_can_be_disabled(adaptive, monkeypatch):
+    monkeypatch.setattr(settings, "SCRIPT_ADAPTIVE_TIMEOUT", False)
+    
+    assert compute_timeout(None, p99_seconds=100.0, sample_count=50) == (300, False)
@@ -0,0 +1,67 @@
+"""
+Tests for per-target limiting, running the acquire script against fakeredis.
+"""
+import fakeredis
+
+from app.engine.target_limiter import TargetLimiter
+
+TARGET = "10.0.0.1"
+
+
+def test_limits_concurrent_scripts_per_target(redis_client):
+    limiter = TargetLimiter(max_concurrent=2, launch_rate=0, client=redis_client)
+    
+    first = limiter.try_acquire(TARGET, lease_seconds=30)
+    second = limiter.try_acquire(TARGET, lease_seconds=30)
+    
+    assert first and second
+    assert limiter.try_acquire(TARGET, lease_seconds=30) is None
+    assert limiter.try_acquire("10.0.0.2", lease_seconds=30)
+    
+    limiter.release(TARGET, first)
+    assert limiter.try_acquire(TARGET, lease_seconds=30)
+
+
+def test_expired_leases_free_their_slot(redis_client):
+    limiter = TargetLimiter(max_concurrent=1, launch_rate=0, client=redis_client)
+    # Lease of a crashed worker, expired long ago
+    redis_client.zadd(limiter._lease_key(TARGET), {"lost-worker": 1})
+    
+    assert limiter.try_acquire(TARGET, lease_seconds=30)
+    assert redis_client.zscore(limiter._lease_key(TARGET), "lost-worker") is None
+
+
+def test_spaces_out_launches(redis_client):
+    limiter = TargetLimiter(max_concurrent=0, launch_rate=0.1, client=redis_client)
+    
+    assert limiter.try_acquire(TARGET, lease_seconds=30)
+    assert limiter.try_acquire(TARGET, lease_seconds=30) is None
+    
+    redis_client.delete(limiter._launch_key(TARGET))
+    assert limiter.try_acquire(TARGET, lease_seconds=30)
+
+
+def test_disabled_limiter_does_not_touch_redis(redis_server):
+    redis_server.connected = False
+    limiter = TargetLimiter(max_concurrent=0, launch_rate=0, client=fakeredis.FakeRedis(server=redis_server))
+    
+    assert not limiter.enabled
+    assert limiter.try_acquire(TARGET)
+
+
+def test_fails_open_without_redis(redis_server):
+    redis_server.connected = False
+    limiter = TargetLimiter(max_concurrent=1, launch_rate=0, client=fakeredis.FakeRedis(server=redis_server))
+    
+    assert limiter.try_acquire(TARGET, lease_seconds=30)
+    assert limiter.try_acquire(TARGET, lease_seconds=30)
+    limiter.release(TARGET, "token")
+
+
+def test_short_lease_does_not_shorten_the_lease_set_ttl(redis_client):
+    limiter = TargetLimiter(max_concurrent=5, launch_rate=0, client=redis_client)
+    
+    limiter.try_acquire(TARGET, lease_seconds=3600)
+    limiter.try_acquire(TARGET, lease_seconds=10)
+    
+    assert redis_client.pttl(limiter._lease_key(TARGET)) > 3600 * 1000
@@ -0,0 +1,49 @@
+"""
+Tests for verdicts reported by scripts on VERDICT_FD.
+"""
+import pytest
+
+from app.engine.verdicts import Verdict, VerdictReader, parse_verdict
+
+
+def test_parses_a_verdict():
+    line = '{"check": "ssh-root-login", "status": "fail", "message": "PermitRootLogin yes"}'
+    
+    assert parse_verdict(line) == Verdict("ssh-root-login", "fail", "PermitRootLogin yes")
+
+
+def test_message_is_optional_and_kept_as_text():
+    assert parse_verdict('{"check": "a", "status": "pass"}') == Verdict("a", "pass")
+    assert parse_verdict('{"check": "a", "status": "error", "message": 3}').message == "3"
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "not json",
+        '["check", "a"]',
+        '{"status": "pass"}',
+        '{"check": "", "status": "pass"}',
+        '{"check": "a", "status": "vulnerable"}',
+    ],
+)
+def test_rejects_invalid_lines(line):
+    with pytest.raises(ValueError):
+        parse_verdict(line)
+
+
+def test_reader_keeps_the_last_verdict_per_check_and_logs_them():
+    logged = []
+    reader = VerdictReader(logged.append)
+    
+    reader.feed(b'{"check": "a", "status": "pass"}\ngarbage\n{"check": "b", "sta')
+    reader.feed(b'tus": "fail"}\n{"check": "a", "status": "error"}')
+    reader.feed(b"", final=True)
+    
+    assert reader.verdicts == {"a": Verdict("a", "error"), "b": Verdict("b", "fail")}
+    assert [line.strip() for line in logged] == [
+        "[verdict] a: pass",
+        "[verdict] ignored invalid line (Expecting value: line 1 column 1 (char 0)): garbage",
+        "[verdict] b: fail",
+        "[verdict] a: error",
+    ]
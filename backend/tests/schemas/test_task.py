@@ -0,0 +1,32 @@
+"""
+Tests for the task request schemas.
+"""
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas.task import TaskCreate, TaskParallelismUpdate
+
+
+@pytest.fixture(autouse=True)
+def max_parallelism(monkeypatch):
+    """Cap parallelism at 8."""
+    monkeypatch.setattr(settings, "TASK_MAX_PARALLELISM", 8)
+
+
+def test_create_accepts_parallelism_up_to_the_cap():
+    assert TaskCreate(target_ip="10.0.0.1", parallelism=8).parallelism == 8
+    assert TaskCreate(target_ip="10.0.0.1").parallelism is None
+
+
+def test_create_rejects_parallelism_above_the_cap():
+    with pytest.raises(ValidationError, match="at most 8"):
+        TaskCreate(target_ip="10.0.0.1", parallelism=9)
+
+
+def test_update_rejects_parallelism_above_the_cap():
+    assert TaskParallelismUpdate(parallelism=8).parallelism == 8
+    with pytest.raises(ValidationError, match="at most 8"):
+        TaskParallelismUpdate(parallelism=9)
+    with pytest.raises(ValidationError):
+        TaskParallelismUpdate(parallelism=0)
@@ -0,0 +1,27 @@
+"""
+Tests for case runtime statistics.
+"""
+import pytest
+
+from app.services.case_stats_service import percentile
+
+
+@pytest.mark.parametrize(
+    "pct, expected",
+    [
+        (0, 1.0),
+        (50, 5.0),
+        (90, 9.0),
+        (95, 10.0),
+        (99, 10.0),
+        (100, 10.0),
+    ],
+)
+def test_nearest_rank_percentile(pct, expected):
+    values = [float(v) for v in range(1, 11)]
+    
+    assert percentile(values, pct) == expected
+
+
+def test_percentile_of_a_single_value():
+    assert percentile([3.5], 99) == 3.5
@@ -0,0 +1,54 @@
+"""
+Tests for the write-behind progress buffer, running its Lua script against fakeredis.
+"""
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.services.progress_buffer import DIRTY_KEY, ProgressBuffer
+
+
+class UnavailableSession:
+    """Session whose database is down."""
+    
+    def query(self, *args, **kwargs):
+        raise OperationalError("SELECT", {}, Exception("connection refused"))
+    
+    def rollback(self):
+        pass
+
+
+def test_buffered_results_are_counted(redis_client):
+    buffer = ProgressBuffer(client=redis_client)
+    buffer.complete_result(1, 10, "pass")
+    buffer.complete_result(1, 11, "error", error_message="boom")
+    buffer.complete_result(1, 10, "fail")  # a later outcome replaces the earlier one
+    
+    assert buffer.pending_counts([1, 2]) == {
+        1: {"completed_cases": 2, "passed_count": 0, "failed_count": 1, "error_count": 1},
+    }
+    assert set(buffer.pending_results(1)) == {10, 11}
+    assert redis_client.smembers(DIRTY_KEY) == {"1"}
+
+
+def test_take_script_empties_the_task_atomically(redis_client):
+    buffer = ProgressBuffer(client=redis_client)
+    buffer.complete_result(1, 10, "pass")
+    buffer.complete_result(2, 20, "pass")
+    
+    raw = buffer._take(keys=[buffer._results_key(1), DIRTY_KEY], args=[1])
+    
+    assert dict(zip(raw[::2], raw[1::2])).keys() == {"10"}
+    assert buffer.pending_results(1) == {}
+    assert redis_client.smembers(DIRTY_KEY) == {"2"}
+    assert buffer._take(keys=[buffer._results_key(1), DIRTY_KEY], args=[1]) == []
+
+
+def test_failed_flush_puts_results_back(redis_client):
+    buffer = ProgressBuffer(client=redis_client)
+    buffer.complete_result(1, 10, "pass")
+    
+    with pytest.raises(OperationalError):
+        buffer.flush_task(UnavailableSession(), 1)
+    
+    assert buffer.pending_results(1)[10]["status"] == "pass"
+    assert redis_client.smembers(DIRTY_KEY) == {"1"}
@@ -0,0 +1,52 @@
+"""
+Tests for task priorities and fair share.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.queue_service import MAX_PRIORITY, MIN_PRIORITY, QueueService, effective_priority
+
+
+class CountingSession:
+    """Session answering the one COUNT query message_priority() makes."""
+    
+    def __init__(self, count: int):
+        self.count = count
+    
+    def query(self, *args):
+        return self
+    
+    def filter(self, *args):
+        return self
+    
+    def scalar(self):
+        return self.count
+
+
+@pytest.mark.parametrize(
+    "priority, user_load, expected",
+    [
+        (5, 0, 5),
+        (5, 2, 3),
+        (5, 10, MIN_PRIORITY),
+        (42, 0, MAX_PRIORITY),
+        (42, 3, MAX_PRIORITY - 3),
+    ],
+)
+def test_effective_priority(priority, user_load, expected):
+    assert effective_priority(priority, user_load) == expected
+
+
+def test_effective_priority_defaults(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_DEFAULT_PRIORITY", 4)
+    
+    assert effective_priority(None, 1) == 3
+
+
+@pytest.mark.parametrize("priority, user_load, expected", [(9, 0, 0), (5, 2, 6), (0, 0, 9), (2, 5, 9)])
+def test_message_priority_is_inverted_for_the_broker(redis_client, priority, user_load, expected):
+    task = SimpleNamespace(id=7, user_id=1, priority=priority)
+    
+    assert QueueService(CountingSession(user_load), client=redis_client).message_priority(task) == expected
@@ -0,0 +1,38 @@
+"""
+Tests for the Celery task helpers in app.tasks.executor.
+"""
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.tasks.executor import _chunk_result_ids
+
+
+def _results(*targets):
+    """Pending results with IDs 1..n against the given targets."""
+    return [SimpleNamespace(id=i, target_ip=ip) for i, ip in enumerate(targets, start=1)]
+
+
+def test_chunks_hold_at_most_chunk_size_results(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CHUNK_SIZE", 2)
+    
+    chunks = _chunk_result_ids(_results(*["10.0.0.1"] * 5))
+    
+    assert chunks == [[1, 2], [3, 4], [5]]
+
+
+def test_chunks_never_mix_targets_and_interleave_them(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CHUNK_SIZE", 2)
+    
+    chunks = _chunk_result_ids(_results("10.0.0.1", "10.0.0.1", "10.0.0.1", "10.0.0.2", "10.0.0.3"))
+    
+    assert chunks == [[1, 2], [4], [5], [3]]
+
+
+def test_chunk_size_below_one_is_treated_as_one(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_CHUNK_SIZE", 0)
+    
+    assert _chunk_result_ids(_results("10.0.0.1", "10.0.0.1")) == [[1], [2]]
+
+
+def test_no_results_give_no_chunks():
+    assert _chunk_result_ids([]) == []
@@ -128,7 +128,7 @@ export const tasksApi = {
     my_tasks?: boolean
   }) => api.get('/tasks', { params }),
   get: (id: number) => api.get(`/tasks/${id}`),
-  create: (data: { target_ip: string; description?: string; case_ids?: number[] }) =>
+  create: (data: { target_ip: string; description?: string; case_ids?: number[]; reuse_results?: boolean }) =>
     api.post('/tasks', data),
   stop: (id: number) => api.post(`/tasks/${id}/stop`),
   retry: (id: number) => api.post(`/tasks/${id}/retry`),
@@ -34,7 +34,10 @@ export function getStatusColor(status: string): string {
     case 'running':
       return 'text-blue-600 bg-blue-100'
     case 'pending':
+    case 'queued':
       return 'text-gray-600 bg-gray-100'
+    case 'paused':
+      return 'text-yellow-600 bg-yellow-100'
     case 'stopped':
       return 'text-orange-600 bg-orange-100'
     default:
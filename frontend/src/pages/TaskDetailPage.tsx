@@ -19,7 +19,7 @@ export default function TaskDetailPage() {
     enabled: taskId > 0,
     refetchInterval: (query) => {
       const status = query.state.data?.data?.status
-      return status === 'running' || status === 'pending' ? 3000 : false
+      return status === 'running' || status === 'pending' || status === 'queued' ? 3000 : false
     },
   })
 
@@ -72,8 +72,10 @@ export default function TaskDetailPage() {
 
   const getStatusText = (status: string) => {
     const map: Record<string, string> = {
+      queued: '排队中',
       pending: '等待中',
       running: '运行中',
+      paused: '已暂停',
       completed: '已完成',
       stopped: '已停止',
       error: '错误',
@@ -116,7 +118,7 @@ export default function TaskDetailPage() {
           </div>
         </div>
         <div className="flex items-center gap-2">
-          {(task.status === 'pending' || task.status === 'running') && (
+          {(task.status === 'queued' || task.status === 'pending' || task.status === 'running') && (
             <button
               onClick={() => stopMutation.mutate()}
               className="flex items-center gap-2 px-4 py-2 border border-red-300 text-red-600 rounded-lg hover:bg-red-50"
@@ -227,6 +229,14 @@ export default function TaskDetailPage() {
                     <span className={cn('px-2 py-1 text-xs font-medium rounded', getStatusColor(r.status))}>
                       {getStatusText(r.status)}
                     </span>
+                    {r.reused_from_id && (
+                      <span
+                        className="ml-2 px-2 py-1 text-xs font-medium rounded bg-gray-100 text-gray-600"
+                        title={`复用自结果 #${r.reused_from_id}，未重新执行`}
+                      >
+                        复用
+                      </span>
+                    )}
                   </td>
                   <td className="px-6 py-4 text-sm text-gray-500">
                     {r.error_message ? (
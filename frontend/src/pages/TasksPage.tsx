@@ -15,6 +15,7 @@ export default function TasksPage() {
   const [description, setDescription] = useState('')
   const [selectedCaseIds, setSelectedCaseIds] = useState<number[]>([])
   const [selectAll, setSelectAll] = useState(true)
+  const [reuseResults, setReuseResults] = useState(false)
   const [expandedCategories, setExpandedCategories] = useState<number[]>([])
 
   const { data: tasksData, isLoading } = useQuery({
@@ -83,7 +84,7 @@ export default function TasksPage() {
   }
 
   const createMutation = useMutation({
-    mutationFn: (data: { target_ip: string; description?: string; case_ids?: number[] }) => tasksApi.create(data),
+    mutationFn: (data: { target_ip: string; description?: string; case_ids?: number[]; reuse_results?: boolean }) => tasksApi.create(data),
     onSuccess: (response) => {
       queryClient.invalidateQueries({ queryKey: ['tasks'] })
       setShowCreate(false)
@@ -134,8 +135,10 @@ export default function TasksPage() {
 
   const getStatusText = (status: string) => {
     const map: Record<string, string> = {
+      queued: '排队中',
       pending: '等待中',
       running: '运行中',
+      paused: '已暂停',
       completed: '已完成',
       stopped: '已停止',
       error: '错误',
@@ -188,6 +191,17 @@ export default function TasksPage() {
                 maxLength={500}
               />
             </div>
+            <div>
+              <label className="flex items-center gap-2 text-sm text-gray-700">
+                <input
+                  type="checkbox"
+                  checked={reuseResults}
+                  onChange={(e) => setReuseResults(e.target.checked)}
+                  className="rounded border-gray-300 text-primary-600 focus:ring-primary-500"
+                />
+                复用近期结果（脚本未变更的用例不再重复执行）
+              </label>
+            </div>
             <div>
               <div className="flex items-center justify-between mb-2">
                 <label className="block text-sm font-medium text-gray-700">选择用例</label>
@@ -316,7 +330,8 @@ export default function TasksPage() {
                 onClick={() => createMutation.mutate({ 
                 target_ip: targetIp,
                 description: description || undefined,
-                case_ids: selectAll ? undefined : selectedCaseIds 
+                case_ids: selectAll ? undefined : selectedCaseIds,
+                reuse_results: reuseResults || undefined
               })}
                 disabled={!validateIp(targetIp) || createMutation.isPending || (!selectAll && selectedCaseIds.length === 0)}
                 className="flex items-center gap-2 px-4 py-2 bg-primary-600 text-white rounded-lg hover:bg-primary-700 disabled:opacity-50"
@@ -325,7 +340,7 @@ export default function TasksPage() {
                 开始检测
               </button>
               <button
-                onClick={() => { setShowCreate(false); setTargetIp(''); setDescription(''); setSelectedCaseIds([]); setSelectAll(true) }}
+                onClick={() => { setShowCreate(false); setTargetIp(''); setDescription(''); setSelectedCaseIds([]); setSelectAll(true); setReuseResults(false) }}
                 className="px-4 py-2 border border-gray-300 rounded-lg hover:bg-gray-50"
               >
                 取消
@@ -367,6 +382,14 @@ export default function TasksPage() {
                     <span className={cn('px-2 py-1 text-xs font-medium rounded', getStatusColor(task.status))}>
                       {getStatusText(task.status)}
                     </span>
+                    {task.queue_position && (
+                      <div
+                        className="mt-1 text-xs text-gray-500"
+                        title={task.estimated_start_time ? `预计开始：${formatDate(task.estimated_start_time)}` : undefined}
+                      >
+                        排队第 {task.queue_position} 位
+                      </div>
+                    )}
                   </td>
                   <td className="px-6 py-4">
                     <div className="flex items-center gap-2">
@@ -396,7 +419,7 @@ export default function TasksPage() {
                       >
                         <Eye className="h-4 w-4" />
                       </button>
-                      {(task.status === 'pending' || task.status === 'running') && (
+                      {(task.status === 'queued' || task.status === 'pending' || task.status === 'running') && (
                         <button
                           onClick={() => stopMutation.mutate(task.id)}
                           className="p-2 text-gray-500 hover:text-red-600 hover:bg-gray-100 rounded"